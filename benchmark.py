@@ -0,0 +1,187 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import UTC, datetime
+
+from generate import ExportDataDictionary
+from schema import build_schema
+from synthetic_schema import SyntheticSchema
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+RESULTS_FILE = "benchmark_results.json"
+
+
+def bench_transform(rows, _tmp_dir):
+    # Row transformation done by get_schema(), without the database round trip.
+    build_schema(rows)
+
+
+def bench_create_table(schema, tmp_dir):
+    workbook = ExportDataDictionary(os.path.join(tmp_dir, "create_table.xlsx"))
+    workbook._worksheet = workbook.add_worksheet("Data Dictionary")
+    for table_name, columns in schema.items():
+        workbook.create_table(table_name, columns)
+    return workbook
+
+
+def bench_generate_xlsx(schema, tmp_dir):
+    ExportDataDictionary(os.path.join(tmp_dir, "generate_xlsx.xlsx")).generate_xlsx(schema)
+
+
+def bench_generate_xlsx_simple(schema, tmp_dir):
+    ExportDataDictionary(os.path.join(tmp_dir, "generate_xlsx_simple.xlsx")).generate_xlsx_simple(schema)
+
+
+def measure(function, *args, memory=True):
+    """Run ``function`` and return (seconds, peak traced bytes or None, result)."""
+    gc.collect()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        # Tracing slows allocation-heavy code down a lot, so memory is measured in a separate run.
+        gc.collect()
+        tracemalloc.start()
+        function(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def cells_written(synthetic: SyntheticSchema) -> int:
+    """Cells create_table() writes for the synthetic schema: name and description rows, header, columns."""
+    return synthetic.tables * (3 + 7 * (synthetic.columns_per_table + 1))
+
+
+def _result(phase, synthetic, seconds, peak, cells=None):
+    return {
+        "phase": phase,
+        "tables": synthetic.tables,
+        "columns": synthetic.columns,
+        "seconds": round(seconds, 4),
+        "columns_per_sec": round(synthetic.columns / seconds) if seconds else None,
+        "cells_per_sec": round(cells / seconds) if cells and seconds else None,
+        "peak_bytes": peak,
+    }
+
+
+def run_size(synthetic: SyntheticSchema, memory: bool = True) -> list:
+    rows = synthetic.rows()
+    schema = build_schema(rows)
+    cells = cells_written(synthetic)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.devnull, "w", encoding="utf-8") as devnull:
+        # The generate_xlsx* methods print progress and a summary line; keep that out of the timings.
+        with contextlib.redirect_stdout(devnull):
+            seconds, peak, _ = measure(bench_transform, rows, tmp_dir, memory=memory)
+            results.append(_result("transform", synthetic, seconds, peak))
+
+            seconds, _, workbook = measure(bench_create_table, schema, tmp_dir, memory=False)
+            results.append(_result("create_table", synthetic, seconds, None, cells))
+            seconds, _, _ = measure(workbook.close, memory=False)
+            results.append(_result("close", synthetic, seconds, None))
+
+            for phase, function in (
+                ("generate_xlsx", bench_generate_xlsx),
+                ("generate_xlsx_simple", bench_generate_xlsx_simple),
+            ):
+                seconds, peak, _ = measure(function, schema, tmp_dir, memory=memory)
+                results.append(_result(phase, synthetic, seconds, peak, cells))
+    return results
+
+
+def format_result(entry: dict) -> str:
+    line = f"{entry['phase']:>22} {entry['tables']:>8} tables: {entry['seconds']:8.3f}s"
+    line += f" {entry['columns_per_sec']:>10} col/s"
+    if entry.get("cells_per_sec"):
+        line += f" {entry['cells_per_sec']:>10} cells/s"
+    if entry["peak_bytes"] is not None:
+        line += f" {entry['peak_bytes'] / 2**20:8.1f} MiB peak"
+    return line
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: list, baseline_path: str):
+    """Print the throughput change of every phase against an earlier results file."""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {(entry["phase"], entry["tables"]): entry for entry in baseline["results"]}
+    for entry in results:
+        before = previous.get((entry["phase"], entry["tables"]))
+        if before and before["columns_per_sec"] and entry["columns_per_sec"]:
+            change = entry["columns_per_sec"] / before["columns_per_sec"] - 1
+            line = f"{entry['phase']:>22} {entry['tables']:>8} tables: {change:+.1%} columns/sec"
+            if before.get("cells_per_sec") and entry["cells_per_sec"]:
+                line += f", {entry['cells_per_sec'] / before['cells_per_sec'] - 1:+.1%} cells/sec"
+            print(line)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data dictionary pipeline on synthetic schemas.")
+    parser.add_argument("--tables", type=int, nargs="+", default=list(DEFAULT_SIZES), help="schema sizes to run")
+    parser.add_argument("--columns", type=int, default=10, help="columns per table")
+    parser.add_argument("--prefixes", type=int, default=20, help="distinct table prefixes (sheets)")
+    parser.add_argument("--comment-length", type=int, default=40, help="characters per column comment")
+    parser.add_argument("--unicode-ratio", type=float, default=0.1, help="share of comments with non-ASCII text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--output", default=RESULTS_FILE, help=f"results file (default: {RESULTS_FILE})")
+    parser.add_argument("--compare", metavar="PATH", help="earlier results file to compare throughput against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for tables in args.tables:
+        synthetic = SyntheticSchema(
+            tables, args.columns, args.prefixes, args.comment_length, args.unicode_ratio, seed=args.seed
+        )
+        for entry in run_size(synthetic, memory=not args.no_memory):
+            print(format_result(entry))
+            results.append(entry)
+
+    report = {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {
+            "columns_per_table": args.columns,
+            "prefixes": args.prefixes,
+            "comment_length": args.comment_length,
+            "unicode_ratio": args.unicode_ratio,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as results_file:
+        json.dump(report, results_file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    main()
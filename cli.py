@@ -0,0 +1,456 @@
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import os
+import re
+import sys
+
+from grouping import get_group_by
+from metrics import collect_metrics
+from schema import SCAN_OPTIONS
+from table_filter import TableFilter
+from writers import OUTPUT_FORMATS, get_writer
+
+# Everything imported at module level here is standard library or pure Python
+# without third party imports, so that --help and --dry-run start instantly.
+# Database drivers and xlsxwriter are imported only once a backend or the xlsx
+# format is actually used.
+
+CONFIG_FILE = "configs.py"
+PASSWORD_ENV = "EXPORT_DB_PASSWORD"  # noqa: S105 - name of the variable, not a password
+
+
+class Backend:
+    """
+    A registered database backend: where its connector class lives, which
+    section of configs.py holds its connection settings, the connector
+    arguments it takes, which of them it cannot do without, and how its
+    tables are grouped into sheets by default (a grouping.get_group_by() spec).
+    """
+
+    def __init__(
+        self,
+        module: str,
+        class_name: str,
+        config: str,
+        options: tuple,
+        group_by: str,
+        required: tuple = ("db_host", "db_user", "db_password", "db_name"),
+    ):
+        self.module = module
+        self.class_name = class_name
+        self.config = config
+        self.options = options
+        self.group_by = group_by
+        self.required = required
+
+    def load(self):
+        """Import the connector module (and with it the driver) and return the connector class."""
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def load_group_by(self, spec: str = None, max_tables: int = None):
+        """The sheet grouping function for ``spec``, the backend's default grouping when None."""
+        return get_group_by(spec or self.group_by, max_tables)
+
+
+BACKENDS = {
+    "mysql": Backend(
+        "mysql_connector",
+        "MySQLConnector",
+        config="mysql_config",
+        options=("db_host", "db_port", "db_user", "db_password", "db_name", *SCAN_OPTIONS),
+        group_by="prefix",
+    ),
+    "mssql": Backend(
+        "mssql_connector",
+        "MSSQLConnector",
+        config="mssql_config",
+        options=("db_host", "db_port", "db_user", "db_password", "db_name", "schemas", *SCAN_OPTIONS),
+        group_by="schema",
+    ),
+    # Schema DDL dumps, read without connecting to any database.
+    "ddl": Backend(
+        "ddl_source",
+        "DdlSchemaSource",
+        config="ddl_config",
+        options=("dump_file", "dialect"),
+        group_by="prefix",
+        required=("dump_file",),
+    ),
+    # Runs stored in a schema catalog by earlier exports (--catalog).
+    "catalog": Backend(
+        "schema_catalog",
+        "CatalogSource",
+        config="catalog_config",
+        options=("catalog_file", "db_name", "db_host", "run_id"),
+        group_by="prefix",
+        required=("catalog_file", "db_name"),
+    ),
+}
+
+
+def register_backend(name: str, backend: Backend):
+    BACKENDS[name] = backend
+
+
+def load_config(path: str):
+    """
+    Load configs.py from ``path``. It is not imported from sys.path, which
+    does not include the working directory when run as a console script.
+    """
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location("configs", path)
+    configs = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(configs)
+    return configs
+
+
+def serve_address(value: str) -> tuple:
+    """[HOST:]PORT of --serve as (host, port); the host defaults to localhost."""
+    host, _, port = value.rpartition(":")
+    if not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected [HOST:]PORT, not {value!r}")
+    return host or "127.0.0.1", int(port)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="export-data-dictionary",
+        description="Export database table and column metadata to a data dictionary.",
+    )
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="mysql")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"settings file (default: {CONFIG_FILE})")
+
+    connection = parser.add_argument_group("connection", "override the settings of the backend in the config file")
+    connection.add_argument("--host", dest="db_host")
+    connection.add_argument("--port", dest="db_port", type=int)
+    connection.add_argument("--user", dest="db_user")
+    connection.add_argument("--password", dest="db_password", help=f"prefer the {PASSWORD_ENV} environment variable")
+    connection.add_argument("--database", dest="db_name")
+    connection.add_argument("--schema", dest="schemas", action="append", help="MSSQL schema to export (repeatable)")
+    connection.add_argument("--dump-file", help="DDL dump to read with --backend ddl (plain or gzip compressed)")
+    connection.add_argument("--dialect", choices=("mysql", "mssql"), help="SQL dialect of the dump (default: detected)")
+    connection.add_argument("--run-id", type=int, help="catalog run to export with --backend catalog (default: latest)")
+
+    tables = parser.add_argument_group(
+        "tables",
+        "select tables by name: a glob such as billing_*, like:<SQL LIKE pattern> or re:<regular expression>",
+    )
+    tables.add_argument("--include", action="append", metavar="PATTERN", help="export matching tables (repeatable)")
+    tables.add_argument("--exclude", action="append", metavar="PATTERN", help="skip matching tables (repeatable)")
+    tables.add_argument(
+        "--exclude-schema", dest="exclude_schemas", action="append", metavar="NAME", help="MSSQL schema to skip"
+    )
+
+    scan = parser.add_argument_group("catalog scan", "split the column scan of very large databases")
+    scan.add_argument("--chunk-tables", type=int, metavar="N", help="scan N tables per query, several concurrently")
+    scan.add_argument("--chunk-timeout", type=float, metavar="SECONDS", help="statement timeout of each chunk")
+    scan.add_argument("--chunk-retries", type=int, metavar="N", help="retries of a failed chunk (default: 2)")
+
+    output = parser.add_argument_group("output", "override export_config in the config file")
+    output.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS)
+    output.add_argument("--output", help="output file (default: data_dictionary.<format>)")
+    output.add_argument("--streaming", action="store_true", default=None)
+    output.add_argument(
+        "--details", action="store_true", default=None, help="also export indexes, foreign keys and constraints"
+    )
+    output.add_argument(
+        "--group-by",
+        metavar="GROUPING",
+        help="sheet per table prefix, schema or re:<regex> capture group (default: prefix on MySQL, schema on MSSQL)",
+    )
+    output.add_argument("--max-tables-per-sheet", type=int, help="continue a group on '<group> (2)', ... past this")
+    output.add_argument(
+        "--workbook-rows", type=int, help="start another workbook (<output>_2.xlsx, ...) past this many rows"
+    )
+    output.add_argument(
+        "--parallel-sheets",
+        action="store_true",
+        default=None,
+        help="render and compress the sheets of the xlsx workbook in worker processes",
+    )
+    output.add_argument("--cache-dir")
+    output.add_argument(
+        "--catalog",
+        dest="catalog_file",
+        metavar="FILE",
+        help="also store the schema in this SQLite schema catalog (the source of --backend catalog)",
+    )
+    output.add_argument("--partition-dir")
+    output.add_argument("--metrics-file")
+    output.add_argument("--profile-file")
+
+    serve = parser.add_argument_group("serve", "serve dictionaries over HTTP instead of exporting one")
+    serve.add_argument(
+        "--serve", type=serve_address, metavar="[HOST:]PORT", help="answer GET /<database>.<format> on this address"
+    )
+    serve.add_argument(
+        "--serve-database", dest="serve_databases", action="append", metavar="NAME", help="only serve this database"
+    )
+    serve.add_argument(
+        "--serve-cache-mb", type=int, default=256, metavar="MB", help="size of the rendered output cache (default: 256)"
+    )
+
+    profile = parser.add_argument_group(
+        "data profile", "sample the data of every column: null ratio, distinct values, min/max and examples"
+    )
+    profile.add_argument("--data-profile", action="store_true", default=None, help="add the profile columns")
+    profile.add_argument(
+        "--data-profile-file", metavar="FILE", help="keep profiles here and continue an unfinished run from it"
+    )
+    profile.add_argument("--data-profile-rows", type=int, metavar="N", help="rows sampled per table (default: 1000)")
+    profile.add_argument(
+        "--data-profile-budget", type=float, metavar="SECONDS", help="time for all the tables (default: 300)"
+    )
+    profile.add_argument(
+        "--data-profile-table-timeout", type=float, metavar="SECONDS", help="time for one table (default: 10)"
+    )
+    profile.add_argument("--data-profile-workers", type=int, metavar="N", help="tables sampled at once (default: 2)")
+    parser.add_argument("--dry-run", action="store_true", help="show what would be exported without connecting")
+    return parser
+
+
+def resolve(args, configs) -> tuple:
+    """Merge the command line over configs.py into (connector arguments, export options)."""
+    backend = BACKENDS[args.backend]
+    connection = dict(getattr(configs, backend.config, None) or {})
+    if os.environ.get(PASSWORD_ENV):
+        connection["db_password"] = os.environ[PASSWORD_ENV]
+    for option in backend.options:
+        if getattr(args, option, None) is not None:
+            connection[option] = getattr(args, option)
+    connection = {option: connection[option] for option in backend.options if option in connection}
+
+    options = {"output_format": "xlsx", "streaming": False, "details": False}
+    options.update(getattr(configs, "export_config", None) or {})
+    for option in (
+        "output_format",
+        "streaming",
+        "details",
+        "include",
+        "exclude",
+        "exclude_schemas",
+        "group_by",
+        "max_tables_per_sheet",
+        "workbook_rows",
+        "parallel_sheets",
+        "cache_dir",
+        "catalog_file",
+        "data_profile",
+        "data_profile_file",
+        "data_profile_rows",
+        "data_profile_budget",
+        "data_profile_table_timeout",
+        "data_profile_workers",
+        "partition_dir",
+        "metrics_file",
+        "profile_file",
+    ):
+        if getattr(args, option) is not None:
+            options[option] = getattr(args, option)
+    options["output"] = args.output or f"data_dictionary.{options['output_format']}"
+    return connection, options
+
+
+def write_dictionary(schema, options: dict, group_by):
+    if options.get("partition_dir"):
+        from partitioned_export import export_partitioned  # pylint: disable=import-outside-toplevel
+
+        export_partitioned(schema, options["partition_dir"], group_by=group_by)
+    elif options["output_format"] != "xlsx":
+        get_writer(options["output_format"])(options["output"]).write_schema(schema)
+    elif options.get("parallel_sheets") and not options.get("workbook_rows"):
+        from parallel_workbook import generate_xlsx_parallel  # pylint: disable=import-outside-toplevel
+
+        generate_xlsx_parallel(options["output"], schema, group_by=group_by)
+    else:
+        from generate import generate_xlsx_files  # pylint: disable=import-outside-toplevel
+
+        generate_xlsx_files(options["output"], schema, group_by=group_by, workbook_rows=options.get("workbook_rows"))
+
+
+def open_catalog(path: str = None):
+    """The SchemaCatalog at ``path`` as a context manager, or a context yielding None without a path."""
+    if path is None:
+        return contextlib.nullcontext()
+    from schema_catalog import SchemaCatalog  # pylint: disable=import-outside-toplevel
+
+    return SchemaCatalog(path)
+
+
+def catalogued(schema, catalog, connection: dict):
+    """
+    Store ``schema`` in ``catalog`` (a SchemaCatalog, or None for no catalog)
+    too: a schema dict right away, a schema stream table by table as it is written.
+    """
+    if catalog is None:
+        return schema
+    db_host = connection.get("db_host", "")
+    db_name = connection.get("db_name") or connection.get("dump_file")
+    if isinstance(schema, dict):
+        catalog.store(schema, db_host, db_name)
+        return schema
+    return catalog.record(schema, db_host, db_name)
+
+
+# export_config keys of the data profile and the DataProfiler arguments they set.
+DATA_PROFILE_OPTIONS = {
+    "data_profile_rows": "sample_rows",
+    "data_profile_budget": "budget",
+    "data_profile_table_timeout": "table_timeout",
+    "data_profile_workers": "workers",
+    "data_profile_file": "store_path",
+}
+
+
+def profiled(schema: dict, connector, options: dict) -> dict:
+    """``schema``, with sampled data profiles attached to its tables when ``data_profile`` is set."""
+    if not options.get("data_profile"):
+        return schema
+    from data_profile import DataProfiler  # pylint: disable=import-outside-toplevel
+
+    arguments = {argument: options[option] for option, argument in DATA_PROFILE_OPTIONS.items() if option in options}
+    DataProfiler(connector, **arguments).profile_schema(schema)
+    return schema
+
+
+def export(connector, connection: dict, options: dict, group_by, catalog=None):
+    """
+    Run one export with ``connector``, the same way for every backend.
+    ``group_by`` is the sheet grouping function of xlsx and partitioned output,
+    and the exported schema is also stored in ``catalog`` when given.
+    """
+    output = options.get("partition_dir") or options["output"]
+    if options.get("cache_dir"):
+        from schema_cache import SchemaCache  # pylint: disable=import-outside-toplevel
+
+        cache_host = connection["db_host"]
+        if "db_port" in connection:
+            cache_host = f"{cache_host}:{connection['db_port']}"
+        schema, changed = SchemaCache(options["cache_dir"], cache_host, connection["db_name"]).refresh(connector)
+        schema = catalogued(schema, catalog, connection)
+        if changed or not os.path.exists(output):
+            write_dictionary(profiled(schema, connector, options), options, group_by)
+        else:
+            print(f"Schema of {connection['db_name']} unchanged, skipping {output}")
+    elif options["streaming"] and options["output_format"] == "xlsx" and not options.get("partition_dir"):
+        from generate import generate_xlsx_files  # pylint: disable=import-outside-toplevel
+
+        generate_xlsx_files(
+            options["output"],
+            catalogued(connector.iter_schema(), catalog, connection),
+            group_by=group_by,
+            workbook_rows=options.get("workbook_rows"),
+            constant_memory=True,
+        )
+    elif options["streaming"]:
+        # The text writers write each table as soon as it is read.
+        write_dictionary(catalogued(connector.iter_schema(), catalog, connection), options, group_by)
+    else:
+        # Profiled after cataloguing: the catalog keeps the schema, not the sampled data.
+        schema = catalogued(connector.get_schema(details=options["details"]), catalog, connection)
+        write_dictionary(profiled(schema, connector, options), options, group_by)
+
+
+def serve_dictionaries(args, backend: Backend, connection: dict, options: dict, group_by, table_filter: TableFilter):
+    """Serve the dictionaries of the databases reachable with ``connection`` over HTTP until interrupted."""
+    from dictionary_server import DictionaryService, serve  # pylint: disable=import-outside-toplevel
+
+    connector_class = backend.load()
+
+    def open_connector(db_name: str):
+        return connector_class(**{**connection, "db_name": db_name}, table_filter=table_filter)
+
+    def list_databases():
+        with connector_class(**connection, table_filter=table_filter) as connector:
+            return connector.database_names()
+
+    def render(schema, output_format: str, path: str):
+        # One file per request: no partitions and no workbook split.
+        write_options = {**options, "output_format": output_format, "output": path}
+        write_options.pop("partition_dir", None)
+        write_options.pop("workbook_rows", None)
+        write_dictionary(schema, write_options, group_by)
+
+    service = DictionaryService(
+        open_connector,
+        render,
+        cache_bytes=args.serve_cache_mb * 1024 * 1024,
+        databases=args.serve_databases,
+        details=options["details"],
+        list_databases=list_databases,
+    )
+    serve(service, *args.serve)
+
+
+def print_dry_run(args, connection: dict, options: dict, table_filter: TableFilter):
+    """Describe what main() would export (or serve), without connecting."""
+    if args.serve:
+        address = ":".join(str(part) for part in args.serve)
+        print(f"Would serve {args.backend} databases on {connection['db_host']} at http://{address}/")
+    elif "dump_file" in connection:
+        print(f"Would export {args.backend} dump {connection['dump_file']}")
+    elif args.backend == "catalog":
+        print(f"Would export {connection['db_name']} from catalog {connection['catalog_file']}")
+    else:
+        print(f"Would export {args.backend} database {connection['db_name']} on {connection['db_host']}")
+    if table_filter:
+        print(
+            f"tables matching {options.get('include') or ['*']}, except {options.get('exclude') or []}"
+            f" and schemas {options.get('exclude_schemas') or []}"
+        )
+    if not args.serve:
+        print(f"to {options.get('partition_dir') or options['output']} ({options['output_format']})")
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    configs = load_config(args.config)
+    backend = BACKENDS[args.backend]
+    connection, options = resolve(args, configs)
+    missing = [option for option in backend.required if option not in connection]
+    if missing:
+        parser.error(
+            f"missing connection settings {', '.join(missing)} (set them in {args.config} or on the command line)"
+        )
+    if options.get("cache_dir") and "db_name" not in backend.options:
+        parser.error(f"--cache-dir needs a database backend, not {args.backend}")
+    if args.serve and "db_name" not in backend.options:
+        parser.error(f"--serve needs a database backend, not {args.backend}")
+    if options.get("data_profile") and (args.serve or (options["streaming"] and not options.get("cache_dir"))):
+        parser.error("--data-profile is not used with --streaming or --serve")
+
+    try:
+        group_by = backend.load_group_by(options.get("group_by"), options.get("max_tables_per_sheet"))
+    except (ValueError, re.error) as error:
+        parser.error(f"--group-by: {error}")
+    table_filter = TableFilter(
+        options.get("include") or (), options.get("exclude") or (), options.get("exclude_schemas") or ()
+    )
+
+    if args.dry_run:
+        print_dry_run(args, connection, options, table_filter)
+        return 0
+
+    # A catalog export is already in the catalog; --catalog is its source there.
+    catalog_file = options.get("catalog_file") if args.backend != "catalog" else None
+    connector_class = backend.load()
+    if options.get("data_profile") and not hasattr(connector_class, "sample_table"):
+        parser.error(f"--data-profile needs a database backend, not {args.backend}")
+    with collect_metrics(options.get("metrics_file"), options.get("profile_file")):
+        if args.serve:
+            serve_dictionaries(args, backend, connection, options, group_by, table_filter)
+            return 0
+        with (
+            connector_class(**connection, table_filter=table_filter) as connector,
+            open_catalog(catalog_file) as catalog,
+        ):
+            export(connector, connection, options, group_by, catalog)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS
+from schema import ColumnProfile, Table, iter_schema_items
+
+DEFAULT_SAMPLE_ROWS = 1000
+# Seconds for the whole profiling run, and for the sample of any one table.
+DEFAULT_BUDGET = 300.0
+DEFAULT_TABLE_TIMEOUT = 10.0
+# Tables sampled at the same time; each holds one pooled connection.
+DEFAULT_WORKERS = 2
+EXAMPLE_COUNT = 3
+# Characters kept of a min, max or example value.
+VALUE_WIDTH = 40
+# Seconds between two saves of the resume file while profiling.
+SAVE_INTERVAL = 5.0
+# Large objects, documents and spatial values are not sampled: reading them is
+# expensive and their min/max says nothing. Same for (n)varchar(max) on MSSQL.
+UNSAMPLED_TYPES = re.compile(
+    r"(tiny|medium|long)?(text|blob)|n?text|image|xml|json|geometry|geography|point|linestring|polygon|multi\w+",
+    re.IGNORECASE,
+)
+
+
+def sampled_columns(columns) -> list:
+    """The columns of a table worth sampling, see UNSAMPLED_TYPES."""
+    return [
+        column
+        for column in columns
+        # An empty type (a DDL dump or catalog source may give one) is sampled.
+        if not UNSAMPLED_TYPES.fullmatch((column["column_type"].split("(")[0].split() or [""])[0])
+        and str(column["max_length"]) != "-1"
+    ]
+
+
+def estimate_distinct(counts: Counter, sampled: int, total: int) -> int:
+    """
+    Distinct values of a column of ``total`` rows whose ``sampled`` rows hold
+    the values counted in ``counts``. Exact when the sample is the whole
+    table; otherwise the GEE estimator: values seen once in the sample stand
+    for sqrt(total / sampled) values each, values seen more often for one.
+    """
+    if sampled >= total:
+        return len(counts)
+    singletons = sum(1 for count in counts.values() if count == 1)
+    estimate = math.sqrt(total / sampled) * singletons + len(counts) - singletons
+    return min(total, round(estimate))
+
+
+def display_value(value) -> str:
+    if isinstance(value, bytes | bytearray):
+        text = "0x" + value.hex().upper()
+    else:
+        text = str(value)
+    return text if len(text) <= VALUE_WIDTH else text[: VALUE_WIDTH - 1] + "…"
+
+
+def profile_values(values: list, total_rows: int = None) -> ColumnProfile:
+    """Profile the sampled ``values`` of a column of (about) ``total_rows`` rows."""
+    present = [value for value in values if value is not None]
+    counts = Counter(present)
+    sampled = len(values)
+    # The catalog's row count is an estimate and may be below the sample size.
+    total = max(total_rows or 0, sampled)
+    non_null_total = round(total * len(present) / sampled) if sampled else 0
+    try:
+        low, high = (display_value(min(counts)), display_value(max(counts))) if counts else ("", "")
+    except TypeError:  # values that do not compare, e.g. mixed types in a SQLite column
+        low = high = ""
+    return ColumnProfile(
+        sampled,
+        (sampled - len(present)) / sampled if sampled else 0.0,
+        estimate_distinct(counts, len(present), non_null_total) if present else 0,
+        low,
+        high,
+        [display_value(value) for value in list(counts)[:EXAMPLE_COUNT]],
+    )
+
+
+def profile_rows(columns: list, rows: list, total_rows: int = None) -> dict:
+    """{column_name: ColumnProfile} of sampled ``rows``, one value per column of ``columns`` each."""
+    return {
+        column["column_name"]: profile_values([row[index] for row in rows], total_rows)
+        for index, column in enumerate(columns)
+    }
+
+
+class ProfileStore:
+    """
+    Resume file of a profiling run: the profiles of every table profiled so
+    far, saved while profiling, so a run stopped by its time budget (or
+    interrupted) continues with the remaining tables next time. A table's
+    stored profiles are reused as long as its columns keep their names;
+    delete the file to profile every table again.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.tables = {}
+        self._lock = threading.Lock()
+        self._saved = time.monotonic()
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as store_file:
+                self.tables = json.load(store_file)["tables"]
+
+    def get(self, table_name: str, columns: list):
+        """The stored {column_name: ColumnProfile} of a table, or None."""
+        entry = self.tables.get(table_name)
+        if entry is None or entry["columns"] != [column["column_name"] for column in columns]:
+            return None
+        return {name: ColumnProfile(**profile) for name, profile in entry["profiles"].items()}
+
+    def put(self, table_name: str, columns: list, profiles: dict):
+        with self._lock:
+            self.tables[table_name] = {
+                "columns": [column["column_name"] for column in columns],
+                "profiles": {name: profile.as_dict() for name, profile in profiles.items()},
+            }
+            if time.monotonic() - self._saved >= SAVE_INTERVAL:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        self._saved = time.monotonic()
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so an interrupted run never leaves a truncated file.
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as store_file:
+            json.dump({"tables": self.tables}, store_file, default=str)
+        os.replace(tmp_path, self.path)
+
+
+class DataProfiler:
+    """
+    Opt-in sampled data profiling: null ratio, estimated distinct count,
+    min/max and example values per column, attached to the tables as
+    Table.profiles and written by create_table() as extra columns.
+
+    Rows are sampled by the connector's sample_table() (TABLESAMPLE on MSSQL,
+    random ranges of the integer primary key on MySQL) on at most ``workers``
+    connections at once, each sample within ``table_timeout`` seconds for
+    all of its queries, never past the end of the ``budget`` of the whole
+    run. Tables not reached within the budget, and tables whose sample
+    failed, are left unprofiled and tried again by the next run when a
+    ProfileStore path is given.
+    """
+
+    def __init__(
+        self,
+        connector,
+        sample_rows: int = DEFAULT_SAMPLE_ROWS,
+        budget: float = DEFAULT_BUDGET,
+        table_timeout: float = DEFAULT_TABLE_TIMEOUT,
+        workers: int = DEFAULT_WORKERS,
+        store_path: str = None,
+    ):
+        self.connector = connector
+        self.sample_rows = sample_rows
+        self.budget = budget
+        self.table_timeout = table_timeout
+        self.workers = workers
+        self.store = ProfileStore(store_path)
+        self.deadline = None
+
+    def profile_table(self, table_name: str, columns: list):
+        """Sample one table and return its profiles, or None once the budget is spent."""
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        sampled = sampled_columns(columns)
+        if not sampled:
+            return {}
+        with METRICS.phase("profile"):
+            rows, total_rows = self.connector.sample_table(
+                table_name, sampled, self.sample_rows, min(self.table_timeout, remaining)
+            )
+        METRICS.count("profile_rows_sampled", len(rows))
+        return profile_rows(sampled, rows, total_rows)
+
+    def _run(self, table_name: str, columns: list):
+        try:
+            profiles = self.profile_table(table_name, columns)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            METRICS.count("profile_failures")
+            print(f"Profiling {table_name} failed ({error}), skipping it")
+            return None
+        if profiles is not None:
+            self.store.put(table_name, columns, profiles)
+        return profiles
+
+    def profile_schema(self, schema: dict) -> dict:
+        """
+        Attach profiles to the tables of ``schema`` in place (turning their
+        column lists into Table objects) and return {table_name: profiles}
+        of the tables profiled by this call; stored profiles are reused.
+        """
+        self.deadline = time.monotonic() + self.budget
+        pending = {}
+        for table_name, columns in iter_schema_items(schema):
+            stored = self.store.get(table_name, columns)
+            if stored is not None:
+                attach(schema, table_name, stored)
+            else:
+                pending[table_name] = columns
+        profiled = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+                futures = {name: executor.submit(self._run, name, columns) for name, columns in pending.items()}
+                for table_name, future in futures.items():
+                    profiles = future.result()
+                    if profiles is not None:
+                        profiled[table_name] = attach(schema, table_name, profiles)
+        finally:
+            self.store.save()
+        left = len(pending) - len(profiled)
+        METRICS.count("tables_profiled", len(profiled))
+        print(
+            f"Profiled {len(profiled)} tables, reused {len(schema) - len(pending)}"
+            + (f", {left} left for the next run" if left else "")
+        )
+        return profiled
+
+
+def attach(schema: dict, table_name: str, profiles: dict) -> dict:
+    """Set the profiles of a table of ``schema``, making it a Table first if needed; return them."""
+    columns = schema[table_name]
+    if not isinstance(columns, Table):
+        columns = schema[table_name] = Table(columns)
+    columns.profiles = profiles
+    return profiles
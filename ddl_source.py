@@ -0,0 +1,915 @@
+import gzip
+import re
+
+from metrics import METRICS
+from schema import build_schema, column_from_row, merge_details
+from table_filter import TableFilter
+
+DIALECTS = ("mysql", "mssql")
+# Characters read from the start of a dump to guess its dialect.
+DETECT_CHARS = 65536
+
+# Statements the splitter keeps; everything else (data, views, routines, SET
+# and USE statements) is scanned for its end and dropped without being stored.
+_KEEP = re.compile(
+    r"(?:CREATE\s+(?:TEMPORARY\s+)?TABLE"
+    r"|CREATE\s+(?:UNIQUE\s+)?(?:(?:NON)?CLUSTERED\s+)?(?:FULLTEXT\s+|SPATIAL\s+)?INDEX"
+    r"|ALTER\s+TABLE"
+    r"|EXEC(?:UTE)?\s+(?:\[?sys\]?\.)?\[?sp_addextendedproperty)\b",
+    re.IGNORECASE,
+)
+_SPACE = re.compile(r"\s*")
+_GO = re.compile(r"\s*GO(?:\s+\d+)?\s*$", re.IGNORECASE)
+_DELIMITER = re.compile(r"\s*DELIMITER\s+(\S+)", re.IGNORECASE)
+
+# Openers of quoted text and comments, and the pattern that closes each,
+# matched from just after the opener.
+_CLOSERS = {
+    "mysql": {
+        "'": re.compile(r"[^'\\]*(?:(?:\\.|'')[^'\\]*)*'", re.S),
+        '"': re.compile(r'[^"\\]*(?:(?:\\.|"")[^"\\]*)*"', re.S),
+        "`": re.compile(r"[^`]*(?:``[^`]*)*`"),
+        "/*": re.compile(r".*?\*/", re.S),
+    },
+    "mssql": {
+        "'": re.compile(r"[^']*(?:''[^']*)*'"),
+        '"': re.compile(r'[^"]*(?:""[^"]*)*"'),
+        "[": re.compile(r"[^\]]*(?:\]\][^\]]*)*\]"),
+        "/*": re.compile(r".*?\*/", re.S),
+    },
+}
+_LINE_COMMENTS = {"mysql": ("--", "#"), "mssql": ("--",)}
+
+_TOKENS = {
+    "mysql": re.compile(
+        r"""(?P<space>\s+|--[^\n]*|\#[^\n]*|/\*.*?\*/)
+        |(?P<ident>`(?:[^`]|``)*`)
+        |(?P<string>[Nn]?'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'|"[^"\\]*(?:(?:\\.|"")[^"\\]*)*")
+        |(?P<word>[A-Za-z_$@][\w$@#]*)
+        |(?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+        |(?P<punct>.)""",
+        re.S | re.X,
+    ),
+    "mssql": re.compile(
+        r"""(?P<space>\s+|--[^\n]*|/\*.*?\*/)
+        |(?P<ident>\[(?:[^\]]|\]\])*\]|"(?:[^"]|"")*")
+        |(?P<string>[Nn]?'(?:[^']|'')*')
+        |(?P<word>[A-Za-z_$@#][\w$@#]*)
+        |(?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+        |(?P<punct>.)""",
+        re.S | re.X,
+    ),
+}
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+# information_schema.COLUMNS.character_maximum_length of the MySQL types without a length.
+_MYSQL_TEXT_LENGTHS = {
+    "tinytext": 255,
+    "tinyblob": 255,
+    "text": 65535,
+    "blob": 65535,
+    "mediumtext": 16777215,
+    "mediumblob": 16777215,
+    "longtext": 4294967295,
+    "longblob": 4294967295,
+}
+_LENGTH_TYPES = {"char", "varchar", "binary", "varbinary", "nchar", "nvarchar"}
+_CONSTRAINT_WORDS = {"PRIMARY", "UNIQUE", "FOREIGN", "CHECK", "DEFAULT"}
+_EXTENDED_PROPERTY_ARGUMENTS = (
+    "@NAME",
+    "@VALUE",
+    "@LEVEL0TYPE",
+    "@LEVEL0NAME",
+    "@LEVEL1TYPE",
+    "@LEVEL1NAME",
+    "@LEVEL2TYPE",
+    "@LEVEL2NAME",
+)
+
+
+def open_dump(path: str):
+    """
+    Open a DDL dump for reading as text, line by line: plain or gzip
+    compressed (detected from the content, not the name), UTF-8 or, with a
+    byte order mark, UTF-16 as scripted by SQL Server Management Studio.
+    """
+    with open(path, "rb") as probe:
+        compressed = probe.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rb") as probe:
+        bom = probe.read(2)
+    encoding = "utf-16" if bom in (b"\xff\xfe", b"\xfe\xff") else "utf-8-sig"
+    return opener(path, "rt", encoding=encoding, errors="replace")
+
+
+def detect_dialect(path: str) -> str:
+    """Guess whether a dump was written for SQL Server ("mssql") or MySQL ("mysql") from its first lines."""
+    with open_dump(path) as dump:
+        head = dump.read(DETECT_CHARS)
+    if re.search(r"^\s*GO\s*$|CREATE\s+TABLE\s+\[|\[dbo\]", head, re.IGNORECASE | re.MULTILINE):
+        return "mssql"
+    return "mysql"
+
+
+class StatementSplitter:
+    """
+    Incremental splitter of DDL text into statements, fed one line at a time,
+    that keeps the text of CREATE TABLE, CREATE INDEX, ALTER TABLE and
+    sp_addextendedproperty statements only.
+
+    Statements end at a ``;`` (or the delimiter set with ``DELIMITER``)
+    outside quotes and comments, at a ``GO`` line, and in T-SQL, which needs
+    no terminator, where a line starts another statement of a kept kind.
+    Other statements are scanned for their end without being stored, so a
+    dump with gigabytes of INSERT statements is split in constant memory.
+    """
+
+    def __init__(self, dialect: str = "mysql"):
+        self.dialect = dialect
+        self.delimiter = ";"
+        self._closers = _CLOSERS[dialect]
+        self._line_comments = _LINE_COMMENTS[dialect]
+        self._code = _code_pattern(dialect, self.delimiter)
+        self._kept = None  # None before the first code of a statement, then whether it is stored
+        self._parts = []
+        self._state = None  # closing pattern of a quote or comment that continues on the next line
+
+    def _end(self):
+        statement = "".join(self._parts) if self._kept else None
+        self._kept = None
+        self._parts = []
+        return statement
+
+    def _client_command(self, line: str) -> bool:
+        # GO batch separators and DELIMITER commands are not part of any statement.
+        if self.dialect == "mssql":
+            return _GO.match(line) is not None
+        match = _DELIMITER.match(line)
+        if match is not None:
+            self.delimiter = match.group(1)
+            self._code = _code_pattern(self.dialect, self.delimiter)
+        return match is not None
+
+    def feed(self, line: str) -> list:
+        """Consume one line and return the kept statements it completes."""
+        statements = []
+        if self._state is None and self._kept is not None and self.dialect == "mssql":
+            if _GO.match(line) or _KEEP.match(line, _SPACE.match(line).end()):
+                statements.append(self._end())
+        if self._state is not None or self._kept is not None or not self._client_command(line):
+            self._scan(line, statements)
+        return [statement for statement in statements if statement is not None]
+
+    def _scan(self, line: str, statements: list):
+        pos = 0
+        start = 0
+        while True:
+            if self._state is not None:
+                match = self._state.match(line, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                self._state = None
+            if self._kept is None:
+                pos = _SPACE.match(line, pos).end()
+                if pos == len(line):
+                    break
+                if not line.startswith((*self._line_comments, "/*"), pos):
+                    self._kept = _KEEP.match(line, pos) is not None
+                    start = pos
+            match = self._code.search(line, pos)
+            if match is None or match.group() in self._line_comments:
+                break
+            pos = match.end()
+            if match.group() == self.delimiter:
+                if self._kept:
+                    self._parts.append(line[start : match.start()])
+                statements.append(self._end())
+            else:
+                self._state = self._closers[match.group()]
+        if self._kept:
+            self._parts.append(line[start:])
+
+    def close(self) -> list:
+        """Return the last statement when the text ends without a terminator."""
+        statement = self._end()
+        return [] if statement is None else [statement]
+
+
+def iter_statements(lines, dialect: str = "mysql"):
+    """Yield the kept statements (see StatementSplitter) of an iterable of lines, one at a time."""
+    splitter = StatementSplitter(dialect)
+    for line in lines:
+        yield from splitter.feed(line)
+    yield from splitter.close()
+
+
+def _code_pattern(dialect: str, delimiter: str):
+    openers = [*_CLOSERS[dialect], *_LINE_COMMENTS[dialect], delimiter]
+    return re.compile("|".join(re.escape(opener) for opener in sorted(openers, key=len, reverse=True)))
+
+
+class _Token:
+    __slots__ = ("kind", "value", "start", "end")
+
+    def __init__(self, kind: str, value: str, start: int, end: int):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def word(self) -> str:
+        """Upper-cased keyword, or "" for quoted names, strings, numbers and punctuation."""
+        return self.value.upper() if self.kind == "word" else ""
+
+    def is_name(self) -> bool:
+        return self.kind in ("word", "ident")
+
+
+def _unquote_string(raw: str, dialect: str) -> str:
+    if raw[0] in "Nn":
+        raw = raw[1:]
+    quote = raw[0]
+    value = raw[1:-1]
+    if dialect == "mysql":
+        value = _ESCAPE.sub(lambda escape: _ESCAPES.get(escape.group(1), escape.group(1)), value)
+    return value.replace(quote * 2, quote)
+
+
+def tokenize(text: str, dialect: str = "mysql") -> list:
+    """Split one statement into tokens, skipping whitespace and comments; names and strings are unquoted."""
+    tokens = []
+    for match in _TOKENS[dialect].finditer(text):
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        value = match.group()
+        if kind == "ident":
+            close = "]" if value[0] == "[" else value[0]
+            value = value[1:-1].replace(close * 2, close)
+        elif kind == "string":
+            value = _unquote_string(value, dialect)
+        tokens.append(_Token(kind, value, match.start(), match.end()))
+    return tokens
+
+
+class _Parser:
+    """Cursor over the tokens of one statement (or of a parenthesized part of it)."""
+
+    def __init__(self, text: str, tokens: list, dialect: str):
+        self.text = text
+        self.tokens = tokens
+        self.dialect = dialect
+        self.pos = 0
+
+    def more(self) -> bool:
+        return self.pos < len(self.tokens)
+
+    def peek(self, offset: int = 0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def accept(self, *words) -> bool:
+        """Consume the keywords ``words`` if the next tokens are exactly them."""
+        for offset, word in enumerate(words):
+            token = self.peek(offset)
+            if token is None or token.word() != word:
+                return False
+        self.pos += len(words)
+        return True
+
+    def accept_punct(self, char: str) -> bool:
+        if self.at_punct(char):
+            self.pos += 1
+            return True
+        return False
+
+    def at_punct(self, char: str) -> bool:
+        token = self.peek()
+        return token is not None and token.kind == "punct" and token.value == char
+
+    def group(self):
+        """Consume a parenthesized group and return a parser over its contents, or None when there is none."""
+        if not self.at_punct("("):
+            return None
+        opening = self.pos
+        depth = 0
+        for index in range(opening, len(self.tokens)):
+            token = self.tokens[index]
+            if token.kind == "punct" and token.value in "()":
+                depth += 1 if token.value == "(" else -1
+                if depth == 0:
+                    self.pos = index + 1
+                    return _Parser(self.text, self.tokens[opening + 1 : index], self.dialect)
+        self.pos = len(self.tokens)
+        return _Parser(self.text, self.tokens[opening + 1 :], self.dialect)
+
+    def source(self, start: int = None) -> str:
+        """Source text of the tokens from ``start`` (the current one by default) up to the current one."""
+        if start is None:
+            start, end = self.pos, len(self.tokens)
+        else:
+            end = self.pos
+        if start >= end:
+            return ""
+        return self.text[self.tokens[start].start : self.tokens[end - 1].end]
+
+    def skip(self):
+        # A token, or a parenthesized group as a whole.
+        if self.group() is None:
+            self.pos += 1
+
+    def split(self) -> list:
+        """Parsers over the comma separated items of the remaining tokens, at this nesting level."""
+        items = []
+        start = self.pos
+        while self.more():
+            if self.at_punct(","):
+                items.append(_Parser(self.text, self.tokens[start : self.pos], self.dialect))
+                self.pos += 1
+                start = self.pos
+            else:
+                self.skip()
+        items.append(_Parser(self.text, self.tokens[start:], self.dialect))
+        return [item for item in items if item.tokens]
+
+    def qualified_name(self) -> list:
+        parts = [self.take().value]
+        while self.accept_punct(".") and self.more():
+            parts.append(self.take().value)
+        return parts
+
+    def value(self) -> tuple:
+        """
+        Consume a default value and return (text, is_expression): literals as
+        their value, NULL as None, and expressions as their source text (on
+        MySQL without the parentheses around them, as information_schema has it).
+        """
+        start = self.pos
+        token = self.take()
+        literal = None
+        if token is None or token.word() == "NULL":
+            return None, False
+        if token.kind in ("string", "number"):
+            literal = token.value
+        elif token.kind == "punct" and token.value in "+-" and self.more():
+            literal = token.value + self.take().value
+        elif token.kind == "word" and self.peek() is not None and self.peek().kind == "string":
+            # Introducers and bit/hex literals: _utf8mb4'x', b'0', x'1F'.
+            string = self.take()
+            literal = string.value if token.value.startswith("_") else self.source(start)
+        if literal is not None:
+            return literal, False
+        self.pos = start
+        if self.dialect == "mysql" and self.at_punct("("):
+            return self.group().source(), True
+        if not self.at_punct("("):
+            self.pos += 1
+        self.group()
+        return self.source(start), True
+
+
+class _TableDefinition:
+    """
+    One table as declared by CREATE TABLE, or the additions of later ALTER
+    TABLE, CREATE INDEX and sp_addextendedproperty statements, in the row
+    layouts of the connectors' catalog queries.
+    """
+
+    __slots__ = (
+        "name",
+        "declared",
+        "columns",
+        "indexes",
+        "foreign_keys",
+        "constraints",
+        "info",
+        "defaults",
+        "comments",
+    )
+
+    def __init__(self, name: str, declared: bool = False):
+        self.name = name
+        # True for a CREATE TABLE, False for additions to a table declared elsewhere.
+        self.declared = declared
+        # [column_name, column_type, max_length, is_nullable, extra, comment, default]
+        self.columns = []
+        self.indexes = []  # (name, unique, index_type, [columns])
+        self.foreign_keys = []  # (name, [columns], referenced_table, [referenced_columns])
+        self.constraints = []  # (name, constraint_type, [columns])
+        self.info = ["", "", ""]  # comment, engine, collation
+        self.defaults = {}  # column name -> default added by ALTER TABLE
+        self.comments = {}  # column name, or None for the table -> MS_Description
+
+    def column(self, name: str):
+        folded = name.casefold()
+        for column in self.columns:
+            if column[0].casefold() == folded:
+                return column
+        return None
+
+    def merge(self, additions):
+        """
+        Apply the indexes, keys, constraints, defaults and comments declared
+        for this table after it, or collect them when this is not a CREATE TABLE.
+        """
+        self.indexes.extend(additions.indexes)
+        self.foreign_keys.extend(additions.foreign_keys)
+        self.constraints.extend(additions.constraints)
+        if not self.declared:
+            self.defaults.update(additions.defaults)
+            self.comments.update(additions.comments)
+            return
+        for name, default in additions.defaults.items():
+            if (column := self.column(name)) is not None:
+                column[6] = default
+        for name, comment in additions.comments.items():
+            if name is None:
+                self.info[0] = comment
+            elif (column := self.column(name)) is not None:
+                column[5] = comment
+
+    def catalog_rows(self, dialect: str) -> list:
+        """Rows shaped like the connector's SCHEMA_QUERY results, for schema.build_schema()."""
+        # EXTRA is the key type on SQL Server: primary key before unique before foreign key.
+        keys = {}
+        for key_type, columns in [
+            *(("FOREIGN KEY", key[1]) for key in self.foreign_keys),
+            *((constraint[1], constraint[2]) for constraint in self.constraints if constraint[1] == "UNIQUE"),
+            *((constraint[1], constraint[2]) for constraint in self.constraints if constraint[1] == "PRIMARY KEY"),
+        ]:
+            keys.update(dict.fromkeys((column.casefold() for column in columns), key_type))
+        rows = []
+        for ordinal, (name, column_type, max_length, nullable, extra, comment, default) in enumerate(self.columns, 1):
+            key_type = keys.get(name.casefold(), "")
+            if key_type == "PRIMARY KEY":
+                nullable = "NO"
+            if dialect == "mssql":
+                extra = key_type
+            rows.append((self.name, ordinal, name, column_type, max_length, nullable, extra, comment, default))
+        return rows
+
+    def detail_rows(self) -> tuple:
+        """(index, foreign key, constraint, table) rows in the layouts of schema.merge_details()."""
+        index_rows = [
+            (self.name, name, unique, index_type, column)
+            for name, unique, index_type, columns in sorted(self.indexes, key=lambda index: index[0])
+            for column in columns
+        ]
+        foreign_key_rows = [
+            (self.name, name, referenced_table, column, referenced_column)
+            for name, columns, referenced_table, referenced_columns in sorted(self.foreign_keys, key=lambda key: key[0])
+            for column, referenced_column in zip(columns, referenced_columns, strict=False)
+        ]
+        constraint_rows = [
+            (self.name, name, constraint_type, column)
+            for name, constraint_type, columns in sorted(self.constraints, key=lambda constraint: constraint[0])
+            for column in columns or [""]
+        ]
+        table_rows = [(self.name, *self.info, None, None, None)]
+        return index_rows, foreign_key_rows, constraint_rows, table_rows
+
+
+def _table_name(parts: list, dialect: str) -> str:
+    # Connector naming: "table" on MySQL, "schema.table" on SQL Server.
+    if dialect == "mssql":
+        return f"{parts[-2] if len(parts) > 1 else 'dbo'}.{parts[-1]}"
+    return parts[-1]
+
+
+def _referenced_table(parts: list, dialect: str) -> str:
+    # Like the connectors' foreign key queries, MySQL only qualifies tables of another database.
+    if dialect == "mysql":
+        return ".".join(parts[-2:])
+    return _table_name(parts, dialect)
+
+
+def _key_columns(group) -> list:
+    # Column names of an index or key column list; functional key parts have none.
+    if group is None:
+        return []
+    return [item.tokens[0].value if item.tokens[0].is_name() else "" for item in group.split()]
+
+
+def _element_kind(parser: _Parser):
+    # Keyword(s) starting an index, key or constraint definition, as one kind; None at a column.
+    for words, kind in (
+        (("PRIMARY", "KEY"), "PRIMARY KEY"),
+        (("FOREIGN", "KEY"), "FOREIGN KEY"),
+        (("UNIQUE",), "UNIQUE"),
+        (("CHECK",), "CHECK"),
+        (("DEFAULT",), "DEFAULT"),
+        (("KEY",), "INDEX"),
+        (("INDEX",), "INDEX"),
+        (("FULLTEXT",), "FULLTEXT"),
+        (("SPATIAL",), "SPATIAL"),
+    ):
+        if parser.accept(*words):
+            if kind in ("UNIQUE", "FULLTEXT", "SPATIAL") and not parser.accept("KEY"):
+                parser.accept("INDEX")
+            return kind
+    return None
+
+
+def _parse_table_element(parser: _Parser, table: _TableDefinition) -> bool:
+    """Parse an index, key or constraint definition into ``table``; False when ``parser`` is at a column."""
+    start = parser.pos
+    name = None
+    # MySQL allows CONSTRAINT without a name before PRIMARY KEY, UNIQUE, FOREIGN KEY and CHECK.
+    if parser.accept("CONSTRAINT") and parser.more() and parser.peek().word() not in _CONSTRAINT_WORDS:
+        name = parser.take().value
+    kind = _element_kind(parser)
+    if kind is None:
+        parser.pos = start
+        return False
+    if kind == "CHECK":
+        parser.group()
+        table.constraints.append((name or "", "CHECK", []))
+    elif kind == "DEFAULT":
+        # ALTER TABLE ... ADD [CONSTRAINT name] DEFAULT value FOR column
+        default, _ = parser.value()
+        if parser.accept("FOR") and parser.more():
+            table.defaults[parser.take().value] = default or ""
+    else:
+        _parse_key(parser, table, kind, name)
+    return True
+
+
+def _key_head(parser: _Parser, name: str) -> tuple:
+    # (name, index type, columns) of a key definition, up to its column list.
+    index_type = ""
+    columns = None
+    while parser.more() and columns is None:
+        token = parser.peek()
+        if parser.at_punct("("):
+            columns = _key_columns(parser.group())
+        elif parser.accept("USING") and parser.more():
+            index_type = parser.take().word()
+        elif token.word() in ("CLUSTERED", "NONCLUSTERED"):
+            index_type = parser.take().word()
+        elif name is None and token.is_name():
+            name = parser.take().value
+        else:
+            parser.take()
+    return name, index_type, columns or []
+
+
+def _parse_key(parser: _Parser, table: _TableDefinition, kind: str, name: str):
+    # The rest of a primary key, unique key, index or foreign key definition.
+    name, index_type, columns = _key_head(parser, name)
+    if kind == "FOREIGN KEY":
+        if parser.accept("REFERENCES") and parser.more():
+            referenced = _referenced_table(parser.qualified_name(), parser.dialect)
+            table.foreign_keys.append((name or "", columns, referenced, _key_columns(parser.group())))
+        return
+    while parser.more():
+        if parser.accept("USING") and parser.more():
+            index_type = parser.take().word()
+        else:
+            parser.skip()
+    if parser.dialect == "mysql":
+        index_type = kind if kind in ("FULLTEXT", "SPATIAL") else index_type or "BTREE"
+        name = "PRIMARY" if kind == "PRIMARY KEY" else name
+    else:
+        index_type = index_type or ("CLUSTERED" if kind == "PRIMARY KEY" else "NONCLUSTERED")
+    table.indexes.append((name or "", kind in ("PRIMARY KEY", "UNIQUE"), index_type, columns))
+    if kind in ("PRIMARY KEY", "UNIQUE"):
+        table.constraints.append((name or "", kind, columns))
+
+
+def _max_length(type_name: str, arguments, dialect: str):
+    # information_schema.COLUMNS.character_maximum_length (MySQL), or the
+    # CHARACTER_MAXIMUM_LENGTH of the SQL Server query: -1 for (max).
+    first = arguments.tokens[0] if arguments is not None and arguments.tokens else None
+    length = None
+    if type_name in _LENGTH_TYPES and first is not None:
+        if first.word() == "MAX":
+            length = -1
+        elif first.kind == "number":
+            length = int(first.value)
+    elif dialect == "mysql" and type_name in _MYSQL_TEXT_LENGTHS:
+        length = _MYSQL_TEXT_LENGTHS[type_name]
+    elif dialect == "mysql" and type_name in ("enum", "set") and arguments is not None:
+        values = [token.value for token in arguments.tokens if token.kind == "string"]
+        length = max(map(len, values), default=0) if type_name == "enum" else len(",".join(values))
+    return length
+
+
+class _ColumnDefinition:
+    """A column definition being parsed; its attributes may come in any order."""
+
+    def __init__(self, parser: _Parser, table: _TableDefinition):
+        self.parser = parser
+        self.table = table
+        self.name = parser.take().value
+        self.column_type = ""
+        self.max_length = None
+        self.nullable = "YES"
+        self.extra = []
+        self.generated = None
+        self.comment = ""
+        self.default = None
+        self.default_generated = False
+        self.constraint = None
+
+    def parse_type(self):
+        parser = self.parser
+        if parser.peek() is None or parser.peek().word() == "AS":
+            # SQL Server computed column: the type is not declared.
+            return
+        type_name = parser.qualified_name()[-1].lower()
+        if type_name == "double" and parser.accept("PRECISION"):
+            type_name = "double precision"
+        arguments = parser.group()
+        self.column_type = type_name
+        if parser.dialect == "mysql":
+            # information_schema.COLUMNS.column_type: int unsigned, varchar(255), enum('a','b')
+            if arguments is not None:
+                self.column_type += f"({arguments.source()})"
+            while parser.peek() is not None and parser.peek().word() in ("UNSIGNED", "SIGNED", "ZEROFILL"):
+                self.column_type += " " + parser.take().value.lower()
+        self.max_length = _max_length(type_name, arguments, parser.dialect)
+
+    def parse_attribute(self):
+        parser = self.parser
+        if parser.accept("NOT", "NULL"):
+            self.nullable = "NO"
+        elif parser.accept("NULL"):
+            self.nullable = "YES"
+        elif parser.accept("CONSTRAINT") and parser.more():
+            self.constraint = parser.take().value
+        elif parser.accept("DEFAULT"):
+            self.default, self.default_generated = parser.value()
+        elif parser.accept("AUTO_INCREMENT"):
+            self.extra.append("auto_increment")
+        elif parser.accept("ON", "UPDATE"):
+            self.extra.append(f"on update {parser.value()[0]}")
+        elif parser.accept("COMMENT") and parser.more():
+            self.comment = parser.take().value
+        elif parser.accept("COLLATE") or parser.accept("CHARSET") or parser.accept("CHARACTER", "SET"):
+            parser.take()
+        elif not self._parse_key_attribute():
+            parser.skip()
+
+    def _parse_key_attribute(self) -> bool:
+        parser = self.parser
+        dialect = parser.dialect
+        if parser.accept("PRIMARY", "KEY"):
+            name = self.constraint or ("PRIMARY" if dialect == "mysql" else "")
+            self.table.indexes.append((name, True, "CLUSTERED" if dialect == "mssql" else "BTREE", [self.name]))
+            self.table.constraints.append((name, "PRIMARY KEY", [self.name]))
+        elif parser.accept("UNIQUE"):
+            parser.accept("KEY")
+            # MySQL names the index after the column; SQL Server generates a name.
+            name = self.constraint or (self.name if dialect == "mysql" else "")
+            self.table.indexes.append((name, True, "NONCLUSTERED" if dialect == "mssql" else "BTREE", [self.name]))
+            self.table.constraints.append((name, "UNIQUE", [self.name]))
+        elif parser.accept("REFERENCES") and parser.more():
+            referenced = _referenced_table(parser.qualified_name(), dialect)
+            referenced_columns = _key_columns(parser.group())
+            # InnoDB ignores inline REFERENCES; SQL Server creates the key.
+            if dialect == "mssql":
+                self.table.foreign_keys.append((self.constraint or "", [self.name], referenced, referenced_columns))
+        elif parser.accept("CHECK"):
+            parser.group()
+            if dialect == "mssql":
+                self.table.constraints.append((self.constraint or "", "CHECK", [self.name]))
+            elif self.constraint:
+                self.table.constraints.append((self.constraint, "CHECK", []))
+        elif parser.accept("AS"):
+            parser.group()
+            self.generated = self.generated or "VIRTUAL"
+        elif parser.accept("STORED") or parser.accept("PERSISTED"):
+            self.generated = "STORED"
+        elif parser.accept("VIRTUAL"):
+            self.generated = "VIRTUAL"
+        else:
+            return False
+        return True
+
+    def row(self) -> list:
+        extra = list(self.extra)
+        if self.parser.dialect == "mysql":
+            if self.default_generated:
+                extra.insert(0, "DEFAULT_GENERATED")
+            if self.generated:
+                extra.append(f"{self.generated} GENERATED")
+        return [
+            self.name,
+            self.column_type,
+            self.max_length,
+            self.nullable,
+            " ".join(extra),
+            self.comment,
+            self.default,
+        ]
+
+
+def _parse_column(parser: _Parser, table: _TableDefinition):
+    column = _ColumnDefinition(parser, table)
+    column.parse_type()
+    while parser.more():
+        column.parse_attribute()
+    table.columns.append(column.row())
+
+
+def parse_statement(text: str, dialect: str = "mysql"):
+    """
+    Parse one statement kept by iter_statements() into a _TableDefinition:
+    the declared table for CREATE TABLE, or what the statement adds to an
+    existing table. Return None for statements that declare nothing usable,
+    such as temporary tables or CREATE TABLE ... LIKE.
+    """
+    parser = _Parser(text, tokenize(text, dialect), dialect)
+    table = None
+    if parser.accept("CREATE", "TABLE"):
+        table = _parse_create_table(parser)
+    elif parser.accept("CREATE") and not parser.accept("TEMPORARY"):
+        table = _parse_create_index(parser)
+    elif parser.accept("ALTER", "TABLE") and parser.more():
+        table = _TableDefinition(_table_name(parser.qualified_name(), dialect))
+        while parser.more() and not parser.accept("ADD"):
+            parser.skip()
+        # Added indexes, keys, constraints and defaults; added columns are not picked up.
+        for item in parser.split():
+            _parse_table_element(item, table)
+    elif parser.accept("EXEC") or parser.accept("EXECUTE"):
+        table = _parse_extended_property(parser)
+    return table
+
+
+def _parse_create_table(parser: _Parser):
+    parser.accept("IF", "NOT", "EXISTS")
+    if not parser.more():
+        return None
+    parts = parser.qualified_name()
+    body = parser.group()
+    if body is None or parts[-1].startswith("#"):
+        return None
+    table = _TableDefinition(_table_name(parts, parser.dialect), declared=True)
+    for item in body.split():
+        if not _parse_table_element(item, table):
+            _parse_column(item, table)
+    # MySQL table options: ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=... COMMENT='...'
+    options = {"COMMENT": 0, "ENGINE": 1, "COLLATE": 2}
+    while parser.more():
+        word = parser.take().word()
+        if word in options:
+            parser.accept_punct("=")
+            if parser.more():
+                table.info[options[word]] = parser.take().value
+    return table
+
+
+def _parse_create_index(parser: _Parser):
+    unique = parser.accept("UNIQUE")
+    index_type = ""
+    while parser.peek() is not None and parser.peek().word() in ("CLUSTERED", "NONCLUSTERED", "FULLTEXT", "SPATIAL"):
+        index_type = parser.take().word()
+    if not parser.accept("INDEX") or not parser.more():
+        return None
+    name = parser.take().value
+    while parser.more() and not parser.accept("ON"):
+        parser.skip()
+    if not parser.more():
+        return None
+    table = _TableDefinition(_table_name(parser.qualified_name(), parser.dialect))
+    columns = _key_columns(parser.group())
+    while parser.more():
+        if parser.accept("USING") and parser.more():
+            index_type = parser.take().word()
+        else:
+            parser.skip()
+    default_type = "NONCLUSTERED" if parser.dialect == "mssql" else "BTREE"
+    table.indexes.append((name, unique, index_type or default_type, columns))
+    return table
+
+
+def _parse_extended_property(parser: _Parser):
+    # EXEC sys.sp_addextendedproperty @name=N'MS_Description', @value=N'...',
+    #     @level0type=N'SCHEMA', @level0name=N'dbo', @level1type=N'TABLE', @level1name=N'users'
+    #     [, @level2type=N'COLUMN', @level2name=N'id'], or the same arguments by position.
+    parser.qualified_name()
+    arguments = {}
+    for position, item in enumerate(parser.split()):
+        key = _EXTENDED_PROPERTY_ARGUMENTS[position] if position < len(_EXTENDED_PROPERTY_ARGUMENTS) else None
+        if item.peek(1) is not None and item.peek(1).value == "=":
+            key = item.take().value.upper()
+            item.take()
+        if item.more() and key:
+            arguments[key] = item.take().value
+    if arguments.get("@NAME") != "MS_Description" or arguments.get("@LEVEL1TYPE", "").upper() != "TABLE":
+        return None
+    table = _TableDefinition(f"{arguments.get('@LEVEL0NAME', 'dbo')}.{arguments.get('@LEVEL1NAME', '')}")
+    column = arguments.get("@LEVEL2NAME") if arguments.get("@LEVEL2TYPE", "").upper() == "COLUMN" else None
+    table.comments[column] = arguments.get("@VALUE", "")
+    return table
+
+
+class DdlSchemaSource:
+    """
+    Schema source reading a DDL dump (``mysqldump --no-data`` output or a
+    SQL Server Management Studio script, optionally gzip compressed) instead
+    of the catalog, so a dictionary can be exported without any database
+    load. It offers the connectors' iter_schema()/get_schema() and returns
+    the same table and column records, which ExportDataDictionary and the
+    text writers render unchanged.
+
+    The dump is streamed line by line, and only CREATE TABLE statements and
+    the statements adding indexes, keys, defaults and MS_Description comments
+    to tables are parsed. Keys, indexes, defaults and comments can be added
+    after the tables (SSMS scripts always do so, MySQL dumps with ALTER TABLE
+    or CREATE INDEX statements), so iter_schema() reads the dump twice, first
+    for those, to stay streaming in bounded memory.
+    """
+
+    def __init__(self, dump_file: str, dialect: str = None, table_filter: TableFilter = None):
+        if dialect is not None and dialect not in DIALECTS:
+            raise ValueError(f"unknown dialect {dialect!r}, expected one of {', '.join(DIALECTS)}")
+        self.dump_file = dump_file
+        self.dialect = dialect or detect_dialect(dump_file)
+        self.table_filter = table_filter or TableFilter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Nothing to release; there so a source can be used wherever a connector is."""
+
+    def _selected(self, name: str) -> bool:
+        if self.dialect == "mssql":
+            schema_name, name = name.split(".", 1)
+            if schema_name in self.table_filter.exclude_schemas:
+                return False
+        return self.table_filter.matches(name)
+
+    def iter_definitions(self):
+        """Yield what each statement of the dump declares, in file order, for the selected tables."""
+        with open_dump(self.dump_file) as dump:
+            for statement in iter_statements(dump, self.dialect):
+                METRICS.count("statements_parsed")
+                table = parse_statement(statement, self.dialect)
+                if table is not None and table.name and self._selected(table.name):
+                    yield table
+
+    def _additions(self) -> dict:
+        # Everything declared for the tables outside their CREATE TABLE, by case-folded table name.
+        additions = {}
+        for table in self.iter_definitions():
+            if not table.declared:
+                key = table.name.casefold()
+                if key in additions:
+                    additions[key].merge(table)
+                else:
+                    additions[key] = table
+        return additions
+
+    def iter_tables(self, details: bool = False):
+        """Yield (table_name, columns) pairs in file order; Table objects with ``details``."""
+        additions = self._additions()
+        for table in self.iter_definitions():
+            if not table.declared:
+                continue
+            if table.name.casefold() in additions:
+                table.merge(additions[table.name.casefold()])
+            columns = [column_from_row(row) for row in table.catalog_rows(self.dialect)]
+            if details:
+                columns = merge_details({table.name: columns}, *table.detail_rows())[table.name]
+            yield table.name, columns
+
+    def iter_schema(self):
+        """Yield (table_name, columns) pairs as the tables are read from the dump."""
+        return self.iter_tables()
+
+    def get_schema(self, tables: list = None, details: bool = False) -> dict:
+        """
+        Return {table_name: columns} from one pass over the dump, like the
+        connectors' get_schema(); ``tables`` restricts it to those names.
+        """
+        definitions = {}
+        additions = []
+        with METRICS.phase("query"):
+            for table in self.iter_definitions():
+                if table.declared:
+                    definitions[table.name.casefold()] = table
+                else:
+                    additions.append(table)
+        with METRICS.phase("transform"):
+            for addition in additions:
+                if (table := definitions.get(addition.name.casefold())) is not None:
+                    table.merge(addition)
+            selected = [table for table in definitions.values() if tables is None or table.name in tables]
+            schema = build_schema(row for table in selected for row in table.catalog_rows(self.dialect))
+            if details:
+                for table in selected:
+                    merge_details(schema, *table.detail_rows())
+            return schema
@@ -0,0 +1,345 @@
+import http.server
+import os
+import re
+import tempfile
+import threading
+import time
+import traceback
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from metrics import METRICS
+from schema_cache import schema_fingerprint
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+# Databases kept open at a time, each with its connection pool and last schema.
+MAX_DATABASES = 8
+# Seconds before an unknown database name lists the server's databases again.
+DATABASE_LIST_INTERVAL = 60
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+# /<db_name>.<format>; the last "." separates the format, so database names may contain dots.
+DICTIONARY_PATH = re.compile(r"/([\w$.-]+)\.(\w+)")
+
+
+class RenderCache:
+    """
+    LRU cache of rendered dictionaries, {key: (fingerprint, body)}, bounded
+    by the total size of the bodies rather than by their number: the xlsx of
+    a large database can outweigh hundreds of small HTML pages. An output
+    larger than the whole cache is not cached. Thread safe.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The (fingerprint, body) cached for ``key``, now the most recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, fingerprint: str, body: bytes):
+        """Cache ``body`` and evict the least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self.size -= len(replaced[1])
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (fingerprint, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                METRICS.count("serve_cache_evictions")
+
+
+class _Database:
+    """A served database: its connector, its last queried (fingerprint, schema) and the requests using it."""
+
+    __slots__ = ("connector", "schema", "users")
+
+    def __init__(self, connector):
+        self.connector = connector
+        self.schema = None
+        self.users = 1
+
+    def schema_at(self, fingerprint: str):
+        """The last queried schema when it was queried at ``fingerprint``, else None."""
+        if self.schema is not None and self.schema[0] == fingerprint:
+            return self.schema[1]
+        return None
+
+    def close(self):
+        self.connector.close()
+
+
+class DictionaryService:
+    """
+    Builds data dictionaries on request and keeps the rendered outputs in a
+    RenderCache. Each database is read through a long-lived connector, opened
+    on its first request, so its pooled connections are reused from request
+    to request; at most ``max_databases`` databases stay open, and the least
+    recently used one no request is reading is closed to make room. Before a
+    cached output is served again, the cheap table fingerprint query of the
+    --cache-dir refresh (query_table_fingerprints()) checks that the schema
+    did not change; only when it did is the full catalog queried, once for
+    every format of the database, and the dictionary rendered again.
+    Concurrent requests share one catalog query per database and one
+    rendering per database and format.
+
+    ``open_connector(db_name)`` returns a connector session on a database and
+    ``render(schema, output_format, path)`` writes a dictionary file. With
+    ``databases``, only those databases are served; otherwise only those
+    ``list_databases()`` returns, listed again at most every
+    DATABASE_LIST_INTERVAL seconds when an unknown name is requested.
+    """
+
+    def __init__(
+        self,
+        open_connector,
+        render,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        databases=None,
+        details: bool = False,
+        list_databases=None,
+        max_databases: int = MAX_DATABASES,
+    ):
+        self.open_connector = open_connector
+        self.render = render
+        self.cache = RenderCache(cache_bytes)
+        self.databases = set(databases) if databases else None
+        self.details = details
+        self.list_databases = list_databases
+        self.max_databases = max_databases
+        # {db_name: _Database}, least recently used first.
+        self._databases = OrderedDict()
+        self._listed = set()
+        self._listed_at = None
+        self._builds = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the connectors of every open database."""
+        with self._lock:
+            databases = list(self._databases.values())
+            self._databases.clear()
+        for database in databases:
+            database.close()
+
+    def serves(self, db_name: str) -> bool:
+        if self.databases is not None:
+            return db_name in self.databases
+        if self.list_databases is None:
+            return True
+        with self._lock:
+            known = db_name in self._listed
+            fresh = self._listed_at is not None and time.monotonic() - self._listed_at < DATABASE_LIST_INTERVAL
+        if known or fresh:
+            return known
+        listed, _ = self._coalesced("list", self.list_databases)
+        with self._lock:
+            self._listed = set(listed)
+            self._listed_at = time.monotonic()
+        return db_name in self._listed
+
+    def _coalesced(self, key, build) -> tuple:
+        """
+        (result, shared) of ``build()``, run once for all the concurrent calls
+        with the same ``key``; ``shared`` is True for the calls that waited
+        for another call's result instead of running it.
+        """
+        with self._lock:
+            future = self._builds.get(key)
+            if future is None:
+                future = self._builds[key] = Future()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            return future.result(), True
+        try:
+            result = build()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._builds[key]
+        return result, False
+
+    def get(self, db_name: str, output_format: str) -> tuple:
+        """
+        Return (fingerprint, body, status) of the dictionary of ``db_name``.
+        ``status`` is "hit" for a cached output still current, "miss" for one
+        built by this call and "coalesced" for one built by a concurrent call.
+        """
+        result, shared = self._coalesced((db_name, output_format), lambda: self._build(db_name, output_format))
+        if shared:
+            METRICS.count("serve_coalesced")
+            return result[0], result[1], "coalesced"
+        return result
+
+    @contextmanager
+    def _open(self, db_name: str):
+        """The _Database of ``db_name``, opened on first use and not closed before the block ends."""
+        database = self._acquire(db_name)
+        try:
+            yield database
+        finally:
+            with self._lock:
+                database.users -= 1
+                evicted = self._evict()
+            for closed in evicted:
+                closed.close()
+
+    def _acquire(self, db_name: str) -> _Database:
+        while True:
+            with self._lock:
+                database = self._databases.get(db_name)
+                if database is not None:
+                    database.users += 1
+                    self._databases.move_to_end(db_name)
+                    return database
+            database, shared = self._coalesced(("connect", db_name), lambda: self._connect(db_name))
+            if not shared:
+                return database
+            # Waited for another request's connection: take it as a user of
+            # its own, unless it was evicted meanwhile and has to be opened again.
+
+    def _connect(self, db_name: str) -> _Database:
+        with self._lock:
+            database = self._databases.get(db_name)
+            if database is not None:
+                database.users += 1
+                return database
+        database = _Database(self.open_connector(db_name))
+        with self._lock:
+            self._databases[db_name] = database
+            evicted = self._evict()
+        for closed in evicted:
+            closed.close()
+        return database
+
+    def _evict(self) -> list:
+        """Remove the least recently used idle databases beyond max_databases and return them; hold the lock."""
+        idle = [db_name for db_name, database in self._databases.items() if database.users == 0]
+        excess = len(self._databases) - self.max_databases
+        return [self._databases.pop(db_name) for db_name in idle[: max(excess, 0)]]
+
+    def _build(self, db_name: str, output_format: str) -> tuple:
+        key = (db_name, output_format)
+        with self._open(db_name) as database:
+            fingerprint = schema_fingerprint(database.connector.query_table_fingerprints())
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] == fingerprint:
+                METRICS.count("serve_cache_hits")
+                return fingerprint, cached[1], "hit"
+            schema, _ = self._coalesced(("schema", db_name), lambda: self._schema(database, fingerprint))
+        METRICS.count("serve_builds")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"data_dictionary.{output_format}")
+            self.render(schema, output_format, path)
+            with open(path, "rb") as output:
+                body = output.read()
+        self.cache.put(key, fingerprint, body)
+        return fingerprint, body, "miss"
+
+    def _schema(self, database: _Database, fingerprint: str) -> dict:
+        """The schema of ``database`` at ``fingerprint``: the last one queried, or a new catalog query."""
+        stored = database.schema_at(fingerprint)
+        if stored is not None:
+            return stored
+        # A change between the fingerprint and catalog queries stores a newer
+        # schema under the older fingerprint, which the next request then rebuilds.
+        schema = database.connector.get_schema(details=self.details)
+        METRICS.count("serve_schema_queries")
+        database.schema = (fingerprint, schema)
+        return schema
+
+
+class DictionaryRequestHandler(http.server.BaseHTTPRequestHandler):
+    """GET /<db_name>.<format>: the data dictionary of a database, with the schema fingerprint as ETag."""
+
+    server_version = "export-data-dictionary"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        service = self.server.service
+        match = DICTIONARY_PATH.fullmatch(urllib.parse.urlsplit(self.path).path)
+        if match is None:
+            self.send_error(404, "Expected /<database>.<format>")
+            return
+        db_name, output_format = match.groups()
+        if output_format not in CONTENT_TYPES:
+            self.send_error(404, f"Unknown format {output_format}, expected one of {', '.join(CONTENT_TYPES)}")
+            return
+        try:
+            if not service.serves(db_name):
+                self.send_error(404, f"Unknown database {db_name}")
+                return
+            fingerprint, body, status = service.get(db_name, output_format)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Driver errors name hosts, logins and connection strings: logged here, not sent.
+            self.log_error("Cannot build %s.%s: %s", db_name, output_format, traceback.format_exc())
+            self.send_error(502, f"Cannot build the dictionary of {db_name}")
+            return
+
+        etag = f'"{fingerprint}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[output_format])
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("X-Cache", status)
+        if output_format == "xlsx":
+            self.send_header("Content-Disposition", f'attachment; filename="{db_name}.xlsx"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DictionaryServer(http.server.ThreadingHTTPServer):
+    """HTTP server answering every request on its own thread from one DictionaryService."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, service: DictionaryService):
+        super().__init__(address, DictionaryRequestHandler)
+        self.service = service
+
+
+def serve(service: DictionaryService, host: str = "127.0.0.1", port: int = 8000):
+    """Serve ``service`` until interrupted, then close its connectors."""
+    with service, DictionaryServer((host, port), service) as server:
+        print(f"Serving data dictionaries on http://{host}:{server.server_port}/<database>.<format>")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,58 @@
+import argparse
+
+from cli import CONFIG_FILE, load_config
+from generate import ExportDataDictionary
+from schema_diff import Snapshot, diff_schemas
+
+OUTPUT_FILE = "schema_changes.xlsx"
+
+
+def live_snapshot(backend: str, config_file: str = CONFIG_FILE) -> Snapshot:
+    # Imported here so diffing two snapshot files needs neither configs.py nor a database driver.
+    configs = load_config(config_file)
+    if configs is None:
+        raise SystemExit(f"{config_file} not found: it holds the connection settings of the live database")
+    if backend == "mssql":
+        from mssql_connector import MSSQLConnector  # pylint: disable=import-outside-toplevel
+
+        connector_class = MSSQLConnector
+        config = configs.mssql_config
+    else:
+        from mysql_connector import MySQLConnector  # pylint: disable=import-outside-toplevel
+
+        connector_class = MySQLConnector
+        config = configs.mysql_config
+    with connector_class(**config) as connector:
+        schema = connector.get_schema()
+    return Snapshot.from_schema(schema, db_host=config["db_host"], db_name=config["db_name"])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export only the schema changes between two snapshots.")
+    parser.add_argument("old", nargs="?", help="snapshot to compare against; omit to only --save a snapshot")
+    parser.add_argument("new", nargs="?", help="newer snapshot; the live database of --config when omitted")
+    parser.add_argument("--backend", choices=("mysql", "mssql"), default="mysql", help="live database backend")
+    parser.add_argument("--config", default=CONFIG_FILE, help=f"settings of the live database (default: {CONFIG_FILE})")
+    parser.add_argument("--save", metavar="PATH", help="also save the new (or live) schema as a snapshot")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"changes workbook (default: {OUTPUT_FILE})")
+    args = parser.parse_args(argv)
+    if args.old is None and args.save is None:
+        parser.error("nothing to do: give a snapshot to compare against, or --save")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    new = Snapshot.load(args.new) if args.new else live_snapshot(args.backend, args.config)
+    if args.save:
+        new.save(args.save)
+        print(f"Saved snapshot of {len(new.tables)} tables to {args.save}")
+    if args.old is None:
+        return
+    changes = diff_schemas(Snapshot.load(args.old), new)
+    ExportDataDictionary(args.output).generate_changes_xlsx(changes)
+    print(f"{len(changes)} changes written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
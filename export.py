@@ -1,12 +1,8 @@
-from configs import mysql_config as config
-from generate import ExportDataDictionary
-from mysql_connector import MySQLConnector
+import sys
 
-DB_HOST = config["db_host"]
-DB_USER = config["db_user"]
-DB_NAME = config["db_name"]
-DB_PASSWORD = config["db_password"]
+from cli import main
 
-db = MySQLConnector(db_host=DB_HOST, db_user=DB_USER, db_password=DB_PASSWORD, db_name=DB_NAME)
-schema = db.get_schema()
-ExportDataDictionary("data_dictionary.xlsx").generate_xlsx(schema)
+# Same as `export-data-dictionary --backend mysql`, kept for existing scripts and cron jobs.
+# The guard keeps worker processes of the partitioned export from re-running the export.
+if __name__ == "__main__":
+    sys.exit(main(["--backend", "mysql", *sys.argv[1:]]))
@@ -0,0 +1,15 @@
+import sys
+
+import configs
+from configs import export_targets
+
+from multi_export import run_exports
+
+MULTI_EXPORT_OPTIONS = getattr(configs, "multi_export_config", {})
+
+results, failures = run_exports(export_targets, **MULTI_EXPORT_OPTIONS)
+for label, path in sorted(results.items()):
+    print(f"Exported {label} -> {path}")
+if failures:
+    print(f"{len(failures)} export job(s) failed: {', '.join(sorted(failures))}")
+    sys.exit(1)
@@ -1,6 +1,14 @@
+import os
+from collections.abc import Iterable
+
 from xlsxwriter.workbook import Workbook
 from xlsxwriter.worksheet import Worksheet, convert_cell_args
 
+from grouping import SheetNames, table_prefix
+from metrics import METRICS, Progress
+from schema import Table, TableInfo, iter_schema_items
+from text_width import bold_string_width, max_string_width, string_width
+
 
 class MyWorksheet(Worksheet):
     """
@@ -12,15 +20,23 @@ class MyWorksheet(Worksheet):
         super().__init__()
         self.max_column_widths = {}
 
-    def excel_string_width(self, text):
+    def excel_string_width(self, text, bold=False):
         """
-        Calculate the length of the string in Excel character units. This is only
-        an example and won't give accurate results. It will need to be replaced
-        by something more rigorous.
+        Calculate the width of the string in Excel column width units, from
+        per-character Calibri 11 metrics (see text_width.py). Results are
+        memoized per distinct string.
 
         """
-        string_width = len(text)
-        return string_width * 1.1
+        if bold:
+            return bold_string_width(text)
+        return string_width(text)
+
+    def fit_column(self, col, strings, bold=False):
+        # Widen the column to fit the widest of several strings at once, for
+        # callers that write a block of cells and measure them in bulk.
+        width = max_string_width(strings, bold)
+        if width > self.max_column_widths.get(col, 0):
+            self.max_column_widths[col] = width
 
     @convert_cell_args
     def write_string(self, row, col, string, cell_format=None):
@@ -37,24 +53,89 @@ class MyWorksheet(Worksheet):
         min_width = 0
 
         # Check if it the string is the largest we have seen for this column.
-        string_width = self.excel_string_width(string)
-        if string_width > min_width:
+        width = self.excel_string_width(string, cell_format is not None and cell_format.bold)
+        if width > min_width:
             max_width = self.max_column_widths.get(col, min_width)
-            if string_width > max_width:
-                self.max_column_widths[col] = string_width
+            if width > max_width:
+                self.max_column_widths[col] = width
 
         # Now call the parent version of write_string() as usual.
         return super().write_string(row, col, string, cell_format)
 
+    def write_rows(self, first_row, first_col, rows, cell_format=None):
+        # Write a block of equally long rows in one call, for the table blocks
+        # of create_table(). Cells go straight to xlsxwriter's _write_string()
+        # and _write_number(), skipping the argument conversion and per-cell
+        # width check of write_string(); each column is fitted once per block.
+        # Integers and floats are written as numbers, anything else as text.
+        # Return the number of cells written.
+        write_string = self._write_string
+        write_number = self._write_number
+        columns = [[] for _ in rows[0]] if rows else []
+        for row, values in enumerate(rows, first_row):
+            for offset, value in enumerate(values):
+                if isinstance(value, str):
+                    write_string(row, first_col + offset, value, cell_format)
+                    columns[offset].append(value)
+                elif isinstance(value, int | float) and not isinstance(value, bool):
+                    write_number(row, first_col + offset, value, cell_format)
+                    columns[offset].append(str(value))
+                else:
+                    text = "" if value is None else str(value)
+                    write_string(row, first_col + offset, text, cell_format)
+                    columns[offset].append(text)
+        bold = cell_format is not None and cell_format.bold
+        for offset, strings in enumerate(columns):
+            self.fit_column(first_col + offset, strings, bold)
+        return len(rows) * len(columns)
+
+    def write_overflow(self, row, col, string, cell_format=None):
+        # Write a string that may spill over the empty cells to its right,
+        # such as a long table comment, without widening its column.
+        return super().write_string(row, col, string, cell_format)
+
+
+# Rows per worksheet in Excel; xlsxwriter silently drops cells past it.
+EXCEL_MAX_ROWS = 1048576
+COLUMN_HEADER = ["COLUMN_ID", "COLUMN_NAME", "DESCRIPTION", "DATA_TYPE", "DATA_LENGTH", "NULLABLE", "Key Type"]
+# Extra columns of a table with data profiles, see data_profile.py.
+PROFILE_HEADER = ["NULL_RATIO", "DISTINCT (EST.)", "MIN", "MAX", "EXAMPLES"]
+NO_PROFILE = ("",) * len(PROFILE_HEADER)
+
+
+def profile_cells(profile) -> tuple:
+    """The PROFILE_HEADER cells of a ColumnProfile, or blanks for a column without one."""
+    if profile is None:
+        return NO_PROFILE
+    return (
+        round(profile.null_ratio, 4),
+        profile.distinct,
+        profile.min_value,
+        profile.max_value,
+        ", ".join(profile.examples),
+    )
+
 
 class ExportDataDictionary(Workbook):
-    def __init__(self, filename: str):
-        super().__init__(filename)
+    def __init__(self, filename: str, constant_memory: bool = False, max_rows: int = EXCEL_MAX_ROWS):
+        # In constant_memory mode each row is flushed to a temp file as soon as
+        # a later row is written, so memory stays flat regardless of schema size.
+        # Rows must then be written in order, which create_table() does.
+        super().__init__(filename, {"constant_memory": constant_memory})
         self._worksheet: Worksheet = None
         self._bold = self.add_format({"bold": 1, "border": 1})
         self._border = self.add_format({"border": 1})
         self._row = 0
         self._col = 0
+        # Tables continue on a new sheet of the same group before a sheet
+        # would pass max_rows; see add_table().
+        self.max_rows = max_rows
+        self.sheet_names = SheetNames()
+        # Sheet and next free row of every group started so far, so that the
+        # tables of a group can arrive in any order; see start_sheet().
+        self._sheets = {}
+        self._sheet_group = None
+        self.rows_used = 0
 
     def add_worksheet(self, name=None, worksheet_class=None):
         # Overwrite add_worksheet() to create a MyWorksheet object.
@@ -69,50 +150,259 @@ class ExportDataDictionary(Workbook):
         for worksheet in self.worksheets():
             for column, width in worksheet.max_column_widths.items():
                 worksheet.set_column(column, column, width)
-        return super().close()
+        with METRICS.phase("close"):
+            super().close()
+        if METRICS.enabled and isinstance(self.filename, str):
+            METRICS.count("bytes_output", os.path.getsize(self.filename))
 
     def write_header(self, table_header: list):
-        for index, header_name in enumerate(table_header):
-            self._worksheet.write_string(self._row, self._col + index, header_name, self._bold)
+        self._worksheet.write_rows(self._row, self._col, [table_header], self._bold)
         self._row += 1
 
+    def write_table_block(self, rows: list) -> int:
+        """
+        Write pre-shaped rows (one sequence of cell values each) with borders
+        at the current position in one call and move below them. Numbers stay
+        numbers in the workbook. Return the number of cells written.
+        """
+        cells = self._worksheet.write_rows(self._row, self._col, rows, self._border)
+        self._row += len(rows)
+        return cells
+
+    @METRICS.timed("write")
     def create_table(self, table_name: str, schema: list):
         self._worksheet.write_string(self._row, self._col, "Table:", self._bold)
         self._worksheet.write_string(self._row, self._col + 1, table_name, self._bold)
         self._row += 1
+        info = schema.info if isinstance(schema, Table) else None
         self._worksheet.write_string(self._row, self._col, "Description:", self._bold)
+        if info is not None and info.comment:
+            self._worksheet.write_overflow(self._row, self._col + 1, info.comment)
         self._row += 1
-        self.write_header(
-            ["COLUMN_ID", "COLUMN_NAME", "DESCRIPTION", "DATA_TYPE", "DATA_LENGTH", "NULLABLE", "Key Type"]
+        if info is not None:
+            self.write_table_info(info)
+        profiles = schema.profiles if isinstance(schema, Table) else None
+        header = COLUMN_HEADER + PROFILE_HEADER if profiles else COLUMN_HEADER
+        self.write_header(header)
+        rows = [
+            (
+                index,
+                column["column_name"],
+                column["column_comment"],
+                column["column_type"],
+                column["max_length"],
+                column["is_nullable"],
+                column["extra"],
+            )
+            for index, column in enumerate(schema, 1)
+        ]
+        if profiles:
+            rows = [row + profile_cells(profiles.get(row[1])) for row in rows]
+        self.write_table_block(rows)
+        # Table name and description rows, the header and one row per column.
+        METRICS.count("cells_written", 3 + len(header) * (len(schema) + 1))
+        if isinstance(schema, Table):
+            self.write_details(schema)
+        self._row += 2
+        METRICS.count("tables_written")
+
+    def write_table_info(self, info: TableInfo):
+        # Engine/collation and size rows of the table header block, for tables fetched with details.
+        rows = []
+        if info.engine or info.collation:
+            rows.append((("Engine:", info.engine), ("Collation:", info.collation)))
+        rows.append(
+            (
+                ("Rows (estimate):", info.estimated_rows),
+                ("Data size (bytes):", info.data_size),
+                ("Index size (bytes):", info.index_size),
+            )
         )
-        for index, column in enumerate(schema):
-            self._worksheet.write_string(self._row, self._col, str(index + 1), self._border)
-            self._worksheet.write_string(self._row, self._col + 1, column["column_name"], self._border)
-            self._worksheet.write_string(self._row, self._col + 2, column["column_comment"], self._border)
-            self._worksheet.write_string(self._row, self._col + 3, column["column_type"], self._border)
-            self._worksheet.write_string(self._row, self._col + 4, str(column["max_length"]), self._border)
-            self._worksheet.write_string(self._row, self._col + 5, column["is_nullable"], self._border)
-            self._worksheet.write_string(self._row, self._col + 6, column["extra"], self._border)
+        for row in rows:
+            for index, (label, value) in enumerate(row):
+                col = self._col + 2 * index
+                self._worksheet.write_string(self._row, col, label, self._bold)
+                if isinstance(value, int):
+                    self._worksheet.write_number(self._row, col + 1, value)
+                    self._worksheet.fit_column(col + 1, [str(value)])
+                elif value:
+                    self._worksheet.write_string(self._row, col + 1, value)
             self._row += 1
-        self._row += 2
+            METRICS.count("cells_written", 2 * len(row))
+
+    def write_details(self, table: Table):
+        # Index, foreign key and constraint blocks below the columns, for tables fetched with details.
+        blocks = (
+            (
+                "Indexes:",
+                ["INDEX_NAME", "COLUMNS", "UNIQUE", "TYPE"],
+                [
+                    (index.name, ", ".join(index.columns), "YES" if index.unique else "NO", index.index_type)
+                    for index in table.indexes
+                ],
+            ),
+            (
+                "Foreign keys:",
+                ["CONSTRAINT_NAME", "COLUMNS", "REFERENCED_TABLE", "REFERENCED_COLUMNS"],
+                [
+                    (key.name, ", ".join(key.columns), key.referenced_table, ", ".join(key.referenced_columns))
+                    for key in table.foreign_keys
+                ],
+            ),
+            (
+                "Constraints:",
+                ["CONSTRAINT_NAME", "TYPE", "COLUMNS"],
+                [
+                    (constraint.name, constraint.constraint_type, ", ".join(constraint.columns))
+                    for constraint in table.constraints
+                ],
+            ),
+        )
+        for title, header, rows in blocks:
+            if not rows:
+                continue
+            self._row += 1
+            self._worksheet.write_string(self._row, self._col, title, self._bold)
+            self._row += 1
+            self.write_header(header)
+            self.write_table_block(rows)
+            METRICS.count("cells_written", 1 + len(header) * (len(rows) + 1))
+
+    @staticmethod
+    def table_height(schema: list) -> int:
+        """Rows create_table() takes for ``schema``, including the two blank rows after it."""
+        height = 3 + len(schema) + 2
+        if isinstance(schema, Table):
+            if schema.info is not None:
+                height += 2 if schema.info.engine or schema.info.collation else 1
+            for items in (schema.indexes, schema.foreign_keys, schema.constraints):
+                if items:
+                    height += 3 + len(items)
+        return height
 
-    def generate_xlsx_simple(self, data: dict):
-        self._worksheet: Worksheet = self.add_worksheet(name="Data Dictionary")
-        for table_name, schema in data.items():
-            print(f"Generating {table_name}...")
-            self.create_table(table_name, schema)
+    def start_sheet(self, group: str):
+        """
+        Write the next tables on the sheet of ``group``: a new sheet named
+        after the group the first time, afterwards the group's last sheet at
+        its next free row. Each sheet is still written top to bottom, which
+        keeps constant_memory mode working when groups arrive interleaved.
+        """
+        if self._sheet_group is not None:
+            self._sheets[self._sheet_group] = (self._worksheet, self._row)
+        if group in self._sheets:
+            self._worksheet, self._row = self._sheets[group]
+        else:
+            self._worksheet: Worksheet = self.add_worksheet(name=self.sheet_names.unique(group))
+            self._row = 0
+        self._sheet_group = group
+        self._col = 0
+
+    def _continue_sheet(self):
+        # Later sheets of a group are named "<group> (2)", "<group> (3)", ...
+        self._worksheet: Worksheet = self.add_worksheet(name=self.sheet_names.unique(self._sheet_group))
+        self._row = 0
+
+    def add_table(self, table_name: str, schema: list, group: str = None) -> tuple:
+        """
+        Write a table on the sheet of ``group`` (the current sheet when None),
+        starting the group's sheet first if needed, and continuing on a new
+        sheet of the group when the table would not fit below max_rows. Tables
+        are never split across sheets. Return (sheet name, 1-based start row).
+        """
+        if group is not None and group != self._sheet_group:
+            self.start_sheet(group)
+        height = self.table_height(schema)
+        # The two blank rows after a table may fall past the limit.
+        if self._row and self._row + height - 2 > self.max_rows:
+            self._continue_sheet()
+        start = (self._worksheet.name, self._row + 1)
+        self.create_table(table_name, schema)
+        self.rows_used += height
+        return start
+
+    def generate_xlsx_simple(self, data: dict | Iterable):
+        self.start_sheet("Data Dictionary")
+        progress = Progress()
+        for table_name, schema in iter_schema_items(data):
+            progress.update(table_name)
+            self.add_table(table_name, schema)
+        self.close()
+        progress.close()
+
+    def generate_xlsx_combined(self, databases: dict):
+        # One sheet (or more, past the row limit) per database.
+        progress = Progress()
+        for db_name, data in databases.items():
+            self.start_sheet(db_name)
+            for table_name, schema in iter_schema_items(data):
+                progress.update(f"db_name={db_name} {table_name}")
+                self.add_table(table_name, schema)
         self.close()
+        progress.close()
 
-    def generate_xlsx(self, data: dict):
-        next_app = ""
-        for table_name, schema in data.items():
-            table_name_raw = table_name.split("_")
-            app_name = table_name_raw[0]
-            if next_app != app_name:
-                self._worksheet: Worksheet = self.add_worksheet(name=app_name)
-                self._row = 0
-                self._col = 0
-                next_app = app_name
-            print(f"Generating app_name={app_name} {table_name}...")
-            self.create_table(table_name, schema)
+    def generate_xlsx(self, data: dict | Iterable, group_by=table_prefix):
+        # One sheet per group, e.g. table prefix (default) or schema (group_by=table_schema),
+        # see grouping.py. Tables may come in any order, including straight off a stream.
+        progress = Progress()
+        for table_name, schema in iter_schema_items(data):
+            app_name = group_by(table_name)
+            progress.update(f"app_name={app_name} {table_name}")
+            self.add_table(table_name, schema, app_name)
         self.close()
+        progress.close()
+
+    def generate_changes_xlsx(self, changes: Iterable):
+        # A single "Changes" sheet with one row per difference found by schema_diff.diff_schemas().
+        self._worksheet: Worksheet = self.add_worksheet(name="Changes")
+        self.write_header(["TABLE_NAME", "COLUMN_NAME", "CHANGE", "FIELD", "OLD", "NEW"])
+        for change in changes:
+            for index, value in enumerate(change.as_tuple()):
+                self._worksheet.write_string(self._row, self._col + index, str(value), self._border)
+            self._row += 1
+        self.close()
+
+
+def workbook_file_names(filename: str):
+    """Yield ``filename``, then <name>_2.xlsx, <name>_3.xlsx, ... for the parts of a split export."""
+    yield filename
+    stem, extension = os.path.splitext(filename)
+    part = 2
+    while True:
+        yield f"{stem}_{part}{extension}"
+        part += 1
+
+
+def generate_xlsx_files(
+    filename: str,
+    data: dict | Iterable,
+    group_by=table_prefix,
+    workbook_rows: int = None,
+    constant_memory: bool = False,
+) -> list:
+    """
+    ExportDataDictionary(filename).generate_xlsx(data, group_by) that starts a
+    new workbook at a table boundary once the current one holds
+    ``workbook_rows`` rows (no limit when None), keeping every file small
+    enough to open. Return the file names written.
+    """
+    names = workbook_file_names(filename)
+    files = []
+    workbook = None
+    progress = Progress()
+    for table_name, schema in iter_schema_items(data):
+        if workbook is None or (
+            workbook_rows and workbook.rows_used and workbook.rows_used + workbook.table_height(schema) > workbook_rows
+        ):
+            if workbook is not None:
+                workbook.close()
+            files.append(next(names))
+            workbook = ExportDataDictionary(files[-1], constant_memory=constant_memory)
+        app_name = group_by(table_name)
+        progress.update(f"app_name={app_name} {table_name}")
+        workbook.add_table(table_name, schema, app_name)
+    if workbook is None:
+        files.append(next(names))
+        workbook = ExportDataDictionary(files[-1], constant_memory=constant_memory)
+    workbook.close()
+    progress.close()
+    return files
@@ -0,0 +1,122 @@
+import re
+
+# Excel limits sheet names to 31 characters, rejects []:*?/\ in them and
+# compares them case-insensitively.
+SHEET_NAME_LENGTH = 31
+INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def part_suffix(part: int) -> str:
+    """Suffix of the ``part``-th sheet of a group or name, the first one having none: " (2)", " (3)", ..."""
+    return f" ({part})" if part > 1 else ""
+
+
+def table_prefix(table_name: str) -> str:
+    """Group key for generate_xlsx(): the first "_" separated segment of the table name."""
+    return table_name.split("_")[0]
+
+
+def table_schema(table_name: str) -> str:
+    """Group key for generate_xlsx(): the schema of a "schema.table" name."""
+    return table_name.split(".", 1)[0]
+
+
+def regex_group(pattern: str, default: str = "other"):
+    """
+    Group key function for the first capture group of ``pattern`` searched
+    in the table name (the whole match when it has no group), or ``default``
+    for tables it does not match. ``^([a-z]+_[a-z]+)_`` groups on two segments.
+    """
+    regex = re.compile(pattern)
+
+    def group_by(table_name: str) -> str:
+        match = regex.search(table_name)
+        if match is None:
+            return default
+        return match.group(1) if regex.groups else match.group(0)
+
+    return group_by
+
+
+def max_tables_per_sheet(group_by, max_tables: int):
+    """
+    Wrap ``group_by`` so that no group gets more than ``max_tables`` tables:
+    the next ones go to "<group> (2)", "<group> (3)", ... in the order the tables
+    are seen. Counts are kept per returned function, so use a new one per export.
+    """
+    counts = {}
+
+    def split_group_by(table_name: str) -> str:
+        group = group_by(table_name)
+        count = counts.get(group, 0)
+        counts[group] = count + 1
+        return group + part_suffix(count // max_tables + 1)
+
+    return split_group_by
+
+
+GROUPINGS = {"prefix": table_prefix, "schema": table_schema}
+
+
+def get_group_by(spec: str, max_tables: int = None):
+    """
+    Return the group key function for ``spec``: "prefix" (first "_" segment),
+    "schema" or "re:<regular expression>" (see regex_group()), split into
+    sheets of at most ``max_tables`` tables when given.
+    """
+    if spec.startswith("re:"):
+        group_by = regex_group(spec[3:])
+    elif spec in GROUPINGS:
+        group_by = GROUPINGS[spec]
+    else:
+        raise ValueError(f"unknown grouping {spec!r}, expected one of {', '.join(GROUPINGS)} or re:<regex>")
+    if max_tables:
+        group_by = max_tables_per_sheet(group_by, max_tables)
+    return group_by
+
+
+def group_tables(items, group_by=table_prefix) -> dict:
+    """
+    Index (table_name, columns) pairs into {group: {table_name: columns}} in
+    one pass, whatever order the tables come in. Groups keep the order in
+    which they were first seen, and tables their order within a group.
+    """
+    groups = {}
+    for table_name, columns in items:
+        key = group_by(table_name)
+        if key in groups:
+            groups[key][table_name] = columns
+        else:
+            groups[key] = {table_name: columns}
+    return groups
+
+
+class SheetNames:
+    """
+    Hands out valid, unique sheet names for one workbook: invalid characters
+    become "_", names are cut to 31 characters, and a name already used (in
+    any case) gets a " (2)", " (3)", ... suffix within the length limit.
+    """
+
+    def __init__(self):
+        self._used = set()
+
+    @staticmethod
+    def sanitize(name: str) -> str:
+        # Excel also rejects names that start or end with an apostrophe, and
+        # reserves "History" for its change tracking.
+        name = INVALID_SHEET_CHARS.sub("_", name).strip("'") or "_"
+        if name.lower() == "history":
+            name += "_"
+        return name
+
+    def unique(self, name: str) -> str:
+        name = self.sanitize(name)
+        candidate = name[:SHEET_NAME_LENGTH]
+        part = 1
+        while candidate.lower() in self._used:
+            part += 1
+            suffix = part_suffix(part)
+            candidate = name[: SHEET_NAME_LENGTH - len(suffix)] + suffix
+        self._used.add(candidate.lower())
+        return candidate
@@ -0,0 +1,198 @@
+import cProfile
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process so far in bytes, or None where unsupported."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+class _Phase:
+    __slots__ = ("metrics", "name", "wall", "cpu", "rss")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rss = None
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.rss = peak_rss()
+        return self
+
+    def __exit__(self, *exc_info):
+        rss = peak_rss()
+        self.metrics.record(
+            self.name,
+            time.perf_counter() - self.wall,
+            time.process_time() - self.cpu,
+            rss - self.rss if rss is not None else None,
+        )
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+class Metrics:
+    """
+    Wall/CPU time per export phase (connect, query, transform, write, close)
+    plus counters such as rows fetched, cells written and bytes output.
+
+    Collection is off until ``enabled`` is set, and a disabled phase() costs
+    a single attribute check, so the instrumentation stays in the hot paths.
+    Phases may nest and run in several threads; CPU time is process wide.
+
+    The memory of a phase, ``peak_rss_growth_bytes``, is the largest rise of
+    the process peak RSS during one of its calls: it only counts new highs,
+    so a phase that reuses memory freed by an earlier one reports 0, and
+    phases running at the same time share the rise. The process peak itself
+    is the report's top-level ``peak_rss_bytes``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str):
+        """Context manager timing one occurrence of phase ``name``."""
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def timed(self, name: str):
+        """Decorator timing every call of the decorated function as phase ``name``."""
+
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, name: str, wall: float, cpu: float, rss_growth: int = None):
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = {
+                    "calls": 0,
+                    "wall_seconds": 0.0,
+                    "cpu_seconds": 0.0,
+                    "peak_rss_growth_bytes": rss_growth,
+                }
+            stats["calls"] += 1
+            stats["wall_seconds"] += wall
+            stats["cpu_seconds"] += cpu
+            if rss_growth is not None:
+                stats["peak_rss_growth_bytes"] = max(stats["peak_rss_growth_bytes"] or 0, rss_growth)
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.phases = {}
+            self.counters = {}
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = {}
+            for name, stats in self.phases.items():
+                phases[name] = dict(stats, wall_seconds=round(stats["wall_seconds"], 6))
+                phases[name]["cpu_seconds"] = round(stats["cpu_seconds"], 6)
+            return {"phases": phases, "counters": dict(self.counters), "peak_rss_bytes": peak_rss()}
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as metrics_file:
+            json.dump(self.report(), metrics_file, indent=2)
+
+
+# Process-wide collector used by the connectors and the writers.
+METRICS = Metrics()
+
+
+@contextmanager
+def collect_metrics(metrics_file: str = None, profile_file: str = None):
+    """
+    Collect METRICS for the duration of the block and write them to
+    ``metrics_file`` as JSON; also run cProfile and dump its stats to
+    ``profile_file`` when given. Does nothing when neither is set.
+    """
+    profiler = cProfile.Profile() if profile_file else None
+    if metrics_file:
+        METRICS.reset()
+        METRICS.enabled = True
+    if profiler:
+        profiler.enable()
+    try:
+        yield METRICS
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+        if metrics_file:
+            METRICS.enabled = False
+            METRICS.write(metrics_file)
+
+
+class Progress:
+    """
+    Rate-limited progress output: at most one line per ``interval`` seconds,
+    however many items are processed, plus a summary line from close().
+    Replaces a print() per table, which dominates the run time of exports
+    with 100k tables when stdout is a terminal or a slow pipe.
+    """
+
+    def __init__(self, label: str = "Generating", interval: float = 2.0, stream=None):
+        self.label = label
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.count = 0
+        self.start = time.monotonic()
+        self._next = self.start + interval
+
+    def update(self, item: str = "", amount: int = 1):
+        self.count += amount
+        now = time.monotonic()
+        if now >= self._next:
+            self._next = now + self.interval
+            rate = self.count / max(now - self.start, 1e-9)
+            print(f"{self.label}: {self.count} tables ({rate:.0f}/s) {item}", file=self.stream)
+
+    def close(self):
+        elapsed = time.monotonic() - self.start
+        print(f"{self.label}: {self.count} tables in {elapsed:.1f}s", file=self.stream)
@@ -1,15 +1,390 @@
+import math
+import time
+
 import pyodbc
 
+from metrics import METRICS
+from pool import POOL_SIZE, ConnectionPool
+from schema import (
+    CHUNK_RETRIES,
+    FETCH_BATCH_SIZE,
+    build_schema,
+    fetch_all,
+    fetch_chunked,
+    fetch_concurrently,
+    fetch_rows,
+    iter_rows,
+    iter_tables,
+    merge_details,
+)
+from table_filter import TableFilter
+
+# SQL Server takes at most 2100 parameters per statement. A chunk of the column
+# scan names each of its tables in one, and the schema and table filters need a
+# few more, so chunks are cut to this many tables.
+MAX_CHUNK_TABLES = 2000
+# TABLESAMPLE SYSTEM picks whole data pages, so sample_table() samples pages
+# for this many times the rows it wants and cuts the result back with TOP.
+SAMPLE_OVERSAMPLING = 4
+
+
+def quote_name(name: str) -> str:
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def fetch_until(connection, deadline: float, query: str, params=()) -> list:
+    """
+    fetch_rows() under a pyodbc query timeout of the time left until
+    ``deadline`` (a time.monotonic() value, None for no timeout), rounded up
+    to whole seconds; TimeoutError once the deadline passed.
+    """
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("sample time limit reached")
+        connection.timeout = math.ceil(remaining)
+    return fetch_rows(connection, query, params)
+
 
 class MSSQLConnector:
-    def __init__(self, db_name, db_user, db_password, db_host, db_port=1433):
+    """
+    A session on one MSSQL database. Catalog queries run on connections from
+    a small pool, so one connector can run any number of queries, from several
+    threads, without a new login each time. Close it with close() or use it
+    as a context manager.
+    """
+
+    # Catalog scan over the sys.* views, joined on object_id/column_id. Tables
+    # are reported as "schema.table" and ordered by schema, then table, so the
+    # result can be grouped per schema. EXTRA is the strongest key the column
+    # takes part in (PRIMARY KEY > UNIQUE > FOREIGN KEY).
+    SCHEMA_QUERY = """
+            SELECT
+                s.name + N'.' + t.name AS TABLE_NAME,
+                c.column_id AS ORDINAL_POSITION,
+                c.name AS COLUMN_NAME,
+                tn.type_name AS DATA_TYPE,
+                CASE
+                    WHEN tn.type_name IN (N'nchar', N'nvarchar') AND c.max_length > 0
+                        THEN c.max_length / 2
+                    WHEN tn.type_name IN (N'char', N'varchar', N'binary', N'varbinary', N'nchar', N'nvarchar')
+                        THEN c.max_length
+                END AS CHARACTER_MAXIMUM_LENGTH,
+                CASE WHEN c.is_nullable = 1 THEN 'YES' ELSE 'NO' END AS IS_NULLABLE,
+                CASE
+                    WHEN k.is_primary_key = 1 THEN 'PRIMARY KEY'
+                    WHEN k.is_unique = 1 THEN 'UNIQUE'
+                    WHEN fk.parent_column_id IS NOT NULL THEN 'FOREIGN KEY'
+                    ELSE ''
+                END AS EXTRA,
+                COALESCE(CAST(ep.value AS NVARCHAR(MAX)), '') AS COLUMN_COMMENT,
+                dc.definition AS COLUMN_DEFAULT
+            FROM
+                sys.tables t
+            INNER JOIN
+                sys.schemas s
+                ON s.schema_id = t.schema_id
+            INNER JOIN
+                sys.columns c
+                ON c.object_id = t.object_id
+            INNER JOIN
+                sys.types ut
+                ON ut.user_type_id = c.user_type_id
+            LEFT JOIN
+                sys.types bt
+                ON bt.user_type_id = c.system_type_id
+            CROSS APPLY (
+                -- Alias types report their base type, as INFORMATION_SCHEMA.COLUMNS does.
+                SELECT COALESCE(bt.name, ut.name) AS type_name
+            ) tn
+            LEFT JOIN (
+                SELECT
+                    ic.object_id,
+                    ic.column_id,
+                    MAX(CAST(i.is_primary_key AS INT)) AS is_primary_key,
+                    MAX(CAST(i.is_unique_constraint AS INT)) AS is_unique
+                FROM
+                    sys.indexes i
+                INNER JOIN
+                    sys.index_columns ic
+                    ON ic.object_id = i.object_id
+                    AND ic.index_id = i.index_id
+                WHERE
+                    i.is_primary_key = 1
+                    OR i.is_unique_constraint = 1
+                GROUP BY
+                    ic.object_id,
+                    ic.column_id
+            ) k ON k.object_id = c.object_id AND k.column_id = c.column_id
+            LEFT JOIN (
+                SELECT DISTINCT
+                    parent_object_id,
+                    parent_column_id
+                FROM
+                    sys.foreign_key_columns
+            ) fk ON fk.parent_object_id = c.object_id AND fk.parent_column_id = c.column_id
+            LEFT JOIN
+                sys.default_constraints dc
+                ON dc.object_id = c.default_object_id
+            LEFT JOIN
+                sys.extended_properties ep
+                ON ep.class = 1
+                AND ep.major_id = c.object_id
+                AND ep.minor_id = c.column_id
+                AND ep.name = N'MS_Description'
+            WHERE
+                t.is_ms_shipped = 0{filters}
+            ORDER BY
+                s.name,
+                t.name,
+                c.column_id ASC
+            """
+
+    # Row count of one table ("schema.table", quoted), for sample_table().
+    ROW_COUNT_QUERY = """
+            SELECT SUM(p.rows)
+            FROM sys.partitions p
+            WHERE p.object_id = OBJECT_ID(?) AND p.index_id IN (0, 1)
+            """
+
+    FINGERPRINT_QUERY = """
+            SELECT
+                s.name + N'.' + t.name,
+                t.modify_date
+            FROM
+                sys.tables t
+            INNER JOIN
+                sys.schemas s
+                ON s.schema_id = t.schema_id
+            WHERE
+                t.is_ms_shipped = 0{filters}
+            ORDER BY
+                s.name,
+                t.name
+            """
+
+    # Detail catalogs fetched by get_schema(details=True), in the row layouts
+    # expected by schema.merge_details(). Heaps (index type 0) and included
+    # columns are left out of the index lists.
+    INDEX_QUERY = """
+            SELECT
+                s.name + N'.' + t.name,
+                i.name,
+                i.is_unique,
+                i.type_desc,
+                c.name
+            FROM
+                sys.tables t
+            INNER JOIN
+                sys.schemas s
+                ON s.schema_id = t.schema_id
+            INNER JOIN
+                sys.indexes i
+                ON i.object_id = t.object_id
+            INNER JOIN
+                sys.index_columns ic
+                ON ic.object_id = i.object_id
+                AND ic.index_id = i.index_id
+            INNER JOIN
+                sys.columns c
+                ON c.object_id = ic.object_id
+                AND c.column_id = ic.column_id
+            WHERE
+                t.is_ms_shipped = 0
+                AND i.type > 0
+                AND ic.is_included_column = 0{filters}
+            ORDER BY
+                s.name,
+                t.name,
+                i.name,
+                ic.key_ordinal
+            """
+
+    FOREIGN_KEY_QUERY = """
+            SELECT
+                s.name + N'.' + t.name,
+                fk.name,
+                rs.name + N'.' + rt.name,
+                c.name,
+                rc.name
+            FROM
+                sys.tables t
+            INNER JOIN
+                sys.schemas s
+                ON s.schema_id = t.schema_id
+            INNER JOIN
+                sys.foreign_keys fk
+                ON fk.parent_object_id = t.object_id
+            INNER JOIN
+                sys.foreign_key_columns fkc
+                ON fkc.constraint_object_id = fk.object_id
+            INNER JOIN
+                sys.columns c
+                ON c.object_id = fkc.parent_object_id
+                AND c.column_id = fkc.parent_column_id
+            INNER JOIN
+                sys.tables rt
+                ON rt.object_id = fkc.referenced_object_id
+            INNER JOIN
+                sys.schemas rs
+                ON rs.schema_id = rt.schema_id
+            INNER JOIN
+                sys.columns rc
+                ON rc.object_id = fkc.referenced_object_id
+                AND rc.column_id = fkc.referenced_column_id
+            WHERE
+                t.is_ms_shipped = 0{filters}
+            ORDER BY
+                s.name,
+                t.name,
+                fk.name,
+                fkc.constraint_column_id
+            """
+
+    # Primary key, unique and check constraints; foreign keys are listed by
+    # FOREIGN_KEY_QUERY. The filters appear once per branch of the UNION.
+    CONSTRAINT_QUERY = """
+            SELECT
+                table_name,
+                constraint_name,
+                constraint_type,
+                column_name
+            FROM (
+                SELECT
+                    s.name + N'.' + t.name AS table_name,
+                    kc.name AS constraint_name,
+                    CASE WHEN kc.type = 'PK' THEN 'PRIMARY KEY' ELSE 'UNIQUE' END AS constraint_type,
+                    c.name AS column_name,
+                    ic.key_ordinal AS position
+                FROM
+                    sys.tables t
+                INNER JOIN
+                    sys.schemas s
+                    ON s.schema_id = t.schema_id
+                INNER JOIN
+                    sys.key_constraints kc
+                    ON kc.parent_object_id = t.object_id
+                INNER JOIN
+                    sys.index_columns ic
+                    ON ic.object_id = t.object_id
+                    AND ic.index_id = kc.unique_index_id
+                INNER JOIN
+                    sys.columns c
+                    ON c.object_id = ic.object_id
+                    AND c.column_id = ic.column_id
+                WHERE
+                    t.is_ms_shipped = 0{filters}
+                UNION ALL
+                SELECT
+                    s.name + N'.' + t.name,
+                    cc.name,
+                    'CHECK',
+                    COALESCE(c.name, ''),
+                    0
+                FROM
+                    sys.tables t
+                INNER JOIN
+                    sys.schemas s
+                    ON s.schema_id = t.schema_id
+                INNER JOIN
+                    sys.check_constraints cc
+                    ON cc.parent_object_id = t.object_id
+                LEFT JOIN
+                    sys.columns c
+                    ON c.object_id = t.object_id
+                    AND c.column_id = cc.parent_column_id
+                WHERE
+                    t.is_ms_shipped = 0{filters}
+            ) constraints
+            ORDER BY
+                table_name,
+                constraint_name,
+                position
+            """
+
+    # One row per table: MS_Description and the row count and sizes from
+    # sys.dm_db_partition_stats (needs VIEW DATABASE STATE), summed over the
+    # partitions of each table in one pass instead of a query per table.
+    # Data is the heap or clustered index (index_id 0/1), the rest is indexes.
+    TABLE_QUERY = """
+            SELECT
+                s.name + N'.' + t.name,
+                CAST(ep.value AS NVARCHAR(4000)),
+                N'',
+                N'',
+                ps.row_count,
+                ps.data_pages * 8192,
+                ps.index_pages * 8192
+            FROM
+                sys.tables t
+            INNER JOIN
+                sys.schemas s
+                ON s.schema_id = t.schema_id
+            LEFT JOIN (
+                SELECT
+                    object_id,
+                    SUM(CASE WHEN index_id IN (0, 1) THEN row_count ELSE 0 END) AS row_count,
+                    SUM(CASE WHEN index_id IN (0, 1) THEN used_page_count ELSE 0 END) AS data_pages,
+                    SUM(CASE WHEN index_id > 1 THEN used_page_count ELSE 0 END) AS index_pages
+                FROM
+                    sys.dm_db_partition_stats
+                GROUP BY
+                    object_id
+            ) ps
+                ON ps.object_id = t.object_id
+            LEFT JOIN
+                sys.extended_properties ep
+                ON ep.major_id = t.object_id
+                AND ep.minor_id = 0
+                AND ep.class = 1
+                AND ep.name = N'MS_Description'
+            WHERE
+                t.is_ms_shipped = 0{filters}
+            ORDER BY
+                s.name,
+                t.name
+            """
+
+    def __init__(
+        self,
+        db_name,
+        db_user,
+        db_password,
+        db_host,
+        db_port=1433,
+        schemas: list = None,
+        pool_size: int = POOL_SIZE,
+        table_filter: TableFilter = None,
+        chunk_tables: int = None,
+        chunk_timeout: float = None,
+        chunk_retries: int = CHUNK_RETRIES,
+    ):
         self.db_host = db_host
         self.db_port = db_port
         self.db_user = db_user
         self.db_password = db_password
         self.db_name = db_name
-        self.connection, self.cursor = self.connect_to_db()
+        # Schemas to export; None exports every user schema.
+        self.schemas = schemas
+        # Tables to export. T-SQL has no REGEXP, so regular expressions are
+        # matched on the rows instead of in the catalog queries.
+        self.table_filter = table_filter or TableFilter()
+        # Split the column scan into chunks of this many tables, run on the
+        # pooled connections at the same time (see query_schema_chunked()).
+        self.chunk_tables = min(chunk_tables, MAX_CHUNK_TABLES) if chunk_tables else chunk_tables
+        self.chunk_timeout = chunk_timeout
+        self.chunk_retries = chunk_retries
+        self.pool = ConnectionPool(lambda: self.connect_to_db()[0], max_size=pool_size)
+        # Open the first connection right away so wrong settings fail here.
+        self.pool.release(self.pool.acquire())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
+    @METRICS.timed("connect")
     def connect_to_db(self):
         conn_str = (
             f"DRIVER={{FreeTDS}};"
@@ -27,83 +402,193 @@ class MSSQLConnector:
         print(f"{is_success} connected to {db[0]}")
         return connection, cursor
 
-    def query_schema(self, query_schema: str = None):
-        connection = self.connection
-        cursor = self.cursor
+    def _catalog_filters(self, tables: list = None):
+        # WHERE clause additions shared by the catalog queries: the selected
+        # schemas and tables, and the "schema.table" names when refreshing
+        # incrementally.
+        filters, params = self.table_filter.where("t.name", "?")
+        if self.schemas:
+            filters += f" AND s.name IN ({', '.join(['?'] * len(self.schemas))})"
+            params += tuple(self.schemas)
+        if self.table_filter.exclude_schemas:
+            filters += f" AND s.name NOT IN ({', '.join(['?'] * len(self.table_filter.exclude_schemas))})"
+            params += tuple(self.table_filter.exclude_schemas)
+        if tables:
+            filters += f" AND s.name + N'.' + t.name IN ({', '.join(['?'] * len(tables))})"
+            params += tuple(tables)
+        return filters, params
+
+    def _schema_query(self, tables: list = None):
+        filters, params = self._catalog_filters(tables)
+        return self.SCHEMA_QUERY.format(filters=filters), params
+
+    def _filter_rows(self, rows):
+        # Client-side fallback for the table patterns SQL cannot express; rows start with "schema.table".
+        if not self.table_filter.client_side(regexp=False):
+            return rows
+        return [row for row in rows if self.table_filter.matches(row[0].split(".", 1)[-1])]
+
+    def _fetch_chunk(self, pool, query: str, params) -> list:
+        # fetch_all() under the pyodbc query timeout (seconds, 0 for none) of the connection.
+        with pool.connection() as connection:
+            connection.timeout = math.ceil(self.chunk_timeout or 0)
+            try:
+                return fetch_rows(connection, query, params)
+            finally:
+                connection.timeout = 0
+
+    def sample_table(self, table_name: str, columns: list, limit: int, timeout: float = None) -> tuple:
+        """
+        Read up to ``limit`` rows of ``columns`` of a table for data profiling
+        and return (rows, table rows). A larger table is read with TABLESAMPLE
+        SYSTEM, sampling the pages of SAMPLE_OVERSAMPLING times ``limit`` rows;
+        a smaller one, or a sample that drew no page, gives its first rows.
+        ``timeout`` (seconds) bounds the whole sample: every query gets the
+        time left, rounded up to whole seconds, and TimeoutError is raised
+        instead of starting a query past it.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        schema_name, _, name = table_name.partition(".")
+        table = f"{quote_name(schema_name)}.{quote_name(name)}"
+        names = ", ".join(quote_name(column["column_name"]) for column in columns)
+        select = f"SELECT TOP ({int(limit)}) {names} FROM {table}"
+        with self.pool.connection() as connection:
+            try:
+                total_rows = fetch_until(connection, deadline, self.ROW_COUNT_QUERY, (table,))[0][0]
+                rows = []
+                if total_rows and total_rows > limit:
+                    percent = min(100.0, 100.0 * SAMPLE_OVERSAMPLING * limit / total_rows)
+                    rows = fetch_until(connection, deadline, f"{select} TABLESAMPLE SYSTEM ({percent:.6f} PERCENT)")
+                if not rows:
+                    rows = fetch_until(connection, deadline, select)
+            finally:
+                connection.timeout = 0
+        return [tuple(row) for row in rows], total_rows
+
+    def query_schema_chunked(self, tables: list = None):
+        """
+        The rows of query_schema(), scanned in chunks of ``chunk_tables`` (at
+        most MAX_CHUNK_TABLES, also the size without ``chunk_tables``)
+        consecutive tables of the cheap sys.tables listing. The chunks run
+        concurrently on the pooled connections, each under the
+        ``chunk_timeout`` query timeout (seconds) and retried as two halves
+        up to ``chunk_retries`` times, and their rows are merged back in
+        schema, table, column order.
+        """
+        names = list(self.query_table_fingerprints())
+        if tables is not None:
+            selected = set(tables)
+            names = [name for name in names if name in selected]
+        return fetch_chunked(
+            self.pool,
+            names,
+            self._schema_query,
+            self.chunk_tables or MAX_CHUNK_TABLES,
+            self.chunk_retries,
+            fetch=self._fetch_chunk,
+        )
+
+    @METRICS.timed("query")
+    def query_schema(self, query_schema: str = None, tables: list = None):
+        # Also chunked when an incremental refresh names more tables than one statement can take.
+        if not query_schema and (self.chunk_tables or (tables and len(tables) > MAX_CHUNK_TABLES)):
+            return self.query_schema_chunked(tables)
+        params = (self.db_name,)
         if not query_schema:
-            query_schema = """
-            SELECT
-                c.TABLE_NAME,
-                c.ORDINAL_POSITION,
-                c.COLUMN_NAME,
-                c.DATA_TYPE,
-                c.CHARACTER_MAXIMUM_LENGTH,
-                c.IS_NULLABLE,
-                COALESCE(tc.CONSTRAINT_TYPE, '') AS EXTRA,
-                COALESCE(CAST(ep.value AS NVARCHAR(MAX)), '') AS COLUMN_COMMENT,
-                c.COLUMN_DEFAULT
-            FROM
-                INFORMATION_SCHEMA.COLUMNS c
-            LEFT JOIN (
-                SELECT
-                    kcu.TABLE_NAME,
-                    kcu.COLUMN_NAME,
-                    tc.CONSTRAINT_TYPE
-                FROM
-                    INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
-                INNER JOIN
-                    INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
-                    ON kcu.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
-                    AND kcu.TABLE_NAME = tc.TABLE_NAME
-            ) tc ON c.TABLE_NAME = tc.TABLE_NAME AND c.COLUMN_NAME = tc.COLUMN_NAME
-            LEFT JOIN
-                sys.columns sc
-                ON sc.name = c.COLUMN_NAME
-                AND sc.object_id = OBJECT_ID(c.TABLE_SCHEMA + '.' + c.TABLE_NAME)
-            LEFT JOIN
-                sys.extended_properties ep
-                ON ep.major_id = sc.object_id
-                AND ep.minor_id = sc.column_id
-                AND ep.name = 'MS_Description'
-            WHERE
-                c.TABLE_CATALOG = ?
-                AND c.TABLE_SCHEMA = 'dbo'
-            ORDER BY
-                c.TABLE_NAME,
-                c.ORDINAL_POSITION ASC
-            """
-        cursor.execute(query_schema, (self.db_name,))
-        results = cursor.fetchall()
-        connection.close()
-        return results
-
-    def get_schema(self):
-        result = self.query_schema()
-        table_name = {}
-        for row in result:
-            (
-                table,
-                ordinal,
-                column_name,
-                column_type,
-                max_length,
-                is_nullable,
-                extra,
-                column_comment,
-                column_default,
-            ) = row
-            table_schema = {
-                "ordinal": ordinal,
-                "column_name": column_name,
-                "column_type": column_type,
-                "max_length": max_length if max_length else "",
-                "is_nullable": is_nullable,
-                "extra": extra,
-                "column_comment": column_comment if column_comment else "",
-                "column_default": column_default if column_default else "",
-            }
-            if table in table_name:
-                table_name[table].append(table_schema)
-            else:
-                table_name[table] = [table_schema]
-        return table_name
+            query_schema, params = self._schema_query(tables)
+        results = fetch_all(self.pool, query_schema, params)
+        METRICS.count("rows_fetched", len(results))
+        return self._filter_rows(results)
+
+    def iter_query_schema(self, query_schema: str = None, batch_size: int = FETCH_BATCH_SIZE):
+        """
+        Streaming variant of query_schema(). Rows are pulled with fetchmany() in
+        batches of ``batch_size`` instead of fetchall(). The connection goes
+        back to the pool once the rows are exhausted; a stream abandoned half
+        way closes it instead.
+        """
+        params = (self.db_name,)
+        if not query_schema:
+            query_schema, params = self._schema_query()
+        connection = self.pool.acquire()
+        broken = True
+        try:
+            cursor = connection.cursor()
+            cursor.arraysize = batch_size
+            try:
+                cursor.execute(query_schema, params)
+                rows = iter_rows(cursor, batch_size)
+                if self.table_filter.client_side(regexp=False):
+                    rows = (row for row in rows if self.table_filter.matches(row[0].split(".", 1)[-1]))
+                yield from rows
+            finally:
+                cursor.close()
+            broken = False
+        finally:
+            self.pool.release(connection, broken=broken)
+
+    def query_table_fingerprints(self):
+        """
+        Return {"schema.table": fingerprint} built from sys.tables.modify_date
+        (the sys.objects column). This is a cheap lookup.
+        """
+        filters, params = self._catalog_filters()
+        rows = self._filter_rows(fetch_all(self.pool, self.FINGERPRINT_QUERY.format(filters=filters), params))
+        return {table: str(modify_date) for table, modify_date in rows}
+
+    def database_names(self) -> list:
+        """Names of the databases on the server that the login can see."""
+        return [row[0] for row in fetch_all(self.pool, "SELECT name FROM sys.databases")]
+
+    def close(self):
+        """Close every pooled connection; connections still in use close when released."""
+        self.pool.close()
+
+    def query_details(self, tables: list = None):
+        """
+        Fetch the columns together with the table, index, foreign key and
+        constraint catalogs, each query on its own pooled connection at the
+        same time, and return {name: rows}. Table lists too long for the
+        parameter limit (the constraint query binds them twice) are left out
+        of the detail queries, whose rows are then narrowed down here, and
+        the columns are scanned in chunks.
+        """
+        chunked = self.chunk_tables or (tables and len(tables) > MAX_CHUNK_TABLES)
+        wanted = set(tables) if tables and 2 * len(tables) > MAX_CHUNK_TABLES else None
+        filters, params = self._catalog_filters(None if wanted else tables)
+        queries = {
+            "tables": (self.TABLE_QUERY.format(filters=filters), params),
+            "indexes": (self.INDEX_QUERY.format(filters=filters), params),
+            "foreign_keys": (self.FOREIGN_KEY_QUERY.format(filters=filters), params),
+            "constraints": (self.CONSTRAINT_QUERY.format(filters=filters), params * 2),
+        }
+        if not chunked:
+            queries["columns"] = self._schema_query(tables)
+        with METRICS.phase("query"):
+            results = fetch_concurrently(self.pool, queries)
+            if chunked:
+                results["columns"] = self.query_schema_chunked(tables)
+        if wanted:
+            results = {name: [row for row in rows if row[0] in wanted] for name, rows in results.items()}
+        return {name: self._filter_rows(rows) for name, rows in results.items()}
+
+    def get_schema(self, tables: list = None, details: bool = False):
+        """
+        Return {"schema.table": columns}. With ``details`` the tables are Table
+        objects that also carry their metadata (MS_Description, row count,
+        sizes), indexes, foreign keys and constraints.
+        """
+        if not details:
+            rows = self.query_schema(tables=tables)
+            with METRICS.phase("transform"):
+                return build_schema(rows)
+        results = self.query_details(tables)
+        with METRICS.phase("transform"):
+            schema = build_schema(results["columns"])
+            return merge_details(
+                schema, results["indexes"], results["foreign_keys"], results["constraints"], results["tables"]
+            )
+
+    def iter_schema(self, batch_size: int = FETCH_BATCH_SIZE):
+        """Yield (table_name, columns) pairs as they come off the cursor."""
+        return iter_tables(self.iter_query_schema(batch_size=batch_size))
@@ -0,0 +1,201 @@
+import os
+import re
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+
+from cli import BACKENDS
+from generate import ExportDataDictionary
+from grouping import table_schema
+from schema import SCAN_OPTIONS
+from schema_catalog import SchemaCatalog
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_PER_SERVER = 2
+# Upper bound on the number of MySQL schemas folded into one catalog scan, so
+# a server with hundreds of databases is still split across several workers.
+DEFAULT_MAX_SCHEMAS_PER_SCAN = 50
+
+
+class ExportJob:
+    """
+    One unit of work for the scheduler: a single connection to one server
+    that scans the catalog of one or more databases. The connector's pool
+    holds that one connection only, so chunked scans run their chunks one
+    after the other and the per-server limit counts connections.
+    """
+
+    def __init__(self, backend: str, target: dict, db_names: list):
+        self.backend = backend
+        self.target = target
+        self.db_names = db_names
+
+    @property
+    def server(self):
+        return self.backend, self.target["db_host"], self.target.get("db_port")
+
+    @property
+    def label(self):
+        return f"{self.target['db_host']}/{','.join(self.db_names)}"
+
+    def fetch(self) -> dict:
+        """Connect, scan the catalog and return {db_name: schema}."""
+        credentials = {
+            "db_host": self.target["db_host"],
+            "db_user": self.target["db_user"],
+            "db_password": self.target["db_password"],
+            "db_name": self.db_names[0],
+            "pool_size": 1,
+            # Chunked catalog scan settings, see MySQLConnector.query_schema_chunked().
+            **{option: self.target[option] for option in SCAN_OPTIONS if option in self.target},
+        }
+        # Imports the driver of this backend only.
+        connector_class = BACKENDS[self.backend].load()
+        if self.backend == "mssql":
+            with connector_class(
+                db_port=self.target.get("db_port", 1433), schemas=self.target.get("schemas"), **credentials
+            ) as connector:
+                return {self.db_names[0]: connector.get_schema()}
+        with connector_class(db_port=self.target.get("db_port"), **credentials) as connector:
+            if len(self.db_names) == 1:
+                return {self.db_names[0]: connector.get_schema()}
+            return connector.get_schemas(self.db_names)
+
+
+def plan_jobs(targets: list, max_schemas_per_scan: int = DEFAULT_MAX_SCHEMAS_PER_SCAN) -> list:
+    """
+    Turn the configured targets into export jobs. MySQL databases that live on
+    the same server and share credentials are folded into
+    ``table_schema IN (...)`` scans; MSSQL catalogs are per database, so every
+    MSSQL database gets its own job.
+    """
+    jobs = []
+    mysql_servers = {}
+    for target in targets:
+        backend = target.get("backend", "mysql")
+        if backend == "mssql":
+            jobs.extend(ExportJob(backend, target, [db_name]) for db_name in target["db_names"])
+        elif backend == "mysql":
+            key = (target["db_host"], target.get("db_port"), target["db_user"], target["db_password"])
+            _, db_names = mysql_servers.setdefault(key, (target, []))
+            db_names.extend(db_name for db_name in target["db_names"] if db_name not in db_names)
+        else:
+            raise ValueError(f"Unknown backend {backend!r} for {target['db_host']}")
+
+    for target, db_names in mysql_servers.values():
+        for start in range(0, len(db_names), max_schemas_per_scan):
+            jobs.append(ExportJob("mysql", target, db_names[start : start + max_schemas_per_scan]))
+    return jobs
+
+
+def interleave_by_server(jobs: list) -> list:
+    """
+    Order jobs round-robin across servers so that pool threads are not all
+    parked on the concurrency limit of a single busy server.
+    """
+    by_server = defaultdict(list)
+    for job in jobs:
+        by_server[job.server].append(job)
+    return [job for batch in zip_longest(*by_server.values()) for job in batch if job is not None]
+
+
+def output_path(output_dir: str, db_host: str, db_name: str) -> str:
+    file_name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{db_host}_{db_name}") + ".xlsx"
+    return os.path.join(output_dir, file_name)
+
+
+def write_database(path: str, backend: str, schema: dict):
+    # Same layout as the single-database entry points.
+    if backend == "mssql":
+        ExportDataDictionary(path).generate_xlsx(schema, group_by=table_schema)
+    else:
+        ExportDataDictionary(path).generate_xlsx(schema)
+
+
+def combined_sheets(schemas: dict) -> dict:
+    """
+    Key {"host/db_name": schema} by sheet name for the combined workbook: the
+    database name alone, or "db_name@host" when it exists on several servers.
+    """
+    db_name_counts = defaultdict(int)
+    for label in schemas:
+        db_name_counts[label.split("/", 1)[1]] += 1
+    sheets = {}
+    for label in sorted(schemas):
+        db_host, db_name = label.split("/", 1)
+        sheet_name = db_name if db_name_counts[db_name] == 1 else f"{db_name}@{db_host}"
+        sheets[re.sub(r"[\\[\]:*?/]", "_", sheet_name)] = schemas[label]
+    return sheets
+
+
+def _run_job(
+    job: ExportJob, server_limit: threading.BoundedSemaphore, output_dir: str, combined: bool, catalog=None
+) -> dict:
+    with server_limit:
+        schemas = job.fetch()
+    results = {}
+    for db_name, schema in schemas.items():
+        label = f"{job.target['db_host']}/{db_name}"
+        if catalog is not None:
+            catalog.store(schema, job.target["db_host"], db_name)
+        if combined:
+            results[label] = schema
+        else:
+            path = output_path(output_dir, job.target["db_host"], db_name)
+            write_database(path, job.backend, schema)
+            results[label] = path
+    return results
+
+
+def _run_jobs(jobs: list, max_workers: int, max_per_server: int, output_dir: str, combined: bool, catalog=None):
+    server_limits = {job.server: threading.BoundedSemaphore(max_per_server) for job in jobs}
+    results = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_job, job, server_limits[job.server], output_dir, combined, catalog): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results.update(future.result())
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                print(f"Failed to export {job.label}: {error}")
+                failures[job.label] = error
+    return results, failures
+
+
+def run_exports(
+    targets: list,
+    output_dir: str = "data_dictionaries",
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_per_server: int = DEFAULT_MAX_PER_SERVER,
+    max_schemas_per_scan: int = DEFAULT_MAX_SCHEMAS_PER_SCAN,
+    combined: bool = False,
+    combined_file: str = "data_dictionary.xlsx",
+    catalog: str = None,
+):
+    """
+    Export every database of every target on a bounded thread pool, with at
+    most ``max_per_server`` concurrent connections per server. Writes one
+    workbook per database into ``output_dir``, or a single workbook with a
+    sheet per database when ``combined`` is set.
+
+    Returns ``(results, failures)``: {label: output path} and {job label: error}.
+    A failing server does not stop the exports of the others. With
+    ``catalog``, every schema is also stored in that SQLite schema catalog.
+    """
+    jobs = interleave_by_server(plan_jobs(targets, max_schemas_per_scan))
+    os.makedirs(output_dir, exist_ok=True)
+    if catalog is None:
+        results, failures = _run_jobs(jobs, max_workers, max_per_server, output_dir, combined)
+    else:
+        with SchemaCatalog(catalog) as schema_catalog:
+            results, failures = _run_jobs(jobs, max_workers, max_per_server, output_dir, combined, schema_catalog)
+    if combined:
+        path = os.path.join(output_dir, combined_file)
+        ExportDataDictionary(path).generate_xlsx_combined(combined_sheets(results))
+        results = {label: path for label in results}
+    return results, failures
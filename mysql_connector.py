@@ -1,28 +1,77 @@
+import random
+import re
+import time
+from itertools import groupby
+from operator import itemgetter
+
 import MySQLdb
 
+from metrics import METRICS
+from pool import POOL_SIZE, ConnectionPool
+from schema import (
+    CHUNK_RETRIES,
+    FETCH_BATCH_SIZE,
+    build_schema,
+    fetch_all,
+    fetch_chunked,
+    fetch_concurrently,
+    iter_rows,
+    iter_tables,
+    merge_details,
+)
+from table_filter import TableFilter
 
-class MySQLConnector:
-    def __init__(self, db_name, db_user, db_password, db_host):
-        self.db_host = db_host
-        self.db_user = db_user
-        self.db_password = db_password
-        self.db_name = db_name
-        self.connection, self.cursor = self.connect_to_db()
+# Primary key ranges read by sample_table(), spread over the key space.
+SAMPLE_RANGES = 4
+INTEGER_TYPE = re.compile(r"(tiny|small|medium|big)?int\b", re.IGNORECASE)
 
-    def connect_to_db(self):
-        connection = MySQLdb.connect(host=self.db_host, user=self.db_user, passwd=self.db_password, db=self.db_name)
-        cursor = connection.cursor()
-        cursor.execute("select database();")
-        db = cursor.fetchone()
-        is_success = "Successfully" if bool(db) else "Failed"
-        print(f"{is_success} connected to {db[0]}")
-        return connection, cursor
 
-    def query_schema(self, query_schema: str = None):
-        connection = self.connection
-        cursor = self.cursor
-        if not query_schema:
-            query_schema = """
+def quote_name(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def until(query: str, deadline: float = None) -> str:
+    """
+    ``query``, a SELECT, with a statement timeout of the time left until
+    ``deadline`` (a time.monotonic() value, None for no timeout); raise
+    TimeoutError once the deadline passed.
+    """
+    if deadline is None:
+        return query
+    remaining = int((deadline - time.monotonic()) * 1000)
+    if remaining <= 0:
+        raise TimeoutError("sample time limit reached")
+    # Milliseconds, for this statement only (MySQL 5.7.8+).
+    return query.replace("SELECT", f"SELECT /*+ MAX_EXECUTION_TIME({remaining}) */", 1)
+
+
+def regexp_prefix(server_info: str) -> str:
+    """
+    Prefix that makes a REGEXP pattern ignore case on the server with version
+    string ``server_info``: MySQL 8.0 matches with ICU, which honours "(?i)",
+    while 5.7 has no inline flags and follows the case-insensitive collation
+    of the information_schema columns anyway.
+    """
+    major = re.match(r"(\d+)\.", server_info)
+    return "(?i)" if major and int(major.group(1)) >= 8 else ""
+
+
+def range_starts(low: int, high: int) -> list:
+    """SAMPLE_RANGES random keys of [low, high], one in each of as many equal slices of it, in order."""
+    stride = (high - low + 1) / SAMPLE_RANGES
+    rng = random.Random()  # noqa: S311 - row sampling, not security related
+    return [low + int(stride * (index + rng.random())) for index in range(SAMPLE_RANGES)]
+
+
+class MySQLConnector:
+    """
+    A session on one MySQL database. Catalog queries run on connections from
+    a small pool, so one connector can run any number of queries, from several
+    threads, without a new login each time. Close it with close() or use it
+    as a context manager.
+    """
+
+    SCHEMA_QUERY = """
             SELECT
                 table_name,
                 ordinal_position,
@@ -36,47 +85,398 @@ class MySQLConnector:
             FROM
                 information_schema.COLUMNS
             WHERE
-                table_schema = %s
+                table_schema = %s{table_filter}
             ORDER BY
                 table_name,
                 ordinal_position ASC;
             """
-        cursor.execute(query_schema, (self.db_name,))
 
-        # Fetch a single row using fetchone() method.
-        results = cursor.fetchall()
-
-        # disconnect from server
-        connection.close()
-        return results
-
-    def get_schema(self):
-        result = self.query_schema()
-        table_name = {}
-        for row in result:
-            (
-                table,
-                ordinal,
+    MULTI_SCHEMA_QUERY = """
+            SELECT
+                table_schema,
+                table_name,
+                ordinal_position,
                 column_name,
                 column_type,
-                max_length,
+                character_maximum_length,
                 is_nullable,
                 extra,
                 column_comment,
-                column_default,
-            ) = row
-            table_schema = {
-                "ordinal": ordinal,
-                "column_name": column_name,
-                "column_type": column_type,
-                "max_length": max_length if max_length else "",
-                "is_nullable": is_nullable,
-                "extra": extra,
-                "column_comment": column_comment,
-                "column_default": column_default if column_default else "",
-            }
-            if table in table_name:
-                table_name[table].append(table_schema)
-            else:
-                table_name[table] = [table_schema]
-        return table_name
+                column_default
+            FROM
+                information_schema.COLUMNS
+            WHERE
+                table_schema IN ({schemas}){table_filter}
+            ORDER BY
+                table_schema,
+                table_name,
+                ordinal_position ASC;
+            """
+
+    FINGERPRINT_QUERY = """
+            SELECT
+                table_name,
+                create_time,
+                update_time
+            FROM
+                information_schema.TABLES
+            WHERE
+                table_schema = %s{table_filter}
+            ORDER BY
+                table_name;
+            """
+
+    # Detail catalogs fetched by get_schema(details=True), in the row layouts
+    # expected by schema.merge_details().
+    INDEX_QUERY = """
+            SELECT
+                table_name,
+                index_name,
+                non_unique = 0,
+                index_type,
+                COALESCE(column_name, '')
+            FROM
+                information_schema.STATISTICS
+            WHERE
+                table_schema = %s{table_filter}
+            ORDER BY
+                table_name,
+                index_name,
+                seq_in_index;
+            """
+
+    FOREIGN_KEY_QUERY = """
+            SELECT
+                table_name,
+                constraint_name,
+                CASE
+                    WHEN referenced_table_schema = table_schema THEN referenced_table_name
+                    ELSE CONCAT(referenced_table_schema, '.', referenced_table_name)
+                END,
+                column_name,
+                referenced_column_name
+            FROM
+                information_schema.KEY_COLUMN_USAGE
+            WHERE
+                table_schema = %s
+                AND referenced_table_name IS NOT NULL{table_filter}
+            ORDER BY
+                table_name,
+                constraint_name,
+                ordinal_position;
+            """
+
+    # Primary key, unique and check constraints; foreign keys are listed by FOREIGN_KEY_QUERY.
+    CONSTRAINT_QUERY = """
+            SELECT
+                tc.table_name,
+                tc.constraint_name,
+                tc.constraint_type,
+                COALESCE(k.column_name, '')
+            FROM
+                information_schema.TABLE_CONSTRAINTS tc
+            LEFT JOIN
+                information_schema.KEY_COLUMN_USAGE k
+                ON k.constraint_schema = tc.constraint_schema
+                AND k.constraint_name = tc.constraint_name
+                AND k.table_name = tc.table_name
+            WHERE
+                tc.table_schema = %s
+                AND tc.constraint_type <> 'FOREIGN KEY'{table_filter}
+            ORDER BY
+                tc.table_name,
+                tc.constraint_name,
+                k.ordinal_position;
+            """
+
+    # One row per table from the table statistics; table_rows and the sizes
+    # are InnoDB estimates, read without touching the tables themselves.
+    TABLE_QUERY = """
+            SELECT
+                table_name,
+                table_comment,
+                engine,
+                table_collation,
+                table_rows,
+                data_length,
+                index_length
+            FROM
+                information_schema.TABLES
+            WHERE
+                table_schema = %s{table_filter}
+            ORDER BY
+                table_name;
+            """
+
+    # Estimated row count and primary key columns of one table, for sample_table().
+    SAMPLE_INFO_QUERY = """
+            SELECT
+                t.table_rows,
+                (
+                    SELECT GROUP_CONCAT(s.column_name ORDER BY s.seq_in_index)
+                    FROM information_schema.STATISTICS s
+                    WHERE s.table_schema = t.table_schema AND s.table_name = t.table_name AND s.index_name = 'PRIMARY'
+                )
+            FROM
+                information_schema.TABLES t
+            WHERE
+                t.table_schema = %s
+                AND t.table_name = %s;
+            """
+
+    def __init__(
+        self,
+        db_name,
+        db_user,
+        db_password,
+        db_host,
+        pool_size: int = POOL_SIZE,
+        table_filter: TableFilter = None,
+        chunk_tables: int = None,
+        chunk_timeout: float = None,
+        chunk_retries: int = CHUNK_RETRIES,
+        db_port: int = None,
+    ):
+        self.db_host = db_host
+        # None connects to the server's default port.
+        self.db_port = db_port
+        self.db_user = db_user
+        self.db_password = db_password
+        self.db_name = db_name
+        # Split the column scan into chunks of this many tables, run on the
+        # pooled connections at the same time (see query_schema_chunked()).
+        self.chunk_tables = chunk_tables
+        self.chunk_timeout = chunk_timeout
+        self.chunk_retries = chunk_retries
+        # Tables to export; MySQL evaluates every pattern, regular expressions with REGEXP.
+        self.table_filter = table_filter or TableFilter()
+        # Set from the server version on connecting, see regexp_prefix().
+        self.regexp_prefix = ""
+        self.pool = ConnectionPool(lambda: self.connect_to_db()[0], max_size=pool_size)
+        # Open the first connection right away so wrong settings fail here.
+        self.pool.release(self.pool.acquire())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @METRICS.timed("connect")
+    def connect_to_db(self):
+        port = {"port": int(self.db_port)} if self.db_port else {}
+        connection = MySQLdb.connect(
+            host=self.db_host, user=self.db_user, passwd=self.db_password, db=self.db_name, **port
+        )
+        self.regexp_prefix = regexp_prefix(str(connection.get_server_info()))
+        cursor = connection.cursor()
+        cursor.execute("select database();")
+        db = cursor.fetchone()
+        is_success = "Successfully" if bool(db) else "Failed"
+        print(f"{is_success} connected to {db[0]}")
+        return connection, cursor
+
+    def _catalog_query(self, query: str, tables: list = None, column: str = "table_name"):
+        # Restrict a catalog scan to the tables selected by the table filter,
+        # and to the given tables when refreshing incrementally.
+        table_filter, params = self.table_filter.where(column, "%s", regexp=True, regexp_prefix=self.regexp_prefix)
+        if tables:
+            table_filter += f" AND {column} IN ({', '.join(['%s'] * len(tables))})"
+            params += tuple(tables)
+        return query.format(table_filter=table_filter), (self.db_name, *params)
+
+    def _schema_query(self, tables: list = None):
+        return self._catalog_query(self.SCHEMA_QUERY, tables)
+
+    def _chunk_query(self, tables: list):
+        query, params = self._schema_query(tables)
+        if self.chunk_timeout:
+            # Statement timeout of this query only, in milliseconds (MySQL 5.7.8+).
+            hint = f"SELECT /*+ MAX_EXECUTION_TIME({int(self.chunk_timeout * 1000)}) */"
+            query = query.replace("SELECT", hint, 1)
+        return query, params
+
+    def query_schema_chunked(self, tables: list = None):
+        """
+        The rows of query_schema(), scanned in chunks of ``chunk_tables``
+        consecutive tables of the cheap information_schema.TABLES listing.
+        The chunks run concurrently on the pooled connections, each under the
+        ``chunk_timeout`` statement timeout (seconds) and retried as two
+        halves up to ``chunk_retries`` times, and their rows are merged back
+        in table_name, ordinal_position order.
+        """
+        names = list(self.query_table_fingerprints())
+        if tables is not None:
+            selected = set(tables)
+            names = [name for name in names if name in selected]
+        return fetch_chunked(self.pool, names, self._chunk_query, self.chunk_tables, self.chunk_retries)
+
+    @METRICS.timed("query")
+    def query_schema(self, query_schema: str = None, tables: list = None):
+        if not query_schema and self.chunk_tables:
+            return self.query_schema_chunked(tables)
+        params = (self.db_name,)
+        if not query_schema:
+            query_schema, params = self._schema_query(tables)
+        results = fetch_all(self.pool, query_schema, params)
+        METRICS.count("rows_fetched", len(results))
+        return results
+
+    def iter_query_schema(self, query_schema: str = None, batch_size: int = FETCH_BATCH_SIZE):
+        """
+        Streaming variant of query_schema(). Rows are read through an unbuffered
+        SSCursor in batches of ``batch_size`` instead of being materialized with
+        fetchall(). The connection goes back to the pool once the rows are
+        exhausted; a stream abandoned half way closes it instead.
+        """
+        params = (self.db_name,)
+        if not query_schema:
+            query_schema, params = self._schema_query()
+        connection = self.pool.acquire()
+        broken = True
+        try:
+            cursor = connection.cursor(MySQLdb.cursors.SSCursor)
+            try:
+                cursor.execute(query_schema, params)
+                yield from iter_rows(cursor, batch_size)
+            finally:
+                cursor.close()
+            broken = False
+        finally:
+            self.pool.release(connection, broken=broken)
+
+    def query_table_fingerprints(self):
+        """
+        Return {table_name: fingerprint} built from the table create/update
+        timestamps. This is a cheap lookup on information_schema.TABLES.
+        """
+        rows = fetch_all(self.pool, *self._catalog_query(self.FINGERPRINT_QUERY))
+        return {table: f"{create_time}|{update_time}" for table, create_time, update_time in rows}
+
+    def database_names(self) -> list:
+        """Names of the databases on the server that the login can see."""
+        return [row[0] for row in fetch_all(self.pool, "SELECT schema_name FROM information_schema.SCHEMATA")]
+
+    def close(self):
+        """Close every pooled connection; connections still in use close when released."""
+        self.pool.close()
+
+    def query_details(self, tables: list = None):
+        """
+        Fetch the columns together with the table, index, foreign key and
+        constraint catalogs, each query on its own pooled connection at the
+        same time, and return {name: rows}.
+        """
+        queries = {
+            "columns": self._schema_query(tables),
+            "tables": self._catalog_query(self.TABLE_QUERY, tables),
+            "indexes": self._catalog_query(self.INDEX_QUERY, tables),
+            "foreign_keys": self._catalog_query(self.FOREIGN_KEY_QUERY, tables),
+            "constraints": self._catalog_query(self.CONSTRAINT_QUERY, tables, column="tc.table_name"),
+        }
+        if self.chunk_tables:
+            del queries["columns"]
+        with METRICS.phase("query"):
+            results = fetch_concurrently(self.pool, queries)
+            if self.chunk_tables:
+                results["columns"] = self.query_schema_chunked(tables)
+            return results
+
+    def get_schema(self, tables: list = None, details: bool = False):
+        """
+        Return {table_name: columns}. With ``details`` the tables are Table
+        objects that also carry their metadata (comment, engine, collation,
+        row estimate, sizes), indexes, foreign keys and constraints.
+        """
+        if not details:
+            rows = self.query_schema(tables=tables)
+            with METRICS.phase("transform"):
+                return build_schema(rows)
+        results = self.query_details(tables)
+        with METRICS.phase("transform"):
+            schema = build_schema(results["columns"])
+            return merge_details(
+                schema, results["indexes"], results["foreign_keys"], results["constraints"], results["tables"]
+            )
+
+    def sample_table(self, table_name: str, columns: list, limit: int, timeout: float = None) -> tuple:
+        """
+        Read up to ``limit`` rows of ``columns`` of a table for data profiling
+        and return (rows, estimated table rows). A larger table with a single
+        integer primary key is read in SAMPLE_RANGES primary key ranges that
+        start at random points of the key space, each an index range scan of
+        limit / SAMPLE_RANGES rows; any other table gives its first rows.
+        ``timeout`` (seconds) bounds the whole sample: every query only gets
+        the time left, the ranges not started in time are skipped, and
+        TimeoutError is raised when no row could be read in time.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        names = [column["column_name"] for column in columns]
+        select = f"SELECT {', '.join(quote_name(name) for name in names)} FROM {quote_name(table_name)}"
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(until(self.SAMPLE_INFO_QUERY, deadline), (self.db_name, table_name))
+                total_rows, key = cursor.fetchone() or (None, None)
+                if (
+                    key in names
+                    and INTEGER_TYPE.match(columns[names.index(key)]["column_type"])
+                    and (total_rows or 0) > limit
+                ):
+                    rows = self._sample_key_ranges(
+                        cursor, select, quote_name(table_name), key, names.index(key), limit, deadline
+                    )
+                else:
+                    cursor.execute(until(f"{select} LIMIT %s", deadline), (limit,))
+                    rows = list(cursor.fetchall())
+            finally:
+                cursor.close()
+        return rows, total_rows
+
+    @staticmethod
+    def _sample_key_ranges(
+        cursor, select: str, table: str, key: str, key_index: int, limit: int, deadline: float = None
+    ) -> list:
+        # Ranges in key order; each starts past the end of the previous one, so no row is read twice.
+        cursor.execute(until(f"SELECT MIN({quote_name(key)}), MAX({quote_name(key)}) FROM {table}", deadline))
+        low, high = cursor.fetchone()
+        if low is None:
+            return []
+        per_range = -(-limit // SAMPLE_RANGES)
+        query = f"{select} WHERE {quote_name(key)} >= %s ORDER BY {quote_name(key)} LIMIT %s"
+        rows = []
+        start = low
+        for point in range_starts(low, high):
+            if rows and deadline is not None and time.monotonic() >= deadline:
+                break  # out of time: keep the ranges already read
+            start = max(start, point)
+            cursor.execute(until(query, deadline), (start, per_range))
+            batch = cursor.fetchall()
+            if batch:
+                rows.extend(batch)
+                start = batch[-1][key_index] + 1
+        return rows
+
+    def get_schemas(self, db_names: list):
+        """
+        Scan the catalog of several databases on this server with a single
+        ``table_schema IN (...)`` query and return {db_name: schema}.
+        """
+        placeholders = ", ".join(["%s"] * len(db_names))
+        table_filter, params = self.table_filter.where(
+            "table_name", "%s", regexp=True, regexp_prefix=self.regexp_prefix
+        )
+        query = self.MULTI_SCHEMA_QUERY.format(schemas=placeholders, table_filter=table_filter)
+        with METRICS.phase("query"):
+            results = fetch_all(self.pool, query, (*db_names, *params))
+        METRICS.count("rows_fetched", len(results))
+
+        schemas = {db_name: {} for db_name in db_names}
+        with METRICS.phase("transform"):
+            for db_name, rows in groupby(results, key=itemgetter(0)):
+                schemas[db_name] = build_schema(row[1:] for row in rows)
+        return schemas
+
+    def iter_schema(self, batch_size: int = FETCH_BATCH_SIZE):
+        """Yield (table_name, columns) pairs as they come off the cursor."""
+        return iter_tables(self.iter_query_schema(batch_size=batch_size))
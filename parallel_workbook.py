@@ -0,0 +1,146 @@
+import io
+import struct
+import zipfile
+import zlib
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from generate import EXCEL_MAX_ROWS, ExportDataDictionary
+from grouping import table_prefix
+from metrics import METRICS
+from schema import iter_schema_items
+
+# Fixed entry timestamp (1980-01-01 00:00, the earliest a zip can hold), as
+# xlsxwriter uses for in-memory workbooks, so the output is reproducible.
+DOS_DATE = (0 << 9) | (1 << 5) | 1
+DOS_TIME = 0
+ZIP_VERSION = 20
+ZIP_LIMIT = 0xFFFFFFFF
+
+
+def prime_formats(workbook: ExportDataDictionary):
+    """
+    Give the cell formats of ``workbook`` their style indexes now, in the
+    order create_table() first uses them, instead of when a sheet first
+    writes them. Every worker and the assembled styles then agree on them,
+    whichever formats a sheet happens to use.
+    """
+    for cell_format in (workbook._bold, workbook._border):
+        cell_format._get_xf_index()
+
+
+class SheetPlan(ExportDataDictionary):
+    """
+    An ExportDataDictionary that decides which sheet every table goes to,
+    with the same sheet grouping, sheet names and row limit rollover as
+    generate_xlsx(), but only records the tables instead of writing them.
+    Closed, it is the workbook skeleton: every sheet, empty, with the
+    workbook, content types, document properties and styles parts.
+    """
+
+    def __init__(self, filename, max_rows: int = EXCEL_MAX_ROWS):
+        super().__init__(filename, max_rows=max_rows)
+        prime_formats(self)
+        self.sheet_tables = defaultdict(list)
+
+    def create_table(self, table_name: str, schema: list):
+        self.sheet_tables[self._worksheet.name].append((table_name, schema))
+        self._row += self.table_height(schema)
+
+    def add_tables(self, data, group_by=table_prefix):
+        for table_name, schema in iter_schema_items(data):
+            self.add_table(table_name, schema, group_by(table_name))
+
+
+def deflate(data: bytes) -> tuple:
+    """(CRC-32, size, raw deflate stream) of a zip entry, compressed the way zipfile.ZIP_DEFLATED does."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return zlib.crc32(data), len(data), compressor.compress(data) + compressor.flush()
+
+
+def render_sheet(sheet_name: str, tables: list, selected: bool = False) -> tuple:
+    """
+    Write ``tables`` on a single worksheet and return its compressed sheet
+    XML as deflate() does. Runs in a worker process: the worksheet is written
+    in constant_memory mode, so its strings are inline instead of indexes
+    into a shared strings part the parent would have to merge.
+    """
+    workbook = ExportDataDictionary(io.BytesIO(), constant_memory=True)
+    prime_formats(workbook)
+    workbook.start_sheet(sheet_name)
+    worksheet = workbook._worksheet
+    for table_name, schema in tables:
+        workbook.create_table(table_name, schema)
+    for column, width in worksheet.max_column_widths.items():
+        worksheet.set_column(column, column, width)
+    if selected:
+        worksheet.select()
+    # What xlsxwriter's packager does for each worksheet on close().
+    worksheet._opt_reopen()
+    worksheet._write_single_row()
+    xml = io.StringIO()
+    worksheet._set_xml_writer(xml)
+    worksheet._assemble_xml_file()
+    return deflate(xml.getvalue().encode("utf-8"))
+
+
+def write_zip(output, entries: list):
+    """
+    Write a zip archive of already deflated ``entries``, (name, (crc, size,
+    deflated)) pairs, to the binary file ``output``: the stored streams are
+    copied as they are, which the zipfile module has no way to do.
+    """
+    directory = []
+    offset = 0
+    for name, (crc, size, data) in entries:
+        if size > ZIP_LIMIT or offset > ZIP_LIMIT:
+            raise ValueError(f"{name} does not fit in a zip archive without zip64 extensions")
+        encoded = name.encode()
+        fields = (0, zipfile.ZIP_DEFLATED, DOS_TIME, DOS_DATE, crc, len(data), size, len(encoded))
+        output.write(struct.pack("<4s5H3L2H", b"PK\x03\x04", ZIP_VERSION, *fields, 0) + encoded)
+        output.write(data)
+        directory.append(
+            struct.pack("<4s6H3L5H2L", b"PK\x01\x02", ZIP_VERSION, ZIP_VERSION, *fields, 0, 0, 0, 0, 0, offset)
+            + encoded
+        )
+        offset += 30 + len(encoded) + len(data)
+    central = b"".join(directory)
+    output.write(central)
+    output.write(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, len(entries), len(entries), len(central), offset, 0))
+
+
+def generate_xlsx_parallel(
+    filename: str, data: dict | Iterable, group_by=table_prefix, max_workers: int = None, max_rows: int = EXCEL_MAX_ROWS
+) -> dict:
+    """
+    Write the same workbook as ExportDataDictionary(filename).generate_xlsx(data,
+    group_by), with every sheet rendered and compressed in a worker process
+    instead of all of them on one core when the workbook closes. The parent
+    plans the sheets (SheetPlan), writes the skeleton, and stitches the
+    compressed sheets into it. Strings are stored inline rather than in a
+    shared strings part; the cells, widths, styles and sheets are the same.
+
+    Return {sheet name: number of tables}.
+    """
+    plan = SheetPlan(io.BytesIO(), max_rows)
+    plan.add_tables(data, group_by)
+    sheets = [sheet.name for sheet in plan.worksheets()]
+    # Submitted largest first so a huge sheet does not run alone at the end.
+    by_size = sorted(
+        range(len(sheets)), key=lambda index: -sum(len(schema) for _, schema in plan.sheet_tables[sheets[index]])
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            index: executor.submit(render_sheet, sheets[index], plan.sheet_tables[sheets[index]], index == 0)
+            for index in by_size
+        }
+        parts = {f"xl/worksheets/sheet{index + 1}.xml": futures[index].result() for index in range(len(sheets))}
+    plan.close()
+
+    with METRICS.phase("close"), zipfile.ZipFile(plan.filename) as skeleton:
+        entries = [(name, parts.get(name) or deflate(skeleton.read(name))) for name in skeleton.namelist()]
+        with open(filename, "wb") as output:
+            write_zip(output, entries)
+    METRICS.count("tables_written", sum(len(tables) for tables in plan.sheet_tables.values()))
+    return {sheet: len(plan.sheet_tables[sheet]) for sheet in sheets}
@@ -0,0 +1,92 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from generate import ExportDataDictionary, iter_schema_items
+from grouping import group_tables, table_prefix
+
+MANIFEST_FILE = "manifest.json"
+
+
+def partition_schema(data, group_by=table_prefix) -> dict:
+    """
+    Split a schema into {partition: {table_name: columns}} in one pass, using
+    the same grouping keys as generate_xlsx() (table prefix or schema).
+    """
+    return group_tables(iter_schema_items(data), group_by)
+
+
+def partition_file_names(partitions) -> dict:
+    """
+    Map each partition to a file name that is safe on every filesystem and
+    unique even where names only differ in case or in replaced characters.
+    """
+    file_names = {}
+    used = set()
+    for partition in partitions:
+        stem = re.sub(r"[^A-Za-z0-9_.-]", "_", partition) or "_"
+        file_name = f"{stem}.xlsx"
+        suffix = 1
+        while file_name.lower() in used:
+            suffix += 1
+            file_name = f"{stem}_{suffix}.xlsx"
+        used.add(file_name.lower())
+        file_names[partition] = file_name
+    return file_names
+
+
+def render_partition(path: str, partition: str, data: dict) -> dict:
+    """
+    Write one partition to its own single-sheet workbook and return its
+    manifest entry. Runs in a worker process, so everything it touches must be
+    picklable.
+    """
+    workbook = ExportDataDictionary(path)
+    workbook.start_sheet(partition)
+    sheet = workbook._worksheet.name
+    tables = []
+    for table_name, columns in data.items():
+        # A partition past Excel's row limit continues on further sheets.
+        table_sheet, row = workbook.add_table(table_name, columns)
+        tables.append({"table": table_name, "sheet": table_sheet, "row": row, "columns": len(columns)})
+    rows = workbook.rows_used
+    workbook.close()
+    return {
+        "partition": partition,
+        "file": os.path.basename(path),
+        "sheet": sheet,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "tables": tables,
+    }
+
+
+def export_partitioned(data, output_dir: str, group_by=table_prefix, max_workers: int = None) -> dict:
+    """
+    Render every partition of the schema into its own workbook in a process
+    pool and write a manifest.json listing the files, the tables each one
+    holds (with the sheet row each table starts on) and row counts.
+
+    The largest partitions are submitted first so a single huge prefix does
+    not end up running alone at the end.
+    """
+    partitions = partition_schema(data, group_by)
+    file_names = partition_file_names(partitions)
+    os.makedirs(output_dir, exist_ok=True)
+    by_size = sorted(partitions, key=lambda name: sum(len(columns) for columns in partitions[name].values()))
+
+    entries = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(render_partition, os.path.join(output_dir, file_names[name]), name, partitions[name])
+            for name in reversed(by_size)
+        }
+        for name, future in futures.items():
+            entries[name] = future.result()
+            print(f"Generated {entries[name]['file']} ({len(entries[name]['tables'])} tables)")
+
+    manifest = {"partitions": [entries[name] for name in partitions]}
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
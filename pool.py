@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+# Connections per connector: enough for the concurrent detail queries of get_schema(details=True).
+POOL_SIZE = 5
+
+
+class PoolClosedError(RuntimeError):
+    pass
+
+
+class _Entry:
+    __slots__ = ("connection", "created", "last_used")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = time.monotonic()
+
+    def age(self, now: float) -> float:
+        return now - self.created
+
+    def idle(self, now: float) -> float:
+        return now - self.last_used
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool of DB-API connections to one database.
+
+    ``connect`` opens a new connection. At most ``max_size`` connections are
+    open at a time; acquire() blocks until one is released. Connections older
+    than ``max_age`` seconds are closed and replaced instead of being handed
+    out again, and a connection idle for more than ``check_after`` seconds is
+    health-checked with ``ping`` first, so a connection dropped by the server
+    or a firewall is replaced rather than failing the next catalog query.
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size: int = POOL_SIZE,
+        max_age: float = 1800.0,
+        check_after: float = 30.0,
+        ping: str = "SELECT 1",
+    ):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_age = max_age
+        self.check_after = check_after
+        self.ping = ping
+        self.closed = False
+        self._idle = deque()
+        self._in_use = {}
+        self._available = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle or in use."""
+        with self._available:
+            return len(self._idle) + len(self._in_use)
+
+    def _usable(self, entry: _Entry) -> bool:
+        now = time.monotonic()
+        if entry.age(now) > self.max_age:
+            return False
+        if entry.idle(now) <= self.check_after:
+            return True
+        try:
+            cursor = entry.connection.cursor()
+            cursor.execute(self.ping)
+            cursor.fetchall()
+            cursor.close()
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Any driver error means the connection is gone.
+            return False
+        return True
+
+    def acquire(self, timeout: float = None):
+        """Return an open connection, waiting up to ``timeout`` seconds (forever when None) for a free one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._available:
+            while True:
+                if self.closed:
+                    raise PoolClosedError("connection pool is closed")
+                if self._idle or len(self._in_use) < self.max_size:
+                    entry = self._idle.pop() if self._idle else None
+                    # Reserve the slot while connecting or checking outside the lock.
+                    reservation = object()
+                    self._in_use[id(reservation)] = reservation
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"no free connection within {timeout} seconds")
+                self._available.wait(remaining)
+        try:
+            if entry is not None and not self._usable(entry):
+                _close_quietly(entry.connection)
+                entry = None
+            if entry is None:
+                entry = _Entry(self.connect())
+                METRICS.count("connections_opened")
+        except BaseException:
+            with self._available:
+                del self._in_use[id(reservation)]
+                self._available.notify()
+            raise
+        with self._available:
+            del self._in_use[id(reservation)]
+            self._in_use[id(entry.connection)] = entry
+        return entry.connection
+
+    def release(self, connection, broken: bool = False):
+        """
+        Return ``connection`` to the pool. A ``broken`` connection, or any
+        connection released after close(), is closed instead.
+        """
+        with self._available:
+            entry = self._in_use.pop(id(connection))
+            keep = not broken and not self.closed
+            if keep:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._available.notify()
+        if not keep:
+            _close_quietly(connection)
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Context manager around acquire()/release(). A connection that raised is not reused."""
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, broken=True)
+            raise
+        self.release(connection)
+
+    def close(self):
+        """Close the idle connections now and the ones in use when they are released."""
+        with self._available:
+            self.closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for entry in idle:
+            _close_quietly(entry.connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:  # noqa: S110  # pylint: disable=broad-exception-caught
+        # Closing a connection that is already dead may fail, which is fine.
+        pass
@@ -0,0 +1,424 @@
+import gc
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+
+from metrics import METRICS
+
+# Number of rows pulled from the cursor per round trip when streaming.
+FETCH_BATCH_SIZE = 5000
+# Retries of a failed catalog chunk (see fetch_chunked()), and the pause before each.
+CHUNK_RETRIES = 2
+CHUNK_RETRY_DELAY = 0.5
+# Connector arguments of the chunked catalog scan.
+SCAN_OPTIONS = ("chunk_tables", "chunk_timeout", "chunk_retries")
+
+_intern = sys.intern
+
+COLUMN_FIELDS = (
+    "ordinal",
+    "column_name",
+    "column_type",
+    "max_length",
+    "is_nullable",
+    "extra",
+    "column_comment",
+    "column_default",
+)
+
+
+class Column:
+    """
+    Compact record for one column of a table.
+
+    Uses __slots__ instead of a per-column dict and interns the values that
+    repeat across a schema (names, types, nullability, key type), so a
+    million-column schema shares one copy of "int", "YES", "PRI", "id", ...
+    Item access (column["column_name"]) and keys() are kept so a Column can
+    be used wherever the former column dict was.
+
+    Missing values (NULL in the catalog) are stored as empty strings.
+    """
+
+    __slots__ = COLUMN_FIELDS
+
+    def __init__(
+        self,
+        ordinal,
+        column_name,
+        column_type,
+        max_length="",
+        is_nullable="",
+        extra="",
+        column_comment="",
+        column_default="",
+    ):
+        self.ordinal = ordinal
+        self.column_name = _intern(column_name)
+        self.column_type = _intern(column_type)
+        self.max_length = max_length or ""
+        self.is_nullable = _intern(is_nullable or "")
+        self.extra = _intern(extra or "")
+        self.column_comment = column_comment or ""
+        self.column_default = column_default or ""
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def keys(self):
+        return COLUMN_FIELDS
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in COLUMN_FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, Column):
+            return self.as_dict() == other.as_dict()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Column({self.as_dict()!r})"
+
+
+class _Record:
+    # Base of the detail records: __slots__ fields, dict export and value equality.
+    __slots__ = ()
+
+    def keys(self):
+        return self.__slots__
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        if isinstance(other, type(self)):
+            return self.as_dict() == other.as_dict()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class Index(_Record):
+    __slots__ = ("name", "columns", "unique", "index_type")
+
+    def __init__(self, name, columns, unique=False, index_type=""):
+        self.name = name
+        self.columns = columns
+        self.unique = bool(unique)
+        self.index_type = index_type or ""
+
+
+class ForeignKey(_Record):
+    __slots__ = ("name", "columns", "referenced_table", "referenced_columns")
+
+    def __init__(self, name, columns, referenced_table, referenced_columns):
+        self.name = name
+        self.columns = columns
+        self.referenced_table = referenced_table
+        self.referenced_columns = referenced_columns
+
+
+class Constraint(_Record):
+    __slots__ = ("name", "constraint_type", "columns")
+
+    def __init__(self, name, constraint_type, columns):
+        self.name = name
+        self.constraint_type = constraint_type
+        self.columns = columns
+
+
+class TableInfo(_Record):
+    """
+    Table level metadata: comment (MS_Description on MSSQL), storage engine
+    and collation (MySQL), and the catalog's estimated row count and data and
+    index sizes in bytes. The estimates come from table statistics, not from
+    counting rows, and are None where the catalog has none (e.g. views).
+    """
+
+    __slots__ = ("comment", "engine", "collation", "estimated_rows", "data_size", "index_size")
+
+    def __init__(self, comment="", engine="", collation="", estimated_rows=None, data_size=None, index_size=None):
+        self.comment = comment or ""
+        self.engine = engine or ""
+        self.collation = collation or ""
+        self.estimated_rows = None if estimated_rows is None else int(estimated_rows)
+        self.data_size = None if data_size is None else int(data_size)
+        self.index_size = None if index_size is None else int(index_size)
+
+
+class ColumnProfile(_Record):
+    """
+    What a sample of a column's data looks like (see data_profile.py): the
+    number of rows sampled, the share of NULLs among them, the estimated
+    number of distinct values in the whole table, and the smallest, largest
+    and a few example values of the sample, as display strings.
+    """
+
+    __slots__ = ("sampled_rows", "null_ratio", "distinct", "min_value", "max_value", "examples")
+
+    def __init__(self, sampled_rows, null_ratio, distinct, min_value="", max_value="", examples=()):
+        self.sampled_rows = int(sampled_rows)
+        self.null_ratio = float(null_ratio)
+        self.distinct = int(distinct)
+        self.min_value = min_value or ""
+        self.max_value = max_value or ""
+        self.examples = list(examples)
+
+
+class Table(list):
+    """
+    The columns of a table (it is still a plain list of Column for every
+    consumer) plus the table metadata, indexes, foreign keys and constraints
+    fetched by get_schema(details=True), and the {column_name: ColumnProfile}
+    of a data profiling run.
+    """
+
+    __slots__ = ("info", "indexes", "foreign_keys", "constraints", "profiles")
+
+    def __init__(self, columns=(), indexes=None, foreign_keys=None, constraints=None, info=None, profiles=None):
+        super().__init__(columns)
+        self.info = info
+        self.indexes = indexes or []
+        self.foreign_keys = foreign_keys or []
+        self.constraints = constraints or []
+        self.profiles = profiles or {}
+
+
+def column_to_dict(column) -> dict:
+    """Plain dict for a Column (or a legacy column dict), e.g. for JSON output."""
+    return {field: column[field] for field in COLUMN_FIELDS}
+
+
+def column_from_dict(data: dict) -> Column:
+    return Column(**{field: data[field] for field in COLUMN_FIELDS})
+
+
+def table_to_dict(columns) -> dict:
+    """Plain dict for the columns of a table, with its metadata and details when it is a Table."""
+    data = {"columns": [column_to_dict(column) for column in columns]}
+    if isinstance(columns, Table):
+        data["info"] = columns.info.as_dict() if columns.info is not None else None
+        data["indexes"] = [index.as_dict() for index in columns.indexes]
+        data["foreign_keys"] = [key.as_dict() for key in columns.foreign_keys]
+        data["constraints"] = [constraint.as_dict() for constraint in columns.constraints]
+        if columns.profiles:
+            data["profiles"] = {name: profile.as_dict() for name, profile in columns.profiles.items()}
+    return data
+
+
+def table_from_dict(data: dict):
+    """Inverse of table_to_dict(): a column list, or a Table when ``data`` has details."""
+    columns = [column_from_dict(column) for column in data["columns"]]
+    if "indexes" not in data:
+        return columns
+    return Table(
+        columns,
+        [Index(**index) for index in data["indexes"]],
+        [ForeignKey(**key) for key in data["foreign_keys"]],
+        [Constraint(**constraint) for constraint in data["constraints"]],
+        TableInfo(**data["info"]) if data["info"] is not None else None,
+        {name: ColumnProfile(**profile) for name, profile in data.get("profiles", {}).items()},
+    )
+
+
+def iter_schema_items(data):
+    """Accept either a {table_name: columns} dict or an iterable of (table_name, columns) pairs."""
+    if isinstance(data, dict):
+        return data.items()
+    return data
+
+
+def iter_rows(cursor, batch_size: int = FETCH_BATCH_SIZE):
+    """
+    Yield rows from an executed cursor in batches of ``batch_size`` so only one
+    batch is held in memory at a time.
+    """
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        METRICS.count("rows_fetched", len(rows))
+        yield from rows
+
+
+def column_from_row(row) -> Column:
+    """
+    Convert one catalog row (the 9-tuple selected by the connectors) into a
+    Column consumed by ExportDataDictionary.create_table().
+    """
+    return Column(*row[1:])
+
+
+def iter_tables(rows):
+    """
+    Group catalog rows into (table_name, columns) pairs. Rows must already be
+    ordered by table name, which every catalog query guarantees with its
+    ORDER BY, so each table is emitted as soon as its last row is read and
+    no per-row table lookup is needed.
+    """
+    for table, table_rows in groupby(rows, key=itemgetter(0)):
+        yield table, [column_from_row(row) for row in table_rows]
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while a large, acyclic structure is built.
+    Every Column allocation otherwise counts towards a collection that re-scans
+    all the columns created so far, which dominates the transform time of
+    million-column schemas.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def build_schema(rows) -> dict:
+    """Materialize catalog rows into a {table_name: [column, ...]} dict."""
+    schema = {}
+    with gc_paused():
+        for table, columns in iter_tables(rows):
+            if table in schema:
+                schema[table].extend(columns)
+            else:
+                schema[table] = columns
+    return schema
+
+
+def _group_names(rows, key_length: int):
+    # Group ordered detail rows by (table, name, ...) and collect their column lists.
+    for key, group in groupby(rows, key=lambda row: row[:key_length]):
+        yield key, [row[key_length:] for row in group]
+
+
+def merge_details(schema: dict, index_rows=(), foreign_key_rows=(), constraint_rows=(), table_rows=()) -> dict:
+    """
+    Attach indexes, foreign keys, constraints and table metadata to the tables
+    of ``schema`` in place, turning their column lists into Table objects. The
+    detail rows must be ordered by table and name, as the connectors' queries are:
+
+    - index rows: (table, index_name, is_unique, index_type, column)
+    - foreign key rows: (table, constraint_name, referenced_table, column, referenced_column)
+    - constraint rows: (table, constraint_name, constraint_type, column or "")
+    - table rows, one per table in any order:
+      (table, comment, engine, collation, estimated_rows, data_size, index_size)
+
+    Rows of tables that are not in ``schema`` are ignored.
+    """
+
+    def table(name):
+        columns = schema.get(name)
+        if columns is None:
+            return None
+        if not isinstance(columns, Table):
+            columns = schema[name] = Table(columns)
+        return columns
+
+    for (table_name, name, unique, index_type), columns in _group_names(index_rows, 4):
+        if (target := table(table_name)) is not None:
+            target.indexes.append(Index(name, [column for (column,) in columns], unique, index_type))
+    for (table_name, name, referenced_table), columns in _group_names(foreign_key_rows, 3):
+        if (target := table(table_name)) is not None:
+            target.foreign_keys.append(
+                ForeignKey(name, [column for column, _ in columns], referenced_table, [ref for _, ref in columns])
+            )
+    for (table_name, name, constraint_type), columns in _group_names(constraint_rows, 3):
+        if (target := table(table_name)) is not None:
+            target.constraints.append(Constraint(name, constraint_type, [column for (column,) in columns if column]))
+    for table_name, *info in table_rows:
+        if (target := table(table_name)) is not None:
+            target.info = TableInfo(*info)
+    return schema
+
+
+def fetch_rows(connection, query: str, params=()) -> list:
+    """Run one query on ``connection`` and return all its rows."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def fetch_all(pool, query: str, params=()) -> list:
+    """Run one query on a connection from ``pool`` and return all its rows."""
+    with pool.connection() as connection:
+        return fetch_rows(connection, query, params)
+
+
+def fetch_concurrently(pool, queries: dict) -> dict:
+    """
+    Run several catalog queries at the same time on connections from ``pool``
+    (a pool.ConnectionPool) and return {name: rows}. ``queries`` maps names to
+    (query, params); at most pool.max_size of them run at once.
+    """
+
+    def run(query, params):
+        rows = fetch_all(pool, query, params)
+        METRICS.count("rows_fetched", len(rows))
+        return rows
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(queries), pool.max_size))) as executor:
+        futures = {name: executor.submit(run, query, params) for name, (query, params) in queries.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _fetch_chunk(pool, names: list, make_query, retries: int, fetch) -> list:
+    # A failed chunk, typically one that hit the statement timeout, is retried
+    # as two halves so each attempt has less to scan.
+    try:
+        return fetch(pool, *make_query(names))
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        if retries <= 0:
+            raise
+        METRICS.count("chunk_retries")
+        print(f"Catalog scan of {names[0]} .. {names[-1]} failed ({error}), retrying")
+        time.sleep(CHUNK_RETRY_DELAY)
+    if len(names) == 1:
+        return _fetch_chunk(pool, names, make_query, retries - 1, fetch)
+    middle = len(names) // 2
+    return _fetch_chunk(pool, names[:middle], make_query, retries - 1, fetch) + _fetch_chunk(
+        pool, names[middle:], make_query, retries - 1, fetch
+    )
+
+
+def fetch_chunked(
+    pool, names: list, make_query, chunk_size: int, retries: int = CHUNK_RETRIES, fetch=fetch_all
+) -> list:
+    """
+    Split a catalog scan into chunks of ``chunk_size`` consecutive table names
+    and run them concurrently on connections from ``pool``. ``names`` must be
+    in the order of the scan's ORDER BY, as the catalog lists them, so the
+    chunk results concatenate into the rows of the single scan.
+    ``make_query(names)`` returns the (query, params) of a chunk and
+    ``fetch(pool, query, params)`` runs it (fetch_all(), or a variant setting
+    a statement timeout). A failing chunk is retried up to ``retries`` times.
+    """
+    chunks = [names[start : start + chunk_size] for start in range(0, len(names), chunk_size)]
+    rows = []
+    with ThreadPoolExecutor(max_workers=max(1, min(len(chunks), pool.max_size))) as executor:
+        futures = [executor.submit(_fetch_chunk, pool, chunk, make_query, retries, fetch) for chunk in chunks]
+        for future in futures:
+            chunk_rows = future.result()
+            METRICS.count("rows_fetched", len(chunk_rows))
+            rows.extend(chunk_rows)
+    METRICS.count("catalog_chunks", len(chunks))
+    return rows
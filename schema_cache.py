@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import re
+
+from schema import column_from_dict, column_to_dict
+
+# Beyond this many changed tables a full catalog scan is cheaper than a huge
+# IN (...) list (and MSSQL caps a statement at 2100 parameters).
+MAX_INCREMENTAL_TABLES = 1000
+
+
+def schema_fingerprint(fingerprints: dict) -> str:
+    """Hash the per-table fingerprints into a single whole-schema fingerprint."""
+    digest = hashlib.sha256()
+    for table in sorted(fingerprints):
+        digest.update(f"{table}\0{fingerprints[table]}\n".encode())
+    return digest.hexdigest()
+
+
+class SchemaCache:
+    """
+    Local on-disk cache of a database schema, keyed by host and database name.
+
+    Every table is stored together with the fingerprint the connector reported
+    for it (MySQL CREATE_TIME/UPDATE_TIME, MSSQL sys.objects.modify_date), so a
+    refresh only re-queries the columns of tables whose fingerprint moved.
+    """
+
+    def __init__(self, cache_dir: str, db_host: str, db_name: str):
+        self.cache_dir = cache_dir
+        self.db_host = db_host
+        self.db_name = db_name
+        file_name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{db_host}_{db_name}") + ".json"
+        self.path = os.path.join(cache_dir, file_name)
+
+    def load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {"fingerprint": None, "tables": {}}
+        with open(self.path, encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+
+    @staticmethod
+    def _columns(entry: dict) -> list:
+        return [column_from_dict(column) for column in entry["columns"]]
+
+    def save(self, fingerprints: dict, schema: dict):
+        cache = {
+            "db_host": self.db_host,
+            "db_name": self.db_name,
+            "fingerprint": schema_fingerprint(fingerprints),
+            "tables": {
+                table: {"fingerprint": fingerprints[table], "columns": [column_to_dict(column) for column in columns]}
+                for table, columns in schema.items()
+            },
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file first so an interrupted run never leaves a truncated cache.
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, connector):
+        """
+        Bring the cache up to date with the database behind ``connector`` and
+        return ``(schema, changed)``. ``changed`` is False when the whole-schema
+        fingerprint matches the cached one, in which case no column query is run.
+        """
+        fingerprints = connector.query_table_fingerprints()
+        cache = self.load()
+        cached_tables = cache["tables"]
+
+        if cache["fingerprint"] == schema_fingerprint(fingerprints):
+            return {table: self._columns(entry) for table, entry in cached_tables.items()}, False
+
+        stale = [
+            table
+            for table, fingerprint in fingerprints.items()
+            if table not in cached_tables or cached_tables[table]["fingerprint"] != fingerprint
+        ]
+        if not stale:
+            # Only dropped tables: nothing to query.
+            fresh = {}
+        elif len(stale) > MAX_INCREMENTAL_TABLES:
+            fresh = connector.get_schema()
+        else:
+            fresh = connector.get_schema(tables=stale)
+
+        stale = set(stale)
+        schema = {}
+        for table in fingerprints:
+            if table in fresh:
+                schema[table] = fresh[table]
+            elif table in cached_tables and table not in stale:
+                schema[table] = self._columns(cached_tables[table])
+        self.save({table: fingerprints[table] for table in schema}, schema)
+        return schema, True
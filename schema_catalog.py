@@ -0,0 +1,350 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import UTC, datetime
+
+from metrics import METRICS
+from schema import iter_schema_items, table_from_dict, table_to_dict
+from table_filter import TableFilter
+
+CATALOG_VERSION = 1
+
+# A run is one stored get_schema() result. Tables are stored once per distinct
+# content (table_versions, keyed by a hash of the name, columns and details), so
+# a run of an unchanged database, or of another tenant database with the same
+# tables, only adds its run_tables rows. The columns table and the full text
+# index cover every version once, whatever the number of runs referencing it.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    db_host TEXT NOT NULL,
+    db_name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    table_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_database ON runs (db_host, db_name, run_id);
+CREATE TABLE IF NOT EXISTS table_versions (
+    version_id INTEGER PRIMARY KEY,
+    signature TEXT NOT NULL UNIQUE,
+    table_name TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_tables (
+    run_id INTEGER NOT NULL REFERENCES runs,
+    position INTEGER NOT NULL,
+    version_id INTEGER NOT NULL REFERENCES table_versions,
+    PRIMARY KEY (run_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS run_tables_version ON run_tables (version_id);
+CREATE TABLE IF NOT EXISTS columns (
+    version_id INTEGER NOT NULL REFERENCES table_versions,
+    ordinal INTEGER NOT NULL,
+    column_name TEXT NOT NULL,
+    column_type TEXT NOT NULL,
+    column_comment TEXT NOT NULL,
+    PRIMARY KEY (version_id, ordinal)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS columns_name ON columns (column_name COLLATE NOCASE);
+"""
+# Table and column names and comments, one row per column plus one (ordinal 0,
+# no column name) per table for its comment. The default tokenizer splits
+# names on "_", so "ssn" finds customer_ssn and "customer_ssn" is a phrase.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+    table_name, column_name, comment, version_id UNINDEXED, ordinal UNINDEXED
+);
+"""
+LATEST_RUNS = "SELECT MAX(run_id) FROM runs GROUP BY db_host, db_name"
+
+
+def table_version(table_name: str, columns) -> tuple:
+    """(signature, JSON data) of one table; equal tables get equal signatures."""
+    data = json.dumps(table_to_dict(columns), ensure_ascii=False, sort_keys=True, default=str)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(table_name.encode())
+    digest.update(b"\x1e")
+    digest.update(data.encode())
+    return digest.hexdigest(), data
+
+
+def version_rows(table_name: str, columns) -> tuple:
+    """
+    What SchemaCatalog stores of one table: (signature, table_name, JSON
+    data, column rows, full text rows), the rows without their version id.
+    """
+    signature, data = table_version(table_name, columns)
+    column_rows = [
+        (column["ordinal"], column["column_name"], column["column_type"], column["column_comment"])
+        for column in columns
+    ]
+    info = getattr(columns, "info", None)
+    name_rows = [(table_name, "", info.comment if info is not None else "", 0)]
+    name_rows.extend((table_name, row[1], row[3], row[0]) for row in column_rows)
+    return signature, table_name, data, column_rows, name_rows
+
+
+class Match:
+    """One search hit: a column (or, with an empty column_name, a table) of a stored run."""
+
+    __slots__ = ("db_host", "db_name", "run_id", "table_name", "column_name", "comment")
+
+    def __init__(self, db_host, db_name, run_id, table_name, column_name, comment):
+        self.db_host = db_host
+        self.db_name = db_name
+        self.run_id = run_id
+        self.table_name = table_name
+        self.column_name = column_name
+        self.comment = comment
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"Match({self.db_host}/{self.db_name} run {self.run_id}: {self.table_name}.{self.column_name})"
+
+
+class SchemaCatalog:
+    """
+    Persistent SQLite catalog of exported schemas, for searching names and
+    comments across many databases and for rendering a dictionary again
+    without connecting to the database.
+
+    Each store() adds a run, numbered in storing order, for a host and
+    database. Runs and their tables are versioned but deduplicated, see
+    SCHEMA. The catalog may be shared by threads: every use of its
+    connection, read or write, is serialized, and no lock or transaction is
+    held while a caller iterates.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.last_run_id = None
+        with self._lock, self._connection:
+            # Check the version before touching the file: a newer catalog, or
+            # another application's database, is left as it is.
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == 0 and self._connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+                raise ValueError(f"{path} is not a schema catalog")
+            if version not in (0, CATALOG_VERSION):
+                raise ValueError(f"{path} is not a schema catalog (version {version})")
+            self._connection.executescript(SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+            try:
+                self._connection.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: search() falls back to LIKE on the columns table.
+                self.fts = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def _add_version(self, signature: str, table_name: str, data: str, columns: list, names: list) -> int:
+        # The arguments of a version_rows() result.
+        row = self._connection.execute("SELECT version_id FROM table_versions WHERE signature = ?", (signature,))
+        found = row.fetchone()
+        if found is not None:
+            return found[0]
+        METRICS.count("catalog_versions_added")
+        version_id = self._connection.execute(
+            "INSERT INTO table_versions (signature, table_name, data) VALUES (?, ?, ?)",
+            (signature, table_name, data),
+        ).lastrowid
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO columns VALUES (?, ?, ?, ?, ?)", [(version_id, *column) for column in columns]
+        )
+        if self.fts:
+            self._connection.executemany(
+                "INSERT INTO names (table_name, column_name, comment, version_id, ordinal) VALUES (?, ?, ?, ?, ?)",
+                [(name, column_name, comment, version_id, ordinal) for name, column_name, comment, ordinal in names],
+            )
+        return version_id
+
+    def _write_run(self, versions: list, db_host: str, db_name: str) -> int:
+        """Store the version_rows() of a schema's tables as a new run in one transaction; return its run id."""
+        with self._lock, self._connection:
+            created_at = datetime.now(UTC).isoformat(timespec="seconds")
+            run_id = self._connection.execute(
+                "INSERT INTO runs (db_host, db_name, created_at, table_count) VALUES (?, ?, ?, ?)",
+                (db_host, db_name, created_at, len(versions)),
+            ).lastrowid
+            for position, version in enumerate(versions):
+                version_id = self._add_version(*version)
+                self._connection.execute("INSERT INTO run_tables VALUES (?, ?, ?)", (run_id, position, version_id))
+            self.last_run_id = run_id
+        return run_id
+
+    def record(self, data, db_host: str, db_name: str):
+        """
+        Store a schema or schema stream as a new run while passing its
+        (table_name, columns) pairs on, so a streaming export is catalogued
+        as it is written. Each table is serialized as it passes; the run is
+        written in one short transaction once the stream is exhausted, and
+        not at all when the caller stops early.
+        """
+        versions = []
+        for table_name, columns in iter_schema_items(data):
+            versions.append(version_rows(table_name, columns))
+            yield table_name, columns
+        self._write_run(versions, db_host, db_name)
+
+    def store(self, data, db_host: str, db_name: str) -> int:
+        """Store a schema (as returned by get_schema()) as a new run and return its run id."""
+        versions = [version_rows(table_name, columns) for table_name, columns in iter_schema_items(data)]
+        return self._write_run(versions, db_host, db_name)
+
+    def _fetch(self, query: str, params=()) -> list:
+        with self._lock:
+            return self._connection.execute(query, params).fetchall()
+
+    def runs(self, db_name: str = None) -> list:
+        """(run_id, db_host, db_name, created_at, table_count) of every run, of ``db_name`` only when given."""
+        query = "SELECT run_id, db_host, db_name, created_at, table_count FROM runs"
+        params = ()
+        if db_name is not None:
+            query += " WHERE db_name = ?"
+            params = (db_name,)
+        return self._fetch(query + " ORDER BY db_host, db_name, run_id", params)
+
+    def latest_run(self, db_host: str, db_name: str):
+        """The id of the last run stored for a database, or None."""
+        return self._fetch("SELECT MAX(run_id) FROM runs WHERE db_host = ? AND db_name = ?", (db_host, db_name))[0][0]
+
+    def iter_schema(self, run_id: int):
+        """Yield the (table_name, columns) pairs of a run in their original order, decoded as they are taken."""
+        rows = self._fetch(
+            "SELECT v.table_name, v.data FROM run_tables t JOIN table_versions v ON v.version_id = t.version_id"
+            " WHERE t.run_id = ? ORDER BY t.position",
+            (run_id,),
+        )
+        for table_name, data in rows:
+            yield table_name, table_from_dict(json.loads(data))
+
+    def get_schema(self, run_id: int) -> dict:
+        return dict(self.iter_schema(run_id))
+
+    def table_signatures(self, run_id: int) -> dict:
+        """{table_name: signature} of a run, read without loading its tables."""
+        rows = self._fetch(
+            "SELECT v.table_name, v.signature FROM run_tables t JOIN table_versions v ON v.version_id = t.version_id"
+            " WHERE t.run_id = ? ORDER BY t.position",
+            (run_id,),
+        )
+        return dict(rows)
+
+    def search(self, query: str, all_runs: bool = False, db_name: str = None, like: bool = False) -> list:
+        """
+        Find tables and columns whose name or comment matches ``query``, an
+        FTS5 query: words match "_" separated name parts, "customer_ssn" is a
+        phrase, "ssn*" a prefix and "column_name: ssn" restricts the field.
+        With ``like``, or without FTS5, ``query`` is a substring of a column
+        name or comment instead. Only the latest run of each database is
+        searched unless ``all_runs``. An invalid FTS5 query raises
+        sqlite3.OperationalError.
+        """
+        fts = self.fts and not like
+        if fts:
+            source = "names f"
+            condition = "names MATCH ?"
+            fields = "f.table_name, f.column_name, f.comment"
+        else:
+            source = "columns f JOIN table_versions v ON v.version_id = f.version_id"
+            condition = "(f.column_name LIKE ? OR f.column_comment LIKE ?)"
+            fields = "v.table_name, f.column_name, f.column_comment"
+        params = [query] if fts else [f"%{query}%"] * 2
+        sql = (
+            f"SELECT r.db_host, r.db_name, r.run_id, {fields} FROM {source}"
+            " JOIN run_tables t ON t.version_id = f.version_id JOIN runs r ON r.run_id = t.run_id"
+            f" WHERE {condition}"
+        )
+        if not all_runs:
+            sql += f" AND r.run_id IN ({LATEST_RUNS})"
+        if db_name is not None:
+            sql += " AND r.db_name = ?"
+            params.append(db_name)
+        sql += " ORDER BY r.db_host, r.db_name, r.run_id, t.position, f.ordinal"
+        return [Match(*row) for row in self._fetch(sql, params)]
+
+
+class CatalogSource:
+    """
+    Schema source serving a run stored in a SchemaCatalog, so a dictionary
+    can be rendered again without touching the source database. It offers
+    the connectors' iter_schema()/get_schema(); ``run_id`` defaults to the
+    latest run of ``db_name`` (on ``db_host``, when given), which
+    query_table_fingerprints() looks up again, like a connector seeing the
+    current schema.
+    """
+
+    def __init__(
+        self, catalog_file: str, db_name: str, db_host: str = None, run_id: int = None, table_filter: TableFilter = None
+    ):
+        self.catalog = SchemaCatalog(catalog_file)
+        self.table_filter = table_filter or TableFilter()
+        self.db_name = db_name
+        self.db_host = db_host
+        self.follow_latest = run_id is None
+        if run_id is None:
+            run_id = self._latest_run()
+        if run_id is None:
+            self.catalog.close()
+            raise ValueError(f"no run of {db_name} in {catalog_file}")
+        self.run_id = run_id
+
+    def _latest_run(self):
+        runs = self.catalog.runs(self.db_name)
+        return max((run[0] for run in runs if self.db_host in (None, run[1])), default=None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.catalog.close()
+
+    def database_names(self) -> list:
+        """Names of the databases with a run in the catalog (on ``db_host``, when given)."""
+        return sorted({run[2] for run in self.catalog.runs() if self.db_host in (None, run[1])})
+
+    def _selected(self, table_name: str) -> bool:
+        schema_name, _, name = table_name.rpartition(".")
+        if schema_name in self.table_filter.exclude_schemas:
+            return False
+        return self.table_filter.matches(name)
+
+    def iter_schema(self):
+        for table_name, columns in self.catalog.iter_schema(self.run_id):
+            if self._selected(table_name):
+                yield table_name, columns
+
+    def query_table_fingerprints(self) -> dict:
+        """{table_name: fingerprint} of the selected tables: their version signatures in the catalog."""
+        if self.follow_latest:
+            self.run_id = self._latest_run()
+        signatures = self.catalog.table_signatures(self.run_id)
+        return {table_name: signature for table_name, signature in signatures.items() if self._selected(table_name)}
+
+    def get_schema(self, tables: list = None, details: bool = False) -> dict:
+        """
+        Return the stored {table_name: columns} of the run. Tables keep the
+        details they were stored with; ``details`` is accepted for
+        compatibility with the connectors and changes nothing.
+        """
+        del details
+        with METRICS.phase("query"):
+            return {
+                table_name: columns
+                for table_name, columns in self.iter_schema()
+                if tables is None or table_name in tables
+            }
@@ -0,0 +1,196 @@
+import bisect
+import hashlib
+import json
+import os
+from datetime import UTC, datetime
+
+from schema import COLUMN_FIELDS, column_from_dict, column_to_dict, iter_schema_items
+
+SNAPSHOT_VERSION = 1
+
+# Column attributes compared by the diff, with the change kind reported when
+# they differ. Type and length changes are both reported as "retyped".
+COMPARED_FIELDS = {
+    "column_type": "retyped",
+    "max_length": "retyped",
+    "is_nullable": "nullability",
+    "column_default": "default",
+    "column_comment": "comment",
+    "extra": "key",
+}
+
+
+def table_signature(columns) -> str:
+    """
+    Hash every attribute of every column of a table, so two versions of a
+    table can be compared with one string comparison.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for column in columns:
+        digest.update("\x1f".join(str(column[field]) for field in COLUMN_FIELDS).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class Snapshot:
+    """
+    A schema together with the per-table signatures of its tables. Snapshots
+    saved to disk carry their signatures, so unchanged tables are recognized
+    without looking at their columns.
+    """
+
+    def __init__(self, tables: dict, signatures: dict = None, info: dict = None):
+        self.tables = tables
+        self.signatures = signatures or {table: table_signature(columns) for table, columns in tables.items()}
+        self.info = info or {}
+
+    @classmethod
+    def from_schema(cls, data, **info):
+        return cls(dict(iter_schema_items(data)), info=info)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a schema snapshot (version {snapshot.get('version')!r})")
+        tables = {}
+        signatures = {}
+        for table, entry in snapshot["tables"].items():
+            tables[table] = [column_from_dict(column) for column in entry["columns"]]
+            signatures[table] = entry["signature"]
+        return cls(tables, signatures, snapshot.get("info"))
+
+    def save(self, path: str):
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "info": self.info,
+            "tables": {
+                table: {
+                    "signature": self.signatures[table],
+                    "columns": [column_to_dict(column) for column in columns],
+                }
+                for table, columns in self.tables.items()
+            },
+        }
+        # Write to a temporary file first so an interrupted run never leaves a truncated snapshot.
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+        os.replace(tmp_path, path)
+
+
+class Change:
+    """One difference between two schemas, as written to the changes workbook."""
+
+    __slots__ = ("table_name", "column_name", "kind", "field", "old", "new")
+
+    def __init__(self, table_name, column_name, kind, field="", old="", new=""):
+        self.table_name = table_name
+        self.column_name = column_name
+        self.kind = kind
+        self.field = field
+        self.old = old
+        self.new = new
+
+    def as_tuple(self) -> tuple:
+        return self.table_name, self.column_name, self.kind, self.field, self.old, self.new
+
+    def __eq__(self, other):
+        if isinstance(other, Change):
+            return self.as_tuple() == other.as_tuple()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Change{self.as_tuple()!r}"
+
+
+def moved_columns(old_names: list, new_names: list) -> set:
+    """
+    The fewest of the columns in both ``old_names`` and ``new_names`` whose
+    moves explain the new column order: all but a longest run of columns
+    that kept their relative order. Columns only shifted by added or dropped
+    columns are not moved.
+    """
+    in_new = set(new_names)
+    old_rank = {name: rank for rank, name in enumerate(name for name in old_names if name in in_new)}
+    shared = [name for name in new_names if name in old_rank]
+    # Longest increasing subsequence of the old ranks, in the new order.
+    tails = []
+    tail_ranks = []
+    previous = [None] * len(shared)
+    for index, name in enumerate(shared):
+        length = bisect.bisect_left(tail_ranks, old_rank[name])
+        previous[index] = tails[length - 1] if length else None
+        if length == len(tails):
+            tails.append(index)
+            tail_ranks.append(old_rank[name])
+        else:
+            tails[length] = index
+            tail_ranks[length] = old_rank[name]
+    kept = set()
+    index = tails[-1] if tails else None
+    while index is not None:
+        kept.add(shared[index])
+        index = previous[index]
+    return set(shared) - kept
+
+
+def diff_columns(table_name: str, old_columns, new_columns) -> list:
+    """
+    Column level changes of one table, in the column order of the new
+    version. A reordered column is reported as "moved" with its old and new
+    ordinal, see moved_columns(); when nothing else differs, every column
+    whose ordinal changed is.
+    """
+    old_by_name = {column["column_name"]: column for column in old_columns}
+    moved = moved_columns(list(old_by_name), [column["column_name"] for column in new_columns])
+    new_names = set()
+    changes = []
+    for column in new_columns:
+        name = column["column_name"]
+        new_names.add(name)
+        old = old_by_name.get(name)
+        if old is None:
+            changes.append(Change(table_name, name, "column added", new=column["column_type"]))
+            continue
+        if name in moved:
+            changes.append(Change(table_name, name, "moved", "ordinal", old["ordinal"], column["ordinal"]))
+        for field, kind in COMPARED_FIELDS.items():
+            if old[field] != column[field]:
+                changes.append(Change(table_name, name, kind, field, old[field], column[field]))
+    for name, column in old_by_name.items():
+        if name not in new_names:
+            changes.append(Change(table_name, name, "column dropped", old=column["column_type"]))
+    if not changes:
+        # Same columns in the same order, numbered differently (e.g. gaps left by dropped columns).
+        for column in new_columns:
+            old = old_by_name[column["column_name"]]
+            if old["ordinal"] != column["ordinal"]:
+                changes.append(
+                    Change(table_name, column["column_name"], "moved", "ordinal", old["ordinal"], column["ordinal"])
+                )
+    return changes
+
+
+def diff_schemas(old: Snapshot, new: Snapshot) -> list:
+    """
+    Compare two snapshots and return the list of changes. Tables whose
+    signatures match are skipped without touching their columns, so the cost
+    is one dict lookup per table plus the work on the tables that changed.
+    """
+    changes = []
+    old_signatures = old.signatures
+    for table, signature in new.signatures.items():
+        old_signature = old_signatures.get(table)
+        if old_signature is None:
+            changes.append(Change(table, "", "table added", new=f"{len(new.tables[table])} columns"))
+        elif old_signature != signature:
+            changes.extend(diff_columns(table, old.tables[table], new.tables[table]))
+    for table in old_signatures:
+        if table not in new.signatures:
+            changes.append(Change(table, "", "table dropped", old=f"{len(old.tables[table])} columns"))
+    return changes
@@ -0,0 +1,51 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+from schema_catalog import SchemaCatalog
+
+CATALOG_FILE = "schema_catalog.db"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Search table and column names and comments in a schema catalog.")
+    parser.add_argument("query", nargs="?", help="FTS5 query, e.g. customer_ssn, ssn*, 'column_name: ssn'")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help=f"catalog file (default: {CATALOG_FILE})")
+    parser.add_argument("--database", help="only search this database")
+    parser.add_argument("--all-runs", action="store_true", help="search every stored run, not only the latest ones")
+    parser.add_argument("--runs", action="store_true", help="list the stored runs")
+    args = parser.parse_args(argv)
+    if args.query is None and not args.runs:
+        parser.error("nothing to do: give a query, or --runs")
+    # SchemaCatalog would create an empty catalog in its place.
+    if not os.path.exists(args.catalog):
+        parser.error(f"no schema catalog at {args.catalog}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with SchemaCatalog(args.catalog) as catalog:
+        if args.runs:
+            for run_id, db_host, db_name, created_at, table_count in catalog.runs(args.database):
+                print(f"{run_id:>6}  {created_at}  {db_host}/{db_name}  {table_count} tables")
+        if args.query is None:
+            return
+        try:
+            matches = catalog.search(args.query, all_runs=args.all_runs, db_name=args.database)
+        except sqlite3.OperationalError as error:
+            # Not valid FTS5 syntax, e.g. "order-items" or an unbalanced quote: search for the text as typed.
+            print(f"Not a full text query ({error}), searching column names and comments for it", file=sys.stderr)
+            matches = catalog.search(args.query, all_runs=args.all_runs, db_name=args.database, like=True)
+    for match in matches:
+        name = f"{match.table_name}.{match.column_name}" if match.column_name else match.table_name
+        run = f" (run {match.run_id})" if args.all_runs else ""
+        comment = f"  -- {match.comment}" if match.comment else ""
+        print(f"{match.db_host}/{match.db_name}{run}  {name}{comment}")
+    databases = {(match.db_host, match.db_name) for match in matches}
+    print(f"{len(matches)} matches in {len(databases)} databases")
+
+
+if __name__ == "__main__":
+    main()
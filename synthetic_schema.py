@@ -0,0 +1,96 @@
+import random
+
+from schema import build_schema
+
+COLUMN_TYPES = (
+    ("int", ""),
+    ("bigint", ""),
+    ("varchar", 255),
+    ("varchar", 64),
+    ("datetime", ""),
+    ("decimal", ""),
+    ("text", 65535),
+    ("tinyint", ""),
+)
+
+ASCII_WORDS = ("customer", "order", "amount", "status", "created", "updated", "reference", "total", "code", "flag")
+# Accented Latin, Cyrillic and CJK words, so width and encoding code paths see non-ASCII text.
+UNICODE_WORDS = ("número", "größe", "adresse_é", "описание", "клиент", "顧客番号", "注文日", "金額", "상태")
+
+
+class SyntheticSchema:
+    """
+    Deterministic generator of catalog rows shaped like the connectors' query
+    results, for benchmarks and scaling tests without a database.
+
+    The same parameters and seed always produce the same rows. Tables are
+    named "<prefix>_<n>" and spread over ``prefixes`` prefixes, rows come out
+    ordered by table name and ordinal like the real catalog queries, and
+    ``unicode_ratio`` of the comments mix in non-ASCII words.
+    """
+
+    def __init__(
+        self,
+        tables: int = 1000,
+        columns_per_table: int = 10,
+        prefixes: int = 20,
+        comment_length: int = 40,
+        unicode_ratio: float = 0.1,
+        seed: int = 0,
+    ):
+        self.tables = tables
+        self.columns_per_table = columns_per_table
+        self.prefixes = max(1, min(prefixes, tables))
+        self.comment_length = comment_length
+        self.unicode_ratio = unicode_ratio
+        self.seed = seed
+
+    @property
+    def columns(self) -> int:
+        return self.tables * self.columns_per_table
+
+    def table_names(self) -> list:
+        # Zero padded so that the names sort in generation order.
+        width = len(str(self.tables))
+        names = [f"app{index % self.prefixes:04d}_t{index:0{width}d}" for index in range(self.tables)]
+        return sorted(names)
+
+    def _comment(self, rng: random.Random) -> str:
+        if not self.comment_length:
+            return ""
+        words = UNICODE_WORDS if rng.random() < self.unicode_ratio else ASCII_WORDS
+        comment = []
+        length = 0
+        while length < self.comment_length:
+            word = rng.choice(words)
+            comment.append(word)
+            length += len(word) + 1
+        return " ".join(comment)[: self.comment_length]
+
+    def iter_rows(self):
+        """Yield (table_name, ordinal, name, type, length, nullable, extra, comment, default) rows."""
+        rng = random.Random(self.seed)  # noqa: S311 - reproducible test data, not security related
+        for table_name in self.table_names():
+            for ordinal in range(1, self.columns_per_table + 1):
+                column_type, max_length = COLUMN_TYPES[rng.randrange(len(COLUMN_TYPES))]
+                if ordinal == 1:
+                    yield table_name, ordinal, "id", "bigint", "", "NO", "PRI", "Primary key", None
+                    continue
+                yield (
+                    table_name,
+                    ordinal,
+                    f"{rng.choice(ASCII_WORDS)}_{ordinal}",
+                    column_type,
+                    max_length,
+                    "YES" if rng.random() < 0.6 else "NO",
+                    "MUL" if rng.random() < 0.05 else "",
+                    self._comment(rng),
+                    "0" if column_type == "tinyint" else None,
+                )
+
+    def rows(self) -> list:
+        return list(self.iter_rows())
+
+    def schema(self) -> dict:
+        """The rows built into a {table_name: [Column, ...]} dict, as get_schema() returns it."""
+        return build_schema(self.iter_rows())
@@ -0,0 +1,130 @@
+import re
+
+# LIKE escape character of the generated clauses. "!" needs no escaping in
+# either MySQL or T-SQL string literals, unlike the backslash.
+LIKE_ESCAPE = "!"
+
+
+class TablePattern:
+    """
+    One include/exclude pattern for table names:
+
+    - ``re:<regex>``: a regular expression, searched in the table name
+    - ``like:<pattern>``: a SQL LIKE pattern (``%``, ``_``, ``!`` escapes)
+    - anything else: a glob where ``*`` matches any run of characters and
+      ``?`` one character; ``billing_*`` is the prefix ``billing_``
+
+    Globs and LIKE patterns become LIKE clauses on every backend. Regular
+    expressions become REGEXP clauses where the database supports them and
+    are otherwise matched client side; both ways they ignore case, so a
+    pattern selects the same tables whatever the backend.
+    """
+
+    __slots__ = ("text", "kind", "like", "regex")
+
+    def __init__(self, text: str):
+        self.text = text
+        if text.startswith("re:"):
+            self.kind = "regex"
+            self.like = None
+            self.regex = re.compile(text[3:], re.IGNORECASE)
+        elif text.startswith("like:"):
+            self.kind = "like"
+            self.like = text[5:]
+            self.regex = re.compile(_like_to_regex(self.like), re.IGNORECASE)
+        else:
+            self.kind = "glob"
+            self.like = _glob_to_like(text)
+            self.regex = re.compile(_like_to_regex(self.like), re.IGNORECASE)
+
+    def matches(self, name: str) -> bool:
+        return self.regex.search(name) is not None
+
+    def __repr__(self):
+        return f"TablePattern({self.text!r})"
+
+
+def _glob_to_like(glob: str) -> str:
+    like = []
+    for char in glob:
+        if char == "*":
+            like.append("%")
+        elif char == "?":
+            like.append("_")
+        elif char in f"%_{LIKE_ESCAPE}":
+            like.append(LIKE_ESCAPE + char)
+        else:
+            like.append(char)
+    return "".join(like)
+
+
+def _like_to_regex(like: str) -> str:
+    # Anchored Python equivalent of a LIKE pattern, for client-side matching.
+    regex = []
+    chars = iter(like)
+    for char in chars:
+        if char == LIKE_ESCAPE:
+            regex.append(re.escape(next(chars, LIKE_ESCAPE)))
+        elif char == "%":
+            regex.append(".*")
+        elif char == "_":
+            regex.append(".")
+        else:
+            regex.append(re.escape(char))
+    return "^" + "".join(regex) + "$"
+
+
+class TableFilter:
+    """
+    Include/exclude table patterns (see TablePattern) and excluded schemas,
+    translated into parameterized WHERE clauses by the connectors so the
+    database only returns the tables that will be exported. A table is kept
+    when it matches any include pattern (or there are none) and no exclude
+    pattern. Patterns match the table name without its schema.
+    """
+
+    def __init__(self, include=(), exclude=(), exclude_schemas=()):
+        self.include = [TablePattern(pattern) for pattern in include]
+        self.exclude = [TablePattern(pattern) for pattern in exclude]
+        self.exclude_schemas = list(exclude_schemas)
+
+    def __bool__(self):
+        return bool(self.include or self.exclude or self.exclude_schemas)
+
+    def matches(self, name: str) -> bool:
+        if self.include and not any(pattern.matches(name) for pattern in self.include):
+            return False
+        return not any(pattern.matches(name) for pattern in self.exclude)
+
+    def client_side(self, regexp: bool) -> bool:
+        """Whether some pattern cannot be expressed in SQL and matches() has to run on the results."""
+        return not regexp and any(pattern.kind == "regex" for pattern in self.include + self.exclude)
+
+    def where(self, column: str, placeholder: str, regexp: bool = False, regexp_prefix: str = "") -> tuple:
+        """
+        Return (" AND ..." clause on ``column``, params) for the patterns that
+        SQL can express. ``placeholder`` is the driver's parameter marker,
+        ``regexp`` tells whether the database has a REGEXP operator and
+        ``regexp_prefix`` is put before each regular expression (such as the
+        inline flag that makes it ignore case). An include list with a pattern
+        SQL cannot express is left to matches() entirely.
+        """
+        clauses = []
+        params = []
+
+        def condition(pattern, negate):
+            if pattern.kind == "regex":
+                operator = "NOT REGEXP" if negate else "REGEXP"
+                params.append(regexp_prefix + pattern.regex.pattern)
+                return f"{column} {operator} {placeholder}"
+            operator = "NOT LIKE" if negate else "LIKE"
+            params.append(pattern.like)
+            return f"{column} {operator} {placeholder} ESCAPE '{LIKE_ESCAPE}'"
+
+        def expressible(pattern):
+            return regexp or pattern.kind != "regex"
+
+        if self.include and all(expressible(pattern) for pattern in self.include):
+            clauses.append("(" + " OR ".join(condition(pattern, False) for pattern in self.include) + ")")
+        clauses.extend(condition(pattern, True) for pattern in self.exclude if expressible(pattern))
+        return "".join(f" AND {clause}" for clause in clauses), tuple(params)
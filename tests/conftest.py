@@ -65,8 +65,8 @@ def mysql_raw_rows():
 @pytest.fixture
 def mssql_raw_rows():
     """Simulated return value from MSSQLConnector.query_schema().
-    Same 9-tuple structure, but column_comment may be None."""
+    Same 9-tuple structure, but tables are schema-qualified and column_comment may be None."""
     return [
-        ("users", 1, "id", "int", None, "NO", "PRIMARY KEY", "Primary key", None),
-        ("users", 2, "name", "nvarchar", 100, "YES", "", None, None),
+        ("dbo.users", 1, "id", "int", None, "NO", "PRIMARY KEY", "Primary key", None),
+        ("dbo.users", 2, "name", "nvarchar", 100, "YES", "", None, None),
     ]
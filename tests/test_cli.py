@@ -0,0 +1,209 @@
+import os
+import subprocess
+import sys
+from unittest.mock import ANY, MagicMock
+
+import openpyxl
+import pytest
+
+import cli
+from cli import BACKENDS, Backend, main
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "configs.py"
+    path.write_text(
+        "mysql_config = {'db_host': 'db', 'db_user': 'user', 'db_password': 'secret', 'db_name': 'shop'}\n"
+        "mssql_config = {'db_host': 'sql', 'db_port': 1433, 'db_user': 'sa', 'db_password': 'pw', 'db_name': 'erp'}\n"
+        "export_config = {'output_format': 'csv'}\n"
+    )
+    return str(path)
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, single_table_schema):
+    connector_class = MagicMock()
+    connector_class.return_value.get_schema.return_value = single_table_schema
+    connector_class.return_value.__enter__.return_value = connector_class.return_value
+    backend = Backend("unused", "Unused", "mysql_config", BACKENDS["mysql"].options, "prefix")
+    monkeypatch.setattr(backend, "load", lambda: connector_class)
+    monkeypatch.setitem(BACKENDS, "mysql", backend)
+    return connector_class
+
+
+class TestResolve:
+    def test_command_line_overrides_config(self, config_file):
+        args = cli.build_parser().parse_args(["--config", config_file, "--host", "replica", "--format", "md"])
+        connection, options = cli.resolve(args, cli.load_config(config_file))
+        assert connection == {"db_host": "replica", "db_user": "user", "db_password": "secret", "db_name": "shop"}
+        assert options["output_format"] == "md"
+        assert options["output"] == "data_dictionary.md"
+
+    def test_backend_specific_options(self, config_file):
+        args = cli.build_parser().parse_args(["--config", config_file, "--backend", "mssql", "--schema", "sales"])
+        connection, _ = cli.resolve(args, cli.load_config(config_file))
+        assert connection["db_port"] == 1433
+        assert connection["schemas"] == ["sales"]
+
+    def test_chunked_scan_options(self, config_file):
+        args = cli.build_parser().parse_args(
+            ["--config", config_file, "--chunk-tables", "500", "--chunk-timeout", "60"]
+        )
+        connection, _ = cli.resolve(args, cli.load_config(config_file))
+        assert (connection["chunk_tables"], connection["chunk_timeout"]) == (500, 60.0)
+        assert "chunk_retries" not in connection
+
+    def test_password_from_environment(self, config_file, monkeypatch):
+        monkeypatch.setenv(cli.PASSWORD_ENV, "from-env")
+        args = cli.build_parser().parse_args(["--config", config_file])
+        connection, _ = cli.resolve(args, cli.load_config(config_file))
+        assert connection["db_password"] == "from-env"
+
+
+class TestMain:
+    def test_dry_run(self, config_file, capsys):
+        assert main(["--config", config_file, "--dry-run"]) == 0
+        out = capsys.readouterr().out
+        assert "mysql database shop on db" in out
+        assert "data_dictionary.csv (csv)" in out
+
+    def test_missing_settings(self, tmp_path):
+        with pytest.raises(SystemExit):
+            main(["--config", str(tmp_path / "missing.py"), "--host", "db"])
+
+    def test_exports_with_selected_backend(self, config_file, fake_backend, tmp_path):
+        output = str(tmp_path / "dictionary.xlsx")
+        assert main(["--config", config_file, "--format", "xlsx", "--output", output]) == 0
+        fake_backend.assert_called_once_with(
+            db_host="db", db_user="user", db_password="secret", db_name="shop", table_filter=ANY
+        )
+        assert fake_backend.return_value.__exit__.called
+        workbook = openpyxl.load_workbook(output)
+        assert workbook.sheetnames == ["users"]
+        workbook.close()
+
+    def test_workbook_rows(self, config_file, fake_backend, tmp_path):
+        fake_backend.return_value.get_schema.return_value = {"users": [], "users_roles": []}
+        output = tmp_path / "dictionary.xlsx"
+        main(["--config", config_file, "--format", "xlsx", "--output", str(output), "--workbook-rows", "5"])
+        assert output.exists()
+        assert (tmp_path / "dictionary_2.xlsx").exists()
+
+    def test_group_by(self, config_file, fake_backend, tmp_path):
+        fake_backend.return_value.get_schema.return_value = {"crm_sales_a": [], "crm_sales_b": [], "crm_hr_a": []}
+        output = str(tmp_path / "dictionary.xlsx")
+        main(["--config", config_file, "--format", "xlsx", "--output", output, "--group-by", "re:^([a-z]+_[a-z]+)_"])
+        workbook = openpyxl.load_workbook(output)
+        assert workbook.sheetnames == ["crm_sales", "crm_hr"]
+        workbook.close()
+
+    def test_unknown_group_by(self, config_file):
+        with pytest.raises(SystemExit):
+            main(["--config", config_file, "--group-by", "suffix", "--dry-run"])
+
+    def test_text_format(self, config_file, fake_backend, tmp_path):
+        output = tmp_path / "dictionary.csv"
+        main(["--config", config_file, "--output", str(output)])
+        assert fake_backend.return_value.get_schema.called
+        assert output.read_text(encoding="utf-8").startswith("TABLE_NAME,")
+
+    def test_parallel_sheets(self, config_file, fake_backend, tmp_path):
+        output = tmp_path / "dictionary.xlsx"
+        main(["--config", config_file, "--format", "xlsx", "--output", str(output), "--parallel-sheets"])
+        assert fake_backend.return_value.get_schema.called
+        workbook = openpyxl.load_workbook(output)
+        assert workbook["users"]["B3"].value == "COLUMN_NAME"
+        workbook.close()
+
+    def test_data_profile(self, config_file, fake_backend, tmp_path):
+        fake_backend.return_value.sample_table.return_value = ([(1, "a@b.c")], 1)
+        output = tmp_path / "dictionary.xlsx"
+        store = tmp_path / "profiles.json"
+        arguments = ["--config", config_file, "--format", "xlsx", "--output", str(output)]
+        main([*arguments, "--data-profile", "--data-profile-file", str(store), "--data-profile-rows", "50"])
+        table_name, _, limit, _ = fake_backend.return_value.sample_table.call_args[0]
+        assert (table_name, limit) == ("users", 50)
+        assert store.exists()
+        workbook = openpyxl.load_workbook(output)
+        assert workbook["users"]["H3"].value == "NULL_RATIO"
+        workbook.close()
+        for rejected in (["--streaming"], ["--serve", "8080"]):
+            with pytest.raises(SystemExit):
+                main([*arguments, "--data-profile", *rejected])
+
+    def test_table_filter(self, config_file, fake_backend, tmp_path):
+        output = str(tmp_path / "dictionary.csv")
+        main(
+            [
+                "--config",
+                config_file,
+                "--include",
+                "billing_*",
+                "--include",
+                "crm_*",
+                "--exclude",
+                "re:_tmp$",
+                "--output",
+                output,
+            ]
+        )
+        table_filter = fake_backend.call_args.kwargs["table_filter"]
+        assert [pattern.like for pattern in table_filter.include] == ["billing!_%", "crm!_%"]
+        assert table_filter.matches("billing_invoices")
+        assert not table_filter.matches("billing_invoices_tmp")
+
+    def test_details(self, config_file, fake_backend, tmp_path):
+        main(["--config", config_file, "--details", "--output", str(tmp_path / "dictionary.csv")])
+        fake_backend.return_value.get_schema.assert_called_once_with(details=True)
+
+    def test_ddl_dump(self, config_file, tmp_path, capsys):
+        dump = tmp_path / "shop.sql"
+        dump.write_text("CREATE TABLE `users` (\n  `id` int NOT NULL,\n  PRIMARY KEY (`id`)\n);\n")
+        output = tmp_path / "dictionary.csv"
+        assert main(["--config", config_file, "--backend", "ddl", "--dump-file", str(dump), "--dry-run"]) == 0
+        assert f"Would export ddl dump {dump}" in capsys.readouterr().out
+        main(["--config", config_file, "--backend", "ddl", "--dump-file", str(dump), "--output", str(output)])
+        assert output.read_text(encoding="utf-8").splitlines()[1].startswith("users,")
+        with pytest.raises(SystemExit):
+            main(["--config", config_file, "--backend", "ddl", "--dump-file", str(dump), "--cache-dir", "cache"])
+
+    def test_catalog(self, config_file, fake_backend, tmp_path):
+        catalog = str(tmp_path / "catalog.db")
+        main(["--config", config_file, "--catalog", catalog, "--output", str(tmp_path / "live.csv")])
+        fake_backend.reset_mock()
+        output = tmp_path / "offline.csv"
+        main(
+            ["--config", config_file, "--backend", "catalog", "--catalog", catalog, "--database", "shop"]
+            + ["--output", str(output)]
+        )
+        assert not fake_backend.called
+        assert output.read_text(encoding="utf-8") == (tmp_path / "live.csv").read_text(encoding="utf-8")
+
+    def test_serve(self, config_file, fake_backend, monkeypatch):
+        served = []
+        monkeypatch.setattr("dictionary_server.serve", lambda service, host, port: served.append((service, host, port)))
+        fake_backend.return_value.query_table_fingerprints.return_value = {"users": "1"}
+        assert main(["--config", config_file, "--serve", "8080", "--serve-database", "crm"]) == 0
+        service, host, port = served[0]
+        assert (host, port) == ("127.0.0.1", 8080)
+        assert not service.serves("shop")
+        _, body, status = service.get("crm", "csv")
+        assert status == "miss"
+        assert body.startswith(b"TABLE_NAME,COLUMN_ID")
+        assert fake_backend.call_args.kwargs["db_name"] == "crm"
+        with pytest.raises(SystemExit):
+            main(["--config", config_file, "--serve", "localhost:http"])
+
+    def test_dry_run_imports_no_driver_or_xlsxwriter(self, config_file):
+        script = (
+            "import sys\n"
+            "from cli import main\n"
+            f"main(['--config', {config_file!r}, '--dry-run'])\n"
+            "print(sorted({'MySQLdb', 'pyodbc', 'xlsxwriter'} & set(sys.modules)))\n"
+        )
+        repo = os.path.dirname(cli.__file__)
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=repo
+        )
+        assert result.stdout.strip().endswith("[]")
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from data_profile import DataProfiler, estimate_distinct, profile_values, sampled_columns
+from schema import Column, Table, table_from_dict, table_to_dict
+
+
+class StandIn:
+    """Connector stand-in answering sample_table() from in-memory rows, failing on some tables."""
+
+    def __init__(self, tables: dict, failing=()):
+        self.tables = tables
+        self.failing = set(failing)
+        self.sampled = []
+
+    def sample_table(self, table_name, columns, limit, timeout=None):
+        self.sampled.append((table_name, [column.column_name for column in columns], limit, timeout))
+        if table_name in self.failing:
+            raise TimeoutError("statement timeout")
+        rows, total_rows = self.tables[table_name]
+        return rows[:limit], total_rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def schema():
+    return {
+        "users": [Column(1, "id", "int"), Column(2, "bio", "text", 65535), Column(3, "email", "varchar", 255)],
+        "orders": [Column(1, "id", "bigint"), Column(2, "notes", "nvarchar", -1)],
+    }
+
+
+class TestProfileValues:
+    def test_whole_table(self):
+        profile = profile_values([3, None, 1, 3, None, 2], total_rows=6)
+        assert (profile.sampled_rows, profile.null_ratio, profile.distinct) == (6, 2 / 6, 3)
+        assert (profile.min_value, profile.max_value, profile.examples) == ("1", "3", ["3", "1", "2"])
+
+    def test_distinct_is_estimated_from_a_sample(self):
+        assert estimate_distinct({"a": 5, "b": 1, "c": 1}, 7, 700) == 21
+        assert estimate_distinct({"a": 1}, 1, 4) == 2
+        assert profile_values(list(range(100)), total_rows=10000).distinct == 1000
+
+    def test_display_values(self):
+        assert profile_values([b"\x01\xff"]).examples == ["0x01FF"]
+        assert profile_values(["x" * 50]).min_value == "x" * 39 + "…"
+        assert profile_values([None, None]).distinct == 0
+        assert profile_values([]).null_ratio == 0.0
+
+
+class TestDataProfiler:
+    def test_skips_large_object_columns(self, schema):
+        assert [column.column_name for column in sampled_columns(schema["users"])] == ["id", "email"]
+        assert [column.column_name for column in sampled_columns(schema["orders"])] == ["id"]
+        assert len(sampled_columns([Column(1, "unknown", "")])) == 1
+
+    def test_profiles_attach_to_tables(self, schema):
+        connector = StandIn({"users": ([(1, "a@b.c"), (2, None)], 2), "orders": ([(7,)], 1)})
+        profiled = DataProfiler(connector, sample_rows=50, table_timeout=3).profile_schema(schema)
+        assert list(profiled) == ["users", "orders"]
+        assert isinstance(schema["users"], Table)
+        assert schema["users"].profiles["email"].null_ratio == 0.5
+        assert "bio" not in schema["users"].profiles
+        assert connector.sampled[0] == ("users", ["id", "email"], 50, 3)
+
+    def test_budget_and_resume(self, schema, tmp_path, capsys):
+        store = str(tmp_path / "profiles.json")
+        tables = {"users": ([(1, "a@b.c")], 1), "orders": ([(7,)], 1)}
+        assert DataProfiler(StandIn(tables), budget=0, store_path=store).profile_schema(schema) == {}
+        assert "Profiled 0 tables, reused 0, 2 left for the next run" in capsys.readouterr().out
+
+        DataProfiler(StandIn(tables, failing=["orders"]), store_path=store).profile_schema(schema)
+        with open(store, encoding="utf-8") as store_file:
+            assert list(json.load(store_file)["tables"]) == ["users"]
+
+        connector = StandIn(tables)
+        assert list(DataProfiler(connector, store_path=store).profile_schema(schema)) == ["orders"]
+        assert [table for table, *_ in connector.sampled] == ["orders"]
+        assert schema["users"].profiles["id"].distinct == 1
+        assert "Profiled 1 tables, reused 1" in capsys.readouterr().out
+
+    def test_profiles_round_trip(self, schema):
+        DataProfiler(StandIn({"users": ([(1, "a@b.c")], 1), "orders": ([], 0)})).profile_schema(schema)
+        copy = table_from_dict(table_to_dict(schema["users"]))
+        assert copy.profiles == schema["users"].profiles
+        assert "profiles" not in table_to_dict(Table([Column(1, "id", "int")]))
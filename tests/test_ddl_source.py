@@ -0,0 +1,222 @@
+import gzip
+
+import pytest
+
+from ddl_source import DdlSchemaSource, detect_dialect, iter_statements, parse_statement
+from table_filter import TableFilter
+
+MYSQL_DUMP = """\
+-- MySQL dump 10.13  Distrib 8.0.36
+/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;
+DROP TABLE IF EXISTS `users`;
+/*!40101 SET character_set_client = utf8mb4 */;
+CREATE TABLE `users` (
+  `id` int unsigned NOT NULL AUTO_INCREMENT,
+  `email` varchar(255) NOT NULL COMMENT 'Login; unique',
+  `bio` text,
+  `status` enum('active','disabled') DEFAULT 'active',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_email` (`email`),
+  KEY `idx_status` (`status`) USING BTREE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Site users';
+INSERT INTO `users` VALUES (1,'a@b.c','x; y \\' ;\nCREATE TABLE `fake` (`a` int);','active',NULL);
+CREATE TABLE `orders` (
+  `id` bigint NOT NULL,
+  `user_id` int unsigned DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `fk_user` (`user_id`),
+  CONSTRAINT `fk_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`)
+) ENGINE=InnoDB;
+DELIMITER ;;
+CREATE TRIGGER `orders_bi` BEFORE INSERT ON `orders` FOR EACH ROW BEGIN SET NEW.id = 1; END ;;
+DELIMITER ;
+CREATE TABLE `app_logs` (`line` text);
+"""
+
+MSSQL_DUMP = """\
+USE [erp]
+GO
+/****** Object:  Table [dbo].[Customers] ******/
+SET ANSI_NULLS ON
+GO
+CREATE TABLE [dbo].[Customers](
+\t[CustomerID] [int] IDENTITY(1,1) NOT NULL,
+\t[Name] [nvarchar](100) NOT NULL,
+\t[Notes] [nvarchar](max) NULL,
+\t[Active] [bit] NOT NULL,
+ CONSTRAINT [PK_Customers] PRIMARY KEY CLUSTERED
+(
+\t[CustomerID] ASC
+)WITH (PAD_INDEX = OFF) ON [PRIMARY]
+) ON [PRIMARY] TEXTIMAGE_ON [PRIMARY]
+GO
+CREATE TABLE [sales].[Orders](
+\t[OrderID] [int] NOT NULL,
+\t[CustomerID] [int] NULL
+) ON [PRIMARY]
+GO
+CREATE NONCLUSTERED INDEX [IX_Orders_Customer] ON [sales].[Orders]
+(
+\t[CustomerID] ASC
+)
+GO
+ALTER TABLE [dbo].[Customers] ADD  CONSTRAINT [DF_Customers_Active]  DEFAULT ((1)) FOR [Active]
+GO
+ALTER TABLE [sales].[Orders]  WITH CHECK ADD  CONSTRAINT [FK_Orders_Customers] FOREIGN KEY([CustomerID])
+REFERENCES [dbo].[Customers] ([CustomerID])
+GO
+EXEC sys.sp_addextendedproperty @name=N'MS_Description', @value=N'Customer''s name' , @level0type=N'SCHEMA',\
+@level0name=N'dbo', @level1type=N'TABLE',@level1name=N'Customers', @level2type=N'COLUMN',@level2name=N'Name'
+GO
+EXEC sys.sp_addextendedproperty @name=N'MS_Description', @value=N'All customers' , @level0type=N'SCHEMA',\
+@level0name=N'dbo', @level1type=N'TABLE',@level1name=N'Customers'
+GO
+"""
+
+
+@pytest.fixture
+def mysql_dump(tmp_path):
+    path = tmp_path / "shop.sql"
+    path.write_text(MYSQL_DUMP, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def mssql_dump(tmp_path):
+    # SSMS scripts are UTF-16 with a byte order mark by default.
+    path = tmp_path / "erp.sql"
+    path.write_text(MSSQL_DUMP, encoding="utf-16")
+    return str(path)
+
+
+def column_values(columns, *fields):
+    return [tuple(getattr(column, field) for field in fields) for column in columns]
+
+
+class TestStatements:
+    def test_keeps_only_table_statements(self):
+        statements = list(iter_statements(MYSQL_DUMP.splitlines(keepends=True)))
+        assert [statement.split("(")[0].strip() for statement in statements] == [
+            "CREATE TABLE `users`",
+            "CREATE TABLE `orders`",
+            "CREATE TABLE `app_logs`",
+        ]
+
+    def test_go_and_next_statement_end_tsql_statements(self):
+        lines = ["CREATE TABLE a (x int)\n", "CREATE INDEX ix ON a (x)\n", "GO\n", "SELECT 1\n"]
+        assert list(iter_statements(lines, "mssql")) == ["CREATE TABLE a (x int)\n", "CREATE INDEX ix ON a (x)\n"]
+
+    def test_unterminated_last_statement(self):
+        assert list(iter_statements(["CREATE TABLE a (\n", "x int)"])) == ["CREATE TABLE a (\nx int)"]
+
+    def test_parse_statement_ignores_temporary_tables(self):
+        assert parse_statement("CREATE TEMPORARY TABLE t (a int)") is None
+        assert parse_statement("CREATE TABLE #t ([a] int)", "mssql") is None
+        assert parse_statement("CREATE TABLE t (a int)").name == "t"
+
+
+class TestMySQLDump:
+    def test_columns(self, mysql_dump):
+        schema = DdlSchemaSource(mysql_dump).get_schema()
+        assert list(schema) == ["users", "orders", "app_logs"]
+        assert column_values(schema["users"], "column_name", "column_type", "max_length", "is_nullable", "extra") == [
+            ("id", "int unsigned", "", "NO", "auto_increment"),
+            ("email", "varchar(255)", 255, "NO", ""),
+            ("bio", "text", 65535, "YES", ""),
+            ("status", "enum('active','disabled')", 8, "YES", ""),
+            ("created_at", "timestamp", "", "YES", "DEFAULT_GENERATED on update CURRENT_TIMESTAMP"),
+        ]
+        assert column_values(schema["users"], "column_comment", "column_default")[1:4] == [
+            ("Login; unique", ""),
+            ("", ""),
+            ("", "active"),
+        ]
+
+    def test_details(self, mysql_dump):
+        schema = DdlSchemaSource(mysql_dump).get_schema(details=True)
+        users, orders = schema["users"], schema["orders"]
+        assert (users.info.comment, users.info.engine, users.info.collation) == (
+            "Site users",
+            "InnoDB",
+            "utf8mb4_0900_ai_ci",
+        )
+        assert [(index.name, index.unique, index.index_type, index.columns) for index in users.indexes] == [
+            ("PRIMARY", True, "BTREE", ["id"]),
+            ("idx_status", False, "BTREE", ["status"]),
+            ("uk_email", True, "BTREE", ["email"]),
+        ]
+        assert [
+            (key.name, key.columns, key.referenced_table, key.referenced_columns) for key in orders.foreign_keys
+        ] == [("fk_user", ["user_id"], "users", ["id"])]
+
+    def test_gzip(self, tmp_path):
+        path = tmp_path / "shop.sql.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as dump:
+            dump.write(MYSQL_DUMP)
+        assert list(DdlSchemaSource(str(path)).get_schema()) == ["users", "orders", "app_logs"]
+
+    def test_streaming_and_table_filter(self, mysql_dump):
+        with DdlSchemaSource(mysql_dump, "mysql", TableFilter(exclude=["app_*"])) as source:
+            items = source.iter_schema()
+            name, columns = next(items)
+            assert name == "users"
+            assert len(columns) == 5
+            assert [name for name, _ in items] == ["orders"]
+
+    def test_streaming_matches_get_schema_with_later_indexes(self, tmp_path):
+        path = tmp_path / "shop.sql"
+        path.write_text(
+            MYSQL_DUMP
+            + "ALTER TABLE `app_logs` ADD PRIMARY KEY (`line`(100));\n"
+            + "CREATE INDEX `idx_user` ON `orders` (`user_id`);\n",
+            encoding="utf-8",
+        )
+        source = DdlSchemaSource(str(path))
+        schema = source.get_schema(details=True)
+        streamed = dict(source.iter_tables(details=True))
+        assert streamed.keys() == schema.keys()
+        for name, table in schema.items():
+            assert column_values(streamed[name], "column_name", "extra") == column_values(table, "column_name", "extra")
+            assert streamed[name].indexes == table.indexes
+        assert [index.name for index in streamed["app_logs"].indexes] == ["PRIMARY"]
+        assert [index.name for index in streamed["orders"].indexes] == ["PRIMARY", "fk_user", "idx_user"]
+
+
+class TestMSSQLDump:
+    def test_detects_dialect(self, mysql_dump, mssql_dump):
+        assert detect_dialect(mysql_dump) == "mysql"
+        assert detect_dialect(mssql_dump) == "mssql"
+
+    def test_columns_with_later_defaults_and_comments(self, mssql_dump):
+        schema = DdlSchemaSource(mssql_dump).get_schema()
+        assert list(schema) == ["dbo.Customers", "sales.Orders"]
+        assert column_values(
+            schema["dbo.Customers"], "column_type", "max_length", "is_nullable", "extra", "column_comment"
+        ) == [
+            ("int", "", "NO", "PRIMARY KEY", ""),
+            ("nvarchar", 100, "NO", "", "Customer's name"),
+            ("nvarchar", -1, "YES", "", ""),
+            ("bit", "", "NO", "", ""),
+        ]
+        assert schema["dbo.Customers"][3].column_default == "((1))"
+        assert schema["sales.Orders"][1].extra == "FOREIGN KEY"
+
+    def test_streaming_matches_get_schema(self, mssql_dump):
+        source = DdlSchemaSource(mssql_dump, "mssql")
+        schema = source.get_schema(details=True)
+        streamed = dict(source.iter_tables(details=True))
+        assert streamed.keys() == schema.keys()
+        for name, table in schema.items():
+            assert column_values(streamed[name], "column_name", "extra", "column_default", "column_comment") == (
+                column_values(table, "column_name", "extra", "column_default", "column_comment")
+            )
+        assert streamed["dbo.Customers"].info.comment == "All customers"
+        assert [index.name for index in streamed["sales.Orders"].indexes] == ["IX_Orders_Customer"]
+        assert streamed["sales.Orders"].foreign_keys[0].referenced_table == "dbo.Customers"
+
+    def test_excluded_schema_and_unknown_dialect(self, mssql_dump):
+        source = DdlSchemaSource(mssql_dump, table_filter=TableFilter(exclude_schemas=["sales"]))
+        assert list(source.get_schema()) == ["dbo.Customers"]
+        with pytest.raises(ValueError, match="unknown dialect"):
+            DdlSchemaSource(mssql_dump, "oracle")
@@ -0,0 +1,200 @@
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dictionary_server import DictionaryServer, DictionaryService, RenderCache
+from schema import Column
+from schema_catalog import CatalogSource, SchemaCatalog
+from writers import get_writer
+
+
+def status(url, **headers) -> int:
+    """HTTP status of a GET of ``url``."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:  # noqa: S310
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def render(schema, output_format, path):
+    get_writer(output_format)(path).write_schema(schema)
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    # The stand-in database: a schema catalog, whose latest run is the current schema.
+    path = str(tmp_path / "catalog.db")
+    with SchemaCatalog(path) as catalog:
+        catalog.store({"users": [Column(1, "id", "int")]}, "db", "shop")
+    return path
+
+
+@pytest.fixture
+def service(catalog_file):
+    opened = []
+
+    def open_connector(db_name):
+        opened.append(db_name)
+        return CatalogSource(catalog_file, db_name)
+
+    service = DictionaryService(open_connector, render, databases=["shop"])
+    service.opened = opened
+    return service
+
+
+class TestRenderCache:
+    def test_evicts_least_recently_used_by_size(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "1", b"aaaa")
+        cache.put("b", "1", b"bbbb")
+        assert cache.get("a") == ("1", b"aaaa")
+        cache.put("c", "1", b"cccc")
+        assert cache.get("b") is None
+        assert (len(cache), cache.size) == (2, 8)
+
+    def test_skips_outputs_larger_than_the_cache(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "1", b"aaaa")
+        cache.put("a", "2", b"x" * 11)
+        assert (len(cache), cache.size) == (0, 0)
+
+
+class TestDictionaryService:
+    def test_rebuilds_only_when_the_fingerprint_changes(self, service, catalog_file):
+        first = service.get("shop", "md")
+        assert first[2] == "miss"
+        assert service.get("shop", "md") == (first[0], first[1], "hit")
+        with SchemaCatalog(catalog_file) as catalog:
+            catalog.store({"users": [Column(1, "id", "int"), Column(2, "email", "varchar")]}, "db", "shop")
+        fingerprint, body, status = service.get("shop", "md")
+        assert (status, fingerprint != first[0]) == ("miss", True)
+        assert b"email" in body
+
+    def test_reuses_one_connector_per_database(self, service):
+        service.get("shop", "md")
+        service.get("shop", "csv")
+        service.get("shop", "md")
+        assert service.opened == ["shop"]
+        connector = service._databases["shop"].connector
+        service.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            connector.query_table_fingerprints()
+
+    def test_closes_least_recently_used_databases(self, catalog_file):
+        with SchemaCatalog(catalog_file) as catalog:
+            catalog.store({"clients": [Column(1, "id", "int")]}, "db", "crm")
+        service = DictionaryService(lambda db_name: CatalogSource(catalog_file, db_name), render, max_databases=1)
+        service.get("shop", "md")
+        shop = service._databases["shop"].connector
+        service.get("crm", "md")
+        assert list(service._databases) == ["crm"]
+        with pytest.raises(sqlite3.ProgrammingError):
+            shop.query_table_fingerprints()
+        assert service.get("shop", "md")[2] == "hit"
+        service.close()
+
+    def test_serves_only_listed_databases(self, catalog_file):
+        listed = []
+
+        def list_databases():
+            with CatalogSource(catalog_file, "shop") as source:
+                listed.append(source.database_names())
+                return listed[-1]
+
+        service = DictionaryService(
+            lambda db_name: CatalogSource(catalog_file, db_name), render, list_databases=list_databases
+        )
+        assert service.serves("shop")
+        assert not service.serves("erp")
+        assert listed == [["shop"]]
+
+    def test_formats_share_one_catalog_query(self, catalog_file):
+        queried = []
+
+        class CountingSource(CatalogSource):
+            def get_schema(self, tables=None, details=False):
+                queried.append(self.run_id)
+                return super().get_schema(tables, details)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_render(schema, output_format, path):
+            started.set()
+            release.wait(5)
+            render(schema, output_format, path)
+
+        service = DictionaryService(lambda db_name: CountingSource(catalog_file, db_name), slow_render)
+        threads = [threading.Thread(target=service.get, args=("shop", fmt)) for fmt in ("csv", "md", "jsonl")]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert [service.cache.get(("shop", fmt)) is not None for fmt in ("csv", "md", "jsonl")] == [True] * 3
+        assert len(queried) == 1
+        service.close()
+
+    def test_coalesces_concurrent_requests(self, catalog_file):
+        started = threading.Event()
+        release = threading.Event()
+        builds = []
+
+        def slow_render(schema, output_format, path):
+            builds.append(output_format)
+            started.set()
+            release.wait(5)
+            render(schema, output_format, path)
+
+        service = DictionaryService(lambda db_name: CatalogSource(catalog_file, db_name), slow_render)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.get("shop", "csv"))) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert builds == ["csv"]
+        assert sorted(status for _, _, status in results) == ["coalesced"] * 3 + ["miss"]
+        assert len({body for _, body, _ in results}) == 1
+
+
+class TestDictionaryServer:
+    @pytest.fixture
+    def base_url(self, service):
+        server = DictionaryServer(("127.0.0.1", 0), service)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_port}"
+        server.shutdown()
+        server.server_close()
+
+    def test_serves_cached_dictionaries(self, base_url):
+        with urllib.request.urlopen(f"{base_url}/shop.html") as response:  # noqa: S310
+            assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+            assert response.headers["X-Cache"] == "miss"
+            assert b'<h2 id="users">users</h2>' in response.read()
+            etag = response.headers["ETag"]
+        with urllib.request.urlopen(f"{base_url}/shop.html") as response:  # noqa: S310
+            assert response.headers["X-Cache"] == "hit"
+        assert status(f"{base_url}/shop.html", **{"If-None-Match": etag}) == 304
+
+    def test_errors(self, base_url, service):
+        assert [status(base_url + path) for path in ("/erp.html", "/shop.pdf", "/")] == [404, 404, 404]
+        service.databases.add("erp")
+        try:
+            with urllib.request.urlopen(f"{base_url}/erp.csv"):  # noqa: S310
+                pytest.fail("expected a 502")
+        except urllib.error.HTTPError as error:
+            with error:
+                assert error.code == 502
+                assert b"catalog.db" not in error.read()
+        assert service.opened == ["erp"]
@@ -1,13 +1,18 @@
+import os
+
 import openpyxl
 import pytest
 
-from generate import ExportDataDictionary, MyWorksheet
+from generate import ExportDataDictionary, MyWorksheet, generate_xlsx_files
+from grouping import max_tables_per_sheet, table_schema
+from schema import ColumnProfile, Index, Table, TableInfo, build_schema
+from text_width import bold_string_width, string_width
 
 
 class TestMyWorksheet:
     def test_excel_string_width_basic(self):
         ws = MyWorksheet()
-        assert ws.excel_string_width("hello") == pytest.approx(5.5)
+        assert ws.excel_string_width("hello") == pytest.approx(34 / 7)
 
     def test_excel_string_width_empty(self):
         ws = MyWorksheet()
@@ -15,7 +20,7 @@ class TestMyWorksheet:
 
     def test_excel_string_width_single_char(self):
         ws = MyWorksheet()
-        assert ws.excel_string_width("X") == pytest.approx(1.1)
+        assert ws.excel_string_width("X") == pytest.approx(10 / 7)
 
     def test_max_column_widths_tracking(self, tmp_path):
         path = str(tmp_path / "widths.xlsx")
@@ -25,8 +30,8 @@ class TestMyWorksheet:
         ws.write_string(1, 0, "much longer")
         ws.write_string(0, 1, "col1")
         wb.close()
-        assert ws.max_column_widths[0] == pytest.approx(len("much longer") * 1.1)
-        assert ws.max_column_widths[1] == pytest.approx(len("col1") * 1.1)
+        assert ws.max_column_widths[0] == pytest.approx(string_width("much longer"))
+        assert ws.max_column_widths[1] == pytest.approx(string_width("col1"))
 
     def test_shorter_string_does_not_replace_max(self, tmp_path):
         path = str(tmp_path / "no_shrink.xlsx")
@@ -35,7 +40,25 @@ class TestMyWorksheet:
         ws.write_string(0, 0, "a long string")
         ws.write_string(1, 0, "hi")
         wb.close()
-        assert ws.max_column_widths[0] == pytest.approx(len("a long string") * 1.1)
+        assert ws.max_column_widths[0] == pytest.approx(string_width("a long string"))
+
+    def test_bold_cells_are_wider(self, tmp_path):
+        path = str(tmp_path / "bold.xlsx")
+        wb = ExportDataDictionary(path)
+        ws = wb.add_worksheet("test")
+        ws.write_string(0, 0, "header", wb.add_format({"bold": 1}))
+        ws.write_string(0, 1, "header")
+        wb.close()
+        assert ws.max_column_widths[0] > ws.max_column_widths[1]
+
+    def test_fit_column_uses_widest_string(self, tmp_path):
+        path = str(tmp_path / "fit.xlsx")
+        wb = ExportDataDictionary(path)
+        ws = wb.add_worksheet("test")
+        ws.fit_column(0, ["id", "created_at", "name"])
+        ws.fit_column(0, ["x"])
+        wb.close()
+        assert ws.max_column_widths[0] == pytest.approx(string_width("created_at"))
 
 
 class TestExportDataDictionary:
@@ -139,7 +162,7 @@ class TestExportDataDictionary:
         workbook = openpyxl.load_workbook(path)
         ws = workbook.active
         # Row 4 = first data row (1-indexed in openpyxl)
-        assert ws.cell(4, 1).value == "1"
+        assert ws.cell(4, 1).value == 1
         assert ws.cell(4, 2).value == "id"
         assert ws.cell(4, 3).value == "Primary key"
         assert ws.cell(4, 4).value == "int"
@@ -147,10 +170,35 @@ class TestExportDataDictionary:
         assert ws.cell(4, 6).value == "NO"
         assert ws.cell(4, 7).value == "PRI"
         # Row 5 = second data row
-        assert ws.cell(5, 1).value == "2"
+        assert ws.cell(5, 1).value == 2
         assert ws.cell(5, 2).value == "email"
         workbook.close()
 
+    def test_create_table_writes_numbers_as_numbers(self, tmp_path):
+        path = str(tmp_path / "numbers.xlsx")
+        columns = build_schema([("users", 1, "name", "varchar(255)", 255, "YES", "", "", None)])["users"]
+        wb = ExportDataDictionary(path)
+        wb.start_sheet("test")
+        wb.create_table("users", columns)
+        wb.close()
+
+        workbook = openpyxl.load_workbook(path)
+        ws = workbook.active
+        assert [ws.cell(4, col).value for col in (1, 4, 5)] == [1, "varchar(255)", 255]
+        assert ws.cell(4, 5).border.left.style == "thin"
+        workbook.close()
+
+    def test_write_rows_fits_columns_once_per_block(self, tmp_path):
+        wb = ExportDataDictionary(str(tmp_path / "block.xlsx"))
+        ws = wb.add_worksheet("test")
+        rows = [("id", 12345678), ("a much longer column name", None)]
+
+        assert ws.write_rows(0, 0, rows) == 4
+        assert ws.max_column_widths[0] == pytest.approx(string_width("a much longer column name"))
+        assert ws.max_column_widths[1] == pytest.approx(string_width("12345678"))
+        assert ws.write_rows(2, 0, []) == 0
+        wb.close()
+
     def test_create_table_advances_row_with_gap(self, tmp_path, single_table_schema):
         path = str(tmp_path / "gap.xlsx")
         wb = ExportDataDictionary(path)
@@ -261,3 +309,209 @@ class TestExportDataDictionary:
 
         workbook = openpyxl.load_workbook(path)
         workbook.close()
+
+    def test_write_details(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "details.xlsx")
+        table = Table(single_table_schema["users"], indexes=[Index("idx_email", ["email", "id"], unique=True)])
+        ExportDataDictionary(path).generate_xlsx_simple({"users": table})
+
+        workbook = openpyxl.load_workbook(path)
+        rows = [[cell.value for cell in row] for row in workbook.active.iter_rows()]
+        workbook.close()
+        start = rows.index(["Indexes:", None, None, None, None, None, None])
+        assert rows[start + 1][:4] == ["INDEX_NAME", "COLUMNS", "UNIQUE", "TYPE"]
+        assert rows[start + 2][:3] == ["idx_email", "email, id", "YES"]
+        assert not any(row[0] == "Foreign keys:" for row in rows)
+
+    def test_table_info_in_header_block(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "info.xlsx")
+        info = TableInfo("All registered users", "InnoDB", "utf8mb4_bin", 1200, 16384, 32768)
+        ExportDataDictionary(path).generate_xlsx_simple({"users": Table(single_table_schema["users"], info=info)})
+
+        workbook = openpyxl.load_workbook(path)
+        rows = [[cell.value for cell in row] for row in workbook.active.iter_rows(max_row=5)]
+        workbook.close()
+        assert rows[1][:2] == ["Description:", "All registered users"]
+        assert rows[2][:4] == ["Engine:", "InnoDB", "Collation:", "utf8mb4_bin"]
+        assert rows[3][:6] == ["Rows (estimate):", 1200, "Data size (bytes):", 16384, "Index size (bytes):", 32768]
+        assert rows[4][0] == "COLUMN_ID"
+
+    def test_profile_columns(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "profile.xlsx")
+        profiles = {"email": ColumnProfile(1000, 0.25, 740, "a@b.c", "z@y.x", ["a@b.c", "m@n.o"])}
+        ExportDataDictionary(path).generate_xlsx_simple(
+            {"users": Table(single_table_schema["users"], profiles=profiles)}
+        )
+
+        workbook = openpyxl.load_workbook(path)
+        rows = [[cell.value for cell in row] for row in workbook.active.iter_rows(min_row=3, max_row=5)]
+        workbook.close()
+        assert rows[0][7:] == ["NULL_RATIO", "DISTINCT (EST.)", "MIN", "MAX", "EXAMPLES"]
+        assert rows[1][7:] == [""] * 5
+        assert rows[2][7:] == [0.25, 740, "a@b.c", "z@y.x", "a@b.c, m@n.o"]
+
+
+class TestStreaming:
+    def test_generate_xlsx_accepts_iterable(self, tmp_path, multi_prefix_schema):
+        path = str(tmp_path / "iter.xlsx")
+        wb = ExportDataDictionary(path)
+        wb.generate_xlsx(iter(multi_prefix_schema.items()))
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["app", "blog"]
+        workbook.close()
+
+    def test_constant_memory_generate_xlsx(self, tmp_path, multi_prefix_schema):
+        path = str(tmp_path / "constant.xlsx")
+        wb = ExportDataDictionary(path, constant_memory=True)
+        wb.generate_xlsx(iter(multi_prefix_schema.items()))
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["app", "blog"]
+        ws = workbook["blog"]
+        assert ws.cell(1, 2).value == "blog_posts"
+        assert ws.cell(4, 2).value == "id"
+        workbook.close()
+
+    def test_constant_memory_generate_xlsx_simple(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "constant_simple.xlsx")
+        wb = ExportDataDictionary(path, constant_memory=True)
+        wb.generate_xlsx_simple(iter(single_table_schema.items()))
+
+        workbook = openpyxl.load_workbook(path)
+        ws = workbook["Data Dictionary"]
+        assert ws.cell(1, 2).value == "users"
+        assert ws.cell(5, 2).value == "email"
+        workbook.close()
+
+    def test_constant_memory_keeps_column_widths(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "constant_widths.xlsx")
+        wb = ExportDataDictionary(path, constant_memory=True)
+        wb.generate_xlsx_simple(single_table_schema)
+
+        workbook = openpyxl.load_workbook(path)
+        ws = workbook["Data Dictionary"]
+        # xlsxwriter stores the width with the 5 px column margin added back.
+        assert ws.column_dimensions["A"].width == pytest.approx(bold_string_width("Description:") + 5 / 7, abs=0.1)
+        workbook.close()
+
+
+class TestGenerateXlsxCombined:
+    def test_sheet_per_database(self, tmp_path, single_table_schema, multi_prefix_schema):
+        path = str(tmp_path / "combined.xlsx")
+        wb = ExportDataDictionary(path)
+        wb.generate_xlsx_combined({"shop": single_table_schema, "blog": multi_prefix_schema})
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["shop", "blog"]
+        assert workbook["blog"].cell(1, 2).value == "app_users"
+        workbook.close()
+
+    def test_long_database_name_truncated(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "combined_long.xlsx")
+        wb = ExportDataDictionary(path)
+        wb.generate_xlsx_combined({"x" * 40: single_table_schema})
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["x" * 31]
+        workbook.close()
+
+
+class TestGenerateXlsxGroupBy:
+    def test_sheet_per_schema(self, tmp_path, single_table_schema):
+        columns = single_table_schema["users"]
+        data = {"dbo.users": columns, "dbo.user_roles": columns, "sales.orders": columns}
+        path = str(tmp_path / "schemas.xlsx")
+        wb = ExportDataDictionary(path)
+        wb.generate_xlsx(data, group_by=table_schema)
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["dbo", "sales"]
+        assert workbook["sales"].cell(1, 2).value == "sales.orders"
+        workbook.close()
+
+    @pytest.mark.parametrize("constant_memory", [False, True])
+    def test_unsorted_tables_share_their_group_sheet(self, tmp_path, multi_prefix_schema, constant_memory):
+        data = iter((name, multi_prefix_schema[name]) for name in ["app_users", "blog_posts", "app_roles"])
+        path = str(tmp_path / "unsorted.xlsx")
+        ExportDataDictionary(path, constant_memory=constant_memory).generate_xlsx(data)
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["app", "blog"]
+        assert [workbook["app"].cell(row, 2).value for row in (1, 7)] == ["app_users", "app_roles"]
+        workbook.close()
+
+    def test_sheet_names_sanitized_and_deduplicated(self, tmp_path, single_table_schema):
+        columns = single_table_schema["users"]
+        data = {"Users_a": columns, "users_b": columns, "a/b_c": columns}
+        path = str(tmp_path / "names.xlsx")
+        ExportDataDictionary(path).generate_xlsx(data)
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["Users", "users (2)", "a_b"]
+        workbook.close()
+
+    def test_max_tables_per_sheet(self, tmp_path, multi_prefix_schema):
+        path = str(tmp_path / "split.xlsx")
+        ExportDataDictionary(path).generate_xlsx(
+            multi_prefix_schema, group_by=max_tables_per_sheet(lambda name: "all", 3)
+        )
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["all", "all (2)"]
+        assert workbook["all (2)"].cell(1, 2).value == "blog_comments"
+        workbook.close()
+
+
+class TestRollover:
+    def test_table_height_matches_create_table(self, tmp_path, single_table_schema):
+        table = Table(
+            single_table_schema["users"],
+            indexes=[Index("idx_email", ["email"])],
+            info=TableInfo("Users", "InnoDB", "utf8mb4_bin", 1, 2, 3),
+        )
+        wb = ExportDataDictionary(str(tmp_path / "height.xlsx"))
+        wb.start_sheet("users")
+        wb.create_table("users", table)
+        assert wb._row == ExportDataDictionary.table_height(table) == 3 + 2 + 2 + 2 + 4
+        wb.close()
+
+    def test_new_sheet_before_row_limit(self, tmp_path, single_table_schema):
+        columns = single_table_schema["users"]
+        path = str(tmp_path / "rollover.xlsx")
+        # Each table takes 5 written rows plus 2 blank ones: two fit in 12 rows.
+        wb = ExportDataDictionary(path, max_rows=12)
+        wb.generate_xlsx({f"users_{index}": columns for index in range(5)})
+
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["users", "users (2)", "users (3)"]
+        names = [sheet.cell(row, 2).value for sheet in workbook.worksheets for row in (1, 8)]
+        assert names == ["users_0", "users_1", "users_2", "users_3", "users_4", None]
+        assert all(sheet.max_row <= 12 for sheet in workbook.worksheets)
+        workbook.close()
+
+    def test_continued_sheet_name_fits(self, tmp_path, single_table_schema):
+        wb = ExportDataDictionary(str(tmp_path / "long.xlsx"), max_rows=5)
+        wb.start_sheet("x" * 40)
+        for _ in range(2):
+            wb.add_table("users", single_table_schema["users"])
+        assert [sheet.name for sheet in wb.worksheets()] == ["x" * 31, "x" * 27 + " (2)"]
+        wb.close()
+
+    def test_workbook_row_budget(self, tmp_path, single_table_schema):
+        columns = single_table_schema["users"]
+        data = {"users": columns, "users_roles": columns, "orders": columns}
+        files = generate_xlsx_files(str(tmp_path / "dictionary.xlsx"), data, workbook_rows=14)
+
+        assert [os.path.basename(name) for name in files] == ["dictionary.xlsx", "dictionary_2.xlsx"]
+        sheets = []
+        for name in files:
+            workbook = openpyxl.load_workbook(name)
+            sheets.append(workbook.sheetnames)
+            workbook.close()
+        assert sheets == [["users"], ["orders"]]
+
+    def test_empty_data_still_writes_a_workbook(self, tmp_path):
+        path = str(tmp_path / "empty.xlsx")
+        assert generate_xlsx_files(path, {}) == [path]
+        assert os.path.exists(path)
@@ -0,0 +1,63 @@
+import pytest
+
+from grouping import (
+    SheetNames,
+    get_group_by,
+    group_tables,
+    max_tables_per_sheet,
+    regex_group,
+    table_prefix,
+    table_schema,
+)
+
+
+class TestGroupKeys:
+    def test_prefix_and_schema(self):
+        assert table_prefix("app_users") == "app"
+        assert table_schema("sales.order_items") == "sales"
+
+    def test_regex_group(self):
+        group_by = regex_group(r"^([a-z]+_[a-z]+)_")
+        assert group_by("crm_sales_orders") == "crm_sales"
+        assert group_by("users") == "other"
+        assert regex_group(r"^\d+")("2024_orders") == "2024"
+
+    def test_max_tables_per_sheet(self):
+        group_by = max_tables_per_sheet(table_prefix, 2)
+        names = ["app_a", "blog_a", "app_b", "app_c", "app_d", "app_e"]
+        assert [group_by(name) for name in names] == ["app", "blog", "app", "app (2)", "app (2)", "app (3)"]
+
+    def test_get_group_by(self):
+        assert get_group_by("schema") is table_schema
+        assert get_group_by("re:^(..)")("abcd") == "ab"
+        assert get_group_by("prefix", max_tables=1)("app_b") == "app"
+        with pytest.raises(ValueError, match="unknown grouping"):
+            get_group_by("suffix")
+
+
+class TestGroupTables:
+    def test_index_independent_of_order(self):
+        items = [("app_users", 1), ("blog_posts", 2), ("app_roles", 3)]
+        assert group_tables(items) == {"app": {"app_users": 1, "app_roles": 3}, "blog": {"blog_posts": 2}}
+
+    def test_consumes_a_stream_once(self):
+        items = iter([("dbo.a", 1), ("sales.b", 2)])
+        assert list(group_tables(items, table_schema)) == ["dbo", "sales"]
+        assert next(items, None) is None
+
+
+class TestSheetNames:
+    def test_invalid_characters_replaced(self):
+        assert SheetNames.sanitize("a[b]:c*d?e/f\\g") == "a_b__c_d_e_f_g"
+        assert SheetNames.sanitize("'quoted'") == "quoted"
+        assert SheetNames.sanitize("") == "_"
+        assert SheetNames.sanitize("History") == "History_"
+
+    def test_case_insensitive_duplicates_numbered(self):
+        names = SheetNames()
+        assert [names.unique(name) for name in ["Users", "users", "USERS"]] == ["Users", "users (2)", "USERS (3)"]
+
+    def test_truncated_names_stay_unique(self):
+        names = SheetNames()
+        assert names.unique("x" * 40) == "x" * 31
+        assert names.unique("x" * 35) == "x" * 27 + " (2)"
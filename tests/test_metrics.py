@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+
+from generate import ExportDataDictionary
+from metrics import METRICS, Metrics, Progress, collect_metrics
+from writers import CsvWriter
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.enabled = True
+    return metrics
+
+
+class TestMetrics:
+    def test_phase_records_calls_and_time(self, metrics):
+        for _ in range(3):
+            with metrics.phase("query"):
+                pass
+        stats = metrics.report()["phases"]["query"]
+        assert stats["calls"] == 3
+        assert stats["wall_seconds"] >= 0
+        assert "cpu_seconds" in stats
+
+    def test_phase_memory_is_the_rise_of_the_peak(self, metrics, monkeypatch):
+        readings = iter([100, 300, 300, 300, 300, 350])
+        monkeypatch.setattr("metrics.peak_rss", lambda: next(readings))
+        with metrics.phase("query"):
+            pass
+        for _ in range(2):
+            with metrics.phase("write"):
+                pass
+        assert metrics.phases["query"]["peak_rss_growth_bytes"] == 200
+        assert metrics.phases["write"]["peak_rss_growth_bytes"] == 50
+
+    def test_timed_decorator(self, metrics):
+        @metrics.timed("connect")
+        def connect():
+            return "connection"
+
+        assert connect() == "connection"
+        assert metrics.phases["connect"]["calls"] == 1
+
+    def test_disabled_records_nothing(self):
+        metrics = Metrics()
+        with metrics.phase("query"):
+            metrics.count("rows_fetched", 10)
+        assert metrics.report()["phases"] == {}
+        assert metrics.report()["counters"] == {}
+
+    def test_counters(self, metrics):
+        metrics.count("rows_fetched", 10)
+        metrics.count("rows_fetched", 5)
+        assert metrics.report()["counters"] == {"rows_fetched": 15}
+
+
+class TestCollectMetrics:
+    def test_writes_report_of_an_export(self, tmp_path, single_table_schema):
+        metrics_file = tmp_path / "metrics.json"
+        with collect_metrics(str(metrics_file)):
+            ExportDataDictionary(str(tmp_path / "out.xlsx")).generate_xlsx_simple(single_table_schema)
+            CsvWriter(str(tmp_path / "out.csv")).write_schema(single_table_schema)
+        assert not METRICS.enabled
+
+        report = json.loads(metrics_file.read_text())
+        assert report["phases"]["write"]["calls"] == 2
+        assert report["phases"]["close"]["calls"] == 1
+        assert report["counters"]["cells_written"] == 3 + 7 * 3
+        assert report["counters"]["tables_written"] == 2
+        assert report["counters"]["bytes_output"] > 0
+
+    def test_profile_dump(self, tmp_path):
+        profile_file = tmp_path / "export.prof"
+        with collect_metrics(profile_file=str(profile_file)):
+            sum(range(1000))
+        assert profile_file.stat().st_size > 0
+        assert not METRICS.enabled
+
+
+class TestProgress:
+    def test_rate_limited(self):
+        stream = io.StringIO()
+        progress = Progress(interval=3600, stream=stream)
+        for index in range(1000):
+            progress.update(f"table_{index}")
+        assert stream.getvalue() == ""
+        progress.close()
+        assert stream.getvalue().startswith("Generating: 1000 tables in ")
+
+    def test_reports_when_interval_elapsed(self):
+        stream = io.StringIO()
+        progress = Progress(interval=0, stream=stream)
+        progress.update("users")
+        assert "1 tables" in stream.getvalue()
+        assert "users" in stream.getvalue()
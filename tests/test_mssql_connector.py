@@ -2,7 +2,9 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+import schema
 from mssql_connector import MSSQLConnector
+from table_filter import TableFilter
 
 
 def _mock_pyodbc():
@@ -28,7 +30,7 @@ class TestMSSQLConnectorConnectToDb:
         assert "localhost" in conn_str
         assert "1433" in conn_str
         assert "testdb" in conn_str
-        assert connector.connection is mock_conn
+        assert connector.pool.size == 1
 
     @patch("mssql_connector.pyodbc")
     def test_connect_default_port(self, mock_pyodbc):
@@ -74,8 +76,8 @@ class TestMSSQLConnectorGetSchema:
         connector = MSSQLConnector("testdb", "user", "pass", "localhost")
         schema = connector.get_schema()
 
-        assert "users" in schema
-        assert len(schema["users"]) == 2
+        assert "dbo.users" in schema
+        assert len(schema["dbo.users"]) == 2
 
     @patch("mssql_connector.pyodbc")
     def test_get_schema_none_column_comment_becomes_empty_string(self, mock_pyodbc, mssql_raw_rows):
@@ -87,9 +89,9 @@ class TestMSSQLConnectorGetSchema:
         schema = connector.get_schema()
 
         # Second row has column_comment=None
-        assert schema["users"][1]["column_comment"] == ""
+        assert schema["dbo.users"][1]["column_comment"] == ""
         # First row has column_comment="Primary key"
-        assert schema["users"][0]["column_comment"] == "Primary key"
+        assert schema["dbo.users"][0]["column_comment"] == "Primary key"
 
     @patch("mssql_connector.pyodbc")
     def test_get_schema_empty_result(self, mock_pyodbc):
@@ -103,14 +105,17 @@ class TestMSSQLConnectorGetSchema:
         assert schema == {}
 
     @patch("mssql_connector.pyodbc")
-    def test_get_schema_closes_connection(self, mock_pyodbc, mssql_raw_rows):
+    def test_session_reuses_connection_until_closed(self, mock_pyodbc, mssql_raw_rows):
         mock_conn, mock_cursor = _mock_pyodbc()
         mock_cursor.fetchall.return_value = mssql_raw_rows
         mock_pyodbc.connect.return_value = mock_conn
 
-        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
-        connector.get_schema()
+        with MSSQLConnector("testdb", "user", "pass", "localhost") as connector:
+            connector.get_schema()
+            connector.get_schema(tables=["dbo.users"])
+            mock_conn.close.assert_not_called()
 
+        mock_pyodbc.connect.assert_called_once()
         mock_conn.close.assert_called_once()
 
     @patch("mssql_connector.pyodbc")
@@ -125,9 +130,11 @@ class TestMSSQLConnectorGetSchema:
         calls = mock_cursor.execute.call_args_list
         assert len(calls) == 2
         query = calls[1][0][0]
-        assert "INFORMATION_SCHEMA.COLUMNS" in query
+        assert "sys.columns" in query
+        assert "OBJECT_ID" not in query
+        assert "'dbo'" not in query
         params = calls[1][0][1]
-        assert params == ("testdb",)
+        assert params == ()
 
     @patch("mssql_connector.pyodbc")
     def test_query_schema_uses_custom_query(self, mock_pyodbc):
@@ -141,3 +148,371 @@ class TestMSSQLConnectorGetSchema:
 
         calls = mock_cursor.execute.call_args_list
         assert calls[1][0][0] == custom_query
+
+
+class TestMSSQLConnectorStreaming:
+    @patch("mssql_connector.pyodbc")
+    def test_iter_schema_fetches_in_batches(self, mock_pyodbc, mssql_raw_rows):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchmany.side_effect = [mssql_raw_rows[:1], mssql_raw_rows[1:], []]
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
+        tables = list(connector.iter_schema(batch_size=1))
+
+        mock_cursor.fetchmany.assert_called_with(1)
+        mock_cursor.fetchall.assert_not_called()
+        assert len(tables) == 1
+        name, columns = tables[0]
+        assert name == "dbo.users"
+        assert columns[1]["column_comment"] == ""
+
+    @patch("mssql_connector.pyodbc")
+    def test_iter_schema_returns_connection_when_exhausted(self, mock_pyodbc, mssql_raw_rows):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchmany.side_effect = [mssql_raw_rows, []]
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
+        list(connector.iter_schema())
+        mock_conn.close.assert_not_called()
+        connector.close()
+
+        mock_conn.close.assert_called_once()
+
+
+class TestMSSQLConnectorIncremental:
+    @patch("mssql_connector.pyodbc")
+    def test_query_table_fingerprints(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = [("dbo.users", "2024-01-01 00:00:00")]
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
+        fingerprints = connector.query_table_fingerprints()
+
+        assert fingerprints == {"dbo.users": "2024-01-01 00:00:00"}
+        assert "modify_date" in mock_cursor.execute.call_args[0][0]
+        mock_conn.close.assert_not_called()
+
+    @patch("mssql_connector.pyodbc")
+    def test_get_schema_restricted_to_tables(self, mock_pyodbc, mssql_raw_rows):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = mssql_raw_rows
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
+        connector.get_schema(tables=["dbo.users"])
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "s.name + N'.' + t.name IN (?)" in query
+        assert params == ("dbo.users",)
+
+
+class TestMSSQLConnectorSchemas:
+    @patch("mssql_connector.pyodbc")
+    def test_all_schemas_by_default(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = []
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
+        connector.query_schema()
+
+        query = mock_cursor.execute.call_args[0][0]
+        assert "s.name IN" not in query
+
+    @patch("mssql_connector.pyodbc")
+    def test_selected_schemas_filtered(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = []
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", schemas=["sales", "hr"])
+        connector.get_schema(tables=["sales.orders"])
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "s.name IN (?, ?)" in query
+        assert params == ("sales", "hr", "sales.orders")
+
+    @patch("mssql_connector.pyodbc")
+    def test_fingerprints_use_selected_schemas(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = []
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", schemas=["sales"])
+        connector.query_table_fingerprints()
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "s.name IN (?)" in query
+        assert params == ("sales",)
+
+    @patch("mssql_connector.pyodbc")
+    def test_catalog_ordered_by_schema_then_table(self, mock_pyodbc, mssql_raw_rows):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = mssql_raw_rows + [
+            ("sales.orders", 1, "id", "int", None, "NO", "PRIMARY KEY", None, None)
+        ]
+        mock_pyodbc.connect.return_value = mock_conn
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost")
+        schema = connector.get_schema()
+
+        assert list(schema) == ["dbo.users", "sales.orders"]
+        query = mock_cursor.execute.call_args[0][0]
+        order_by = " ".join(query[query.index("ORDER BY") :].split())
+        assert order_by == "ORDER BY s.name, t.name, c.column_id ASC"
+
+
+class TestMSSQLConnectorDetails:
+    @patch("mssql_connector.pyodbc")
+    def test_get_schema_with_details(self, mock_pyodbc, mssql_raw_rows):
+        results = {
+            "sys.foreign_keys": [("dbo.users", "fk_team", "dbo.teams", "id", "id")],
+            "sys.key_constraints": [("dbo.users", "pk_users", "PRIMARY KEY", "id")],
+            "i.type_desc": [("dbo.users", "pk_users", True, "CLUSTERED", "id")],
+            "dm_db_partition_stats": [("dbo.users", "Application users", "", "", 42, 16384, 8192)],
+        }
+        cursors = []
+
+        def connect(*_args, **_kwargs):
+            mock_conn, mock_cursor = _mock_pyodbc()
+
+            def fetchall():
+                query = mock_cursor.execute.call_args[0][0]
+                for marker in ("sys.foreign_keys", "sys.key_constraints", "i.type_desc", "dm_db_partition_stats"):
+                    if marker in query:
+                        return results[marker]
+                return mssql_raw_rows
+
+            mock_cursor.fetchall.side_effect = fetchall
+            cursors.append(mock_cursor)
+            return mock_conn
+
+        mock_pyodbc.connect.side_effect = connect
+
+        with MSSQLConnector("testdb", "user", "pass", "localhost", schemas=["dbo"]) as connector:
+            schema = connector.get_schema(details=True)
+
+        users = schema["dbo.users"]
+        assert users[0].column_name == "id"
+        assert users.indexes[0].unique
+        assert users.foreign_keys[0].referenced_table == "dbo.teams"
+        assert users.constraints[0].constraint_type == "PRIMARY KEY"
+        assert (users.info.comment, users.info.estimated_rows, users.info.index_size) == ("Application users", 42, 8192)
+        constraint_params = [
+            call[0][1]
+            for cursor in cursors
+            for call in cursor.execute.call_args_list
+            if "sys.key_constraints" in call[0][0]
+        ]
+        assert constraint_params == [("dbo", "dbo")]
+
+    @patch("mssql_connector.pyodbc")
+    def test_without_details_single_connection(self, mock_pyodbc, mssql_raw_rows):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = mssql_raw_rows
+        mock_pyodbc.connect.return_value = mock_conn
+
+        schema = MSSQLConnector("testdb", "user", "pass", "localhost").get_schema()
+
+        assert mock_pyodbc.connect.call_count == 1
+        assert not hasattr(schema["dbo.users"], "indexes")
+
+
+class TestMSSQLConnectorTableFilter:
+    @patch("mssql_connector.pyodbc")
+    def test_like_patterns_and_excluded_schemas_in_query(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = []
+        mock_pyodbc.connect.return_value = mock_conn
+
+        table_filter = TableFilter(include=["billing_*"], exclude_schemas=["staging"])
+        MSSQLConnector("testdb", "user", "pass", "localhost", table_filter=table_filter).get_schema()
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "AND (t.name LIKE ? ESCAPE '!') AND s.name NOT IN (?)" in query
+        assert params == ("billing!_%", "staging")
+
+    @patch("mssql_connector.pyodbc")
+    def test_regex_matched_client_side(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_cursor.fetchall.return_value = [
+            ("dbo.crm_leads", 1, "id", "int", None, "NO", "", None, None),
+            ("dbo.crm_leads_old", 1, "id", "int", None, "NO", "", None, None),
+        ]
+        mock_cursor.fetchmany.side_effect = [mock_cursor.fetchall.return_value, []]
+        mock_pyodbc.connect.return_value = mock_conn
+
+        table_filter = TableFilter(exclude=["re:_old$"])
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", table_filter=table_filter)
+
+        assert list(connector.get_schema()) == ["dbo.crm_leads"]
+        assert [name for name, _ in connector.iter_schema()] == ["dbo.crm_leads"]
+        assert "REGEXP" not in mock_cursor.execute.call_args[0][0]
+
+
+class TestMSSQLConnectorChunkedScan:
+    @patch("mssql_connector.pyodbc")
+    def test_chunks_run_under_query_timeout(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        timeouts = []
+
+        def fetchall():
+            query, params = mock_cursor.execute.call_args[0]
+            if "modify_date" in query:
+                return [("dbo.a", None), ("dbo.b", None), ("sales.c", None)]
+            timeouts.append(mock_conn.timeout)
+            return [(table, 1, "id", "int", None, "NO", "", None, None) for table in params]
+
+        mock_cursor.fetchall.side_effect = fetchall
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1, chunk_tables=2, chunk_timeout=30)
+
+        assert list(connector.get_schema()) == ["dbo.a", "dbo.b", "sales.c"]
+        assert timeouts == [30, 30]
+        assert mock_conn.timeout == 0
+
+    @patch("mssql_connector.pyodbc")
+    def test_timed_out_chunk_is_retried(self, mock_pyodbc, monkeypatch):
+        monkeypatch.setattr(schema, "CHUNK_RETRY_DELAY", 0)
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        scans = []
+
+        def fetchall():
+            query, params = mock_cursor.execute.call_args[0]
+            if "modify_date" in query:
+                return [("dbo.a", None), ("dbo.b", None)]
+            scans.append(params)
+            if len(params) > 1:
+                raise TimeoutError("Query timeout expired")
+            return [(table, 1, "id", "int", None, "NO", "", None, None) for table in params]
+
+        mock_cursor.fetchall.side_effect = fetchall
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1, chunk_tables=2)
+
+        assert list(connector.get_schema()) == ["dbo.a", "dbo.b"]
+        assert scans == [("dbo.a", "dbo.b"), ("dbo.a",), ("dbo.b",)]
+
+    @patch("mssql_connector.pyodbc")
+    def test_chunks_stay_under_the_parameter_limit(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        names = [f"dbo.t{index:04}" for index in range(2500)]
+        scans = []
+
+        def fetchall():
+            query, params = mock_cursor.execute.call_args[0]
+            if "modify_date" in query:
+                return [(name, None) for name in names]
+            scans.append(len(params))
+            return []
+
+        mock_cursor.fetchall.side_effect = fetchall
+        assert MSSQLConnector("testdb", "user", "pass", "localhost", chunk_tables=5000).chunk_tables == 2000
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1)
+        connector.get_schema(tables=names)
+        assert sorted(scans) == [500, 2000]
+        scans.clear()
+        connector.get_schema(tables=names[:3])
+        assert scans == [3]
+
+    @patch("mssql_connector.pyodbc")
+    def test_details_stay_under_the_parameter_limit(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        names = [f"dbo.t{index:04}" for index in range(1100)]
+        scans = []
+
+        def fetchall():
+            query, params = mock_cursor.execute.call_args[0]
+            scans.append(len(params))
+            if "is_included_column" in query:
+                return [(name, f"PK_{name}", 1, "CLUSTERED", "id") for name in ["dbo.other", "dbo.t0000"]]
+            if "AS TABLE_NAME" in query:
+                return [(table, 1, "id", "int", None, "NO", "", None, None) for table in params if table in names]
+            return []
+
+        mock_cursor.fetchall.side_effect = fetchall
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1)
+        schema = connector.get_schema(tables=names, details=True)
+
+        assert max(scans) <= 2100
+        assert len(schema) == 1100
+        assert [index.name for index in schema["dbo.t0000"].indexes] == ["PK_dbo.t0000"]
+        assert connector.query_details(names)["indexes"] == [("dbo.t0000", "PK_dbo.t0000", 1, "CLUSTERED", "id")]
+
+    @patch("mssql_connector.pyodbc")
+    def test_subsecond_timeout_rounds_up(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        timeouts = []
+
+        def fetchall():
+            query, params = mock_cursor.execute.call_args[0]
+            if "modify_date" in query:
+                return [("dbo.a", None)]
+            timeouts.append(mock_conn.timeout)
+            return [(table, 1, "id", "int", None, "NO", "", None, None) for table in params]
+
+        mock_cursor.fetchall.side_effect = fetchall
+        connector = MSSQLConnector(
+            "testdb", "user", "pass", "localhost", pool_size=1, chunk_tables=2, chunk_timeout=0.5
+        )
+
+        connector.get_schema()
+        assert timeouts == [1]
+
+
+class TestMSSQLConnectorSampling:
+    @patch("mssql_connector.pyodbc")
+    def test_tablesample_falls_back_to_first_rows(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        mock_cursor.fetchall.side_effect = [[(100000,)], [], [(1, "a@b.c"), (2, None)]]
+        columns = [{"column_name": "id"}, {"column_name": "email"}]
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1)
+        rows, total_rows = connector.sample_table("dbo.users", columns, 1000, timeout=2.5)
+
+        assert (rows, total_rows) == ([(1, "a@b.c"), (2, None)], 100000)
+        queries = [call[0][0] for call in mock_cursor.execute.call_args_list[-3:]]
+        assert mock_cursor.execute.call_args_list[-3][0][1] == ("[dbo].[users]",)
+        assert queries[1] == "SELECT TOP (1000) [id], [email] FROM [dbo].[users] TABLESAMPLE SYSTEM (4.000000 PERCENT)"
+        assert queries[2] == "SELECT TOP (1000) [id], [email] FROM [dbo].[users]"
+        assert mock_conn.timeout == 0
+
+    @patch("mssql_connector.pyodbc")
+    def test_small_table_reads_first_rows(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        mock_cursor.fetchall.side_effect = [[(3,)], [(1,), (2,), (3,)]]
+
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1)
+        rows, total_rows = connector.sample_table("sales.orders", [{"column_name": "id"}], 1000)
+
+        assert (rows, total_rows) == ([(1,), (2,), (3,)], 3)
+        assert mock_cursor.execute.call_args[0][0] == "SELECT TOP (1000) [id] FROM [sales].[orders]"
+
+    @patch("mssql_connector.pyodbc")
+    def test_queries_get_the_time_left(self, mock_pyodbc):
+        mock_conn, mock_cursor = _mock_pyodbc()
+        mock_pyodbc.connect.return_value = mock_conn
+        timeouts = []
+        results = iter([[(100000,)], [], [(1,)]])
+
+        def fetchall():
+            timeouts.append(mock_conn.timeout)
+            return next(results)
+
+        mock_cursor.fetchall.side_effect = fetchall
+        connector = MSSQLConnector("testdb", "user", "pass", "localhost", pool_size=1)
+        with patch("mssql_connector.time") as clock, pytest.raises(TimeoutError):
+            clock.monotonic.side_effect = [100, 100, 102.2, 105]
+            connector.sample_table("dbo.users", [{"column_name": "id"}], 1000, timeout=5)
+
+        assert timeouts == [5, 3]
+        assert mock_conn.timeout == 0
@@ -0,0 +1,205 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import openpyxl
+import pytest
+
+import multi_export
+from multi_export import combined_sheets, interleave_by_server, output_path, plan_jobs, run_exports
+from schema_catalog import SchemaCatalog
+
+
+def _target(backend, db_host, db_names, **extra):
+    return {
+        "backend": backend,
+        "db_host": db_host,
+        "db_user": "user",
+        "db_password": "pass",
+        "db_names": db_names,
+        **extra,
+    }
+
+
+def _schema(table_name):
+    return {
+        table_name: [
+            {
+                "ordinal": 1,
+                "column_name": "id",
+                "column_type": "int",
+                "max_length": "",
+                "is_nullable": "NO",
+                "extra": "",
+                "column_comment": "",
+                "column_default": "",
+            }
+        ]
+    }
+
+
+class FakeConnector:
+    """Stand-in for both connectors that records how many run at once per host."""
+
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+
+    opened = []
+
+    def __init__(self, db_name, db_host, **credentials):
+        self.db_name = db_name
+        self.db_host = db_host
+        self.opened.append((db_host, credentials.get("db_port"), credentials.get("pool_size")))
+        if db_host == "down":
+            raise ConnectionError("Connection refused")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _scan(self, result):
+        with self.lock:
+            self.active[self.db_host] = self.active.get(self.db_host, 0) + 1
+            self.peak[self.db_host] = max(self.peak.get(self.db_host, 0), self.active[self.db_host])
+        time.sleep(0.02)
+        with self.lock:
+            self.active[self.db_host] -= 1
+        return result
+
+    def get_schema(self):
+        return self._scan(_schema(f"{self.db_name}_table"))
+
+    def get_schemas(self, db_names):
+        return self._scan({db_name: _schema(f"{db_name}_table") for db_name in db_names})
+
+
+class TestPlanJobs:
+    def test_mysql_databases_on_same_server_are_folded(self):
+        jobs = plan_jobs([_target("mysql", "a", ["db1", "db2"]), _target("mysql", "a", ["db3"])])
+
+        assert len(jobs) == 1
+        assert jobs[0].db_names == ["db1", "db2", "db3"]
+
+    def test_mysql_fold_is_split_by_max_schemas_per_scan(self):
+        jobs = plan_jobs([_target("mysql", "a", ["db1", "db2", "db3"])], max_schemas_per_scan=2)
+
+        assert [job.db_names for job in jobs] == [["db1", "db2"], ["db3"]]
+
+    def test_mssql_gets_one_job_per_database(self):
+        jobs = plan_jobs([_target("mssql", "b", ["db1", "db2"], db_port=1433)])
+
+        assert [job.db_names for job in jobs] == [["db1"], ["db2"]]
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError, match="oracle"):
+            plan_jobs([_target("oracle", "c", ["db1"])])
+
+    def test_import_loads_no_driver(self):
+        script = "import sys\nimport multi_export\nprint(sorted({'MySQLdb', 'pyodbc'} & set(sys.modules)))\n"
+        repo = os.path.dirname(multi_export.__file__)
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=repo
+        )
+        assert result.stdout.strip() == "[]"
+
+    def test_interleave_by_server(self):
+        jobs = plan_jobs([_target("mssql", "a", ["1", "2", "3"]), _target("mssql", "b", ["4"])])
+
+        assert [job.target["db_host"] for job in interleave_by_server(jobs)] == ["a", "b", "a", "a"]
+
+
+class TestCombinedSheets:
+    def test_database_name_used_when_unique(self):
+        assert list(combined_sheets({"a/shop": {}, "b/crm": {}})) == ["shop", "crm"]
+
+    def test_host_added_for_duplicate_database_names(self):
+        assert list(combined_sheets({"a/shop": {}, "b/shop": {}})) == ["shop@a", "shop@b"]
+
+
+class TestRunExports:
+    def setup_method(self):
+        FakeConnector.active.clear()
+        FakeConnector.peak.clear()
+
+    @patch("mssql_connector.MSSQLConnector", FakeConnector)
+    @patch("mysql_connector.MySQLConnector", FakeConnector)
+    def test_one_workbook_per_database(self, tmp_path):
+        targets = [_target("mysql", "a", ["shop", "crm"]), _target("mssql", "b", ["erp"])]
+
+        results, failures = run_exports(targets, output_dir=str(tmp_path))
+
+        assert failures == {}
+        assert results == {
+            "a/shop": output_path(str(tmp_path), "a", "shop"),
+            "a/crm": output_path(str(tmp_path), "a", "crm"),
+            "b/erp": output_path(str(tmp_path), "b", "erp"),
+        }
+        workbook = openpyxl.load_workbook(results["a/crm"])
+        assert workbook.sheetnames == ["crm"]
+        workbook.close()
+
+    @patch("mssql_connector.MSSQLConnector", FakeConnector)
+    def test_per_server_concurrency_limit(self, tmp_path):
+        targets = [_target("mssql", "a", [f"db{i}" for i in range(6)]), _target("mssql", "b", ["x", "y"])]
+
+        results, _ = run_exports(targets, output_dir=str(tmp_path), max_workers=8, max_per_server=2)
+
+        assert len(results) == 8
+        assert FakeConnector.peak["a"] <= 2
+
+    @patch("mssql_connector.MSSQLConnector", FakeConnector)
+    @patch("mysql_connector.MySQLConnector", FakeConnector)
+    def test_one_connection_per_job_on_its_port(self, tmp_path):
+        FakeConnector.opened = []
+        targets = [_target("mysql", "a", ["shop"], db_port=3307), _target("mysql", "a", ["crm"])]
+
+        run_exports(targets, output_dir=str(tmp_path))
+
+        assert sorted(FakeConnector.opened, key=str) == [("a", 3307, 1), ("a", None, 1)]
+
+    @patch("mssql_connector.MSSQLConnector", FakeConnector)
+    def test_failed_server_does_not_stop_others(self, tmp_path):
+        targets = [_target("mssql", "down", ["db1"]), _target("mssql", "up", ["db2"])]
+
+        results, failures = run_exports(targets, output_dir=str(tmp_path))
+
+        assert list(results) == ["up/db2"]
+        assert list(failures) == ["down/db1"]
+
+    @patch("mssql_connector.MSSQLConnector", FakeConnector)
+    @patch("mysql_connector.MySQLConnector", FakeConnector)
+    def test_catalog(self, tmp_path):
+        targets = [_target("mysql", "a", ["shop", "crm"]), _target("mssql", "b", ["erp"])]
+        catalog = str(tmp_path / "catalog.db")
+
+        run_exports(targets, output_dir=str(tmp_path), catalog=catalog)
+
+        with SchemaCatalog(catalog) as schema_catalog:
+            assert sorted((run[1], run[2]) for run in schema_catalog.runs()) == [
+                ("a", "crm"),
+                ("a", "shop"),
+                ("b", "erp"),
+            ]
+            assert [match.table_name for match in schema_catalog.search("erp_table")] == ["erp_table"] * 2
+
+    @patch("mysql_connector.MySQLConnector", FakeConnector)
+    def test_combined_workbook(self, tmp_path):
+        targets = [_target("mysql", "a", ["shop", "crm"])]
+
+        results, _ = run_exports(targets, output_dir=str(tmp_path), combined=True, combined_file="all.xlsx")
+
+        path = str(tmp_path / "all.xlsx")
+        assert set(results.values()) == {path}
+        workbook = openpyxl.load_workbook(path)
+        assert workbook.sheetnames == ["crm", "shop"]
+        assert workbook["shop"].cell(1, 2).value == "shop_table"
+        workbook.close()
@@ -1,8 +1,10 @@
+import re
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from mysql_connector import MySQLConnector
+from table_filter import TableFilter
 
 
 def _mock_mysqldb():
@@ -24,8 +26,15 @@ class TestMySQLConnectorConnectToDb:
 
         mock_mysqldb.connect.assert_called_once_with(host="localhost", user="user", passwd="pass", db="testdb")
         mock_cursor.execute.assert_called_once_with("select database();")
-        assert connector.connection is mock_conn
-        assert connector.cursor is mock_cursor
+        assert connector.pool.size == 1
+
+    @patch("mysql_connector.MySQLdb")
+    def test_connect_to_port(self, mock_mysqldb):
+        mock_mysqldb.connect.return_value = _mock_mysqldb()[0]
+
+        MySQLConnector("testdb", "user", "pass", "localhost", db_port="3307")
+
+        assert mock_mysqldb.connect.call_args.kwargs["port"] == 3307
 
     @patch("mysql_connector.MySQLdb")
     def test_connect_prints_success_message(self, mock_mysqldb, capsys):
@@ -114,14 +123,17 @@ class TestMySQLConnectorGetSchema:
         assert schema["users"][0]["column_default"] == ""
 
     @patch("mysql_connector.MySQLdb")
-    def test_get_schema_closes_connection(self, mock_mysqldb, mysql_raw_rows):
+    def test_session_reuses_connection_until_closed(self, mock_mysqldb, mysql_raw_rows):
         mock_conn, mock_cursor = _mock_mysqldb()
         mock_cursor.fetchall.return_value = mysql_raw_rows
         mock_mysqldb.connect.return_value = mock_conn
 
-        connector = MySQLConnector("testdb", "user", "pass", "localhost")
-        connector.get_schema()
+        with MySQLConnector("testdb", "user", "pass", "localhost") as connector:
+            connector.get_schema()
+            connector.get_schema(tables=["users"])
+            mock_conn.close.assert_not_called()
 
+        mock_mysqldb.connect.assert_called_once()
         mock_conn.close.assert_called_once()
 
     @patch("mysql_connector.MySQLdb")
@@ -164,3 +176,356 @@ class TestMySQLConnectorGetSchema:
 
         calls = mock_cursor.execute.call_args_list
         assert calls[1][0][0] == custom_query
+
+
+class TestMySQLConnectorStreaming:
+    @patch("mysql_connector.MySQLdb")
+    def test_iter_schema_uses_server_side_cursor(self, mock_mysqldb, mysql_raw_rows):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchmany.side_effect = [mysql_raw_rows, []]
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        tables = list(connector.iter_schema(batch_size=100))
+
+        mock_conn.cursor.assert_called_with(mock_mysqldb.cursors.SSCursor)
+        mock_cursor.fetchmany.assert_called_with(100)
+        mock_cursor.fetchall.assert_not_called()
+        assert [name for name, _ in tables] == ["users", "orders"]
+        assert tables[0][1][1]["column_name"] == "email"
+
+    @patch("mysql_connector.MySQLdb")
+    def test_iter_schema_returns_connection_when_exhausted(self, mock_mysqldb, mysql_raw_rows):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchmany.side_effect = [mysql_raw_rows, []]
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        list(connector.iter_schema())
+        mock_conn.close.assert_not_called()
+        connector.query_table_fingerprints()
+        connector.close()
+
+        mock_mysqldb.connect.assert_called_once()
+        mock_conn.close.assert_called_once()
+
+    @patch("mysql_connector.MySQLdb")
+    def test_abandoned_stream_closes_connection(self, mock_mysqldb, mysql_raw_rows):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchmany.side_effect = [mysql_raw_rows, []]
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        tables = connector.iter_schema()
+        next(tables)
+        tables.close()
+
+        mock_conn.close.assert_called_once()
+        assert connector.pool.size == 0
+
+
+class TestMySQLConnectorIncremental:
+    @patch("mysql_connector.MySQLdb")
+    def test_query_table_fingerprints(self, mock_mysqldb):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = [("orders", "2024-01-01 00:00:00", None)]
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        fingerprints = connector.query_table_fingerprints()
+
+        assert fingerprints == {"orders": "2024-01-01 00:00:00|None"}
+        query, params = mock_cursor.execute.call_args[0]
+        assert "information_schema.TABLES" in query
+        assert params == ("testdb",)
+        mock_conn.close.assert_not_called()
+
+    @patch("mysql_connector.MySQLdb")
+    def test_get_schema_restricted_to_tables(self, mock_mysqldb, mysql_raw_rows):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = mysql_raw_rows
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        connector.get_schema(tables=["users", "orders"])
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "table_name IN (%s, %s)" in query
+        assert params == ("testdb", "users", "orders")
+
+
+class TestMySQLConnectorTableFilter:
+    @patch("mysql_connector.MySQLdb")
+    def test_patterns_in_catalog_query(self, mock_mysqldb):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = []
+        mock_mysqldb.connect.return_value = mock_conn
+
+        table_filter = TableFilter(include=["billing_*", "re:^crm_"], exclude=["*_tmp"])
+        connector = MySQLConnector("testdb", "user", "pass", "localhost", table_filter=table_filter)
+        connector.get_schema(tables=["billing_a"])
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "AND (table_name LIKE %s ESCAPE '!' OR table_name REGEXP %s)" in query
+        assert "AND table_name NOT LIKE %s ESCAPE '!' AND table_name IN (%s)" in query
+        assert params == ("testdb", "billing!_%", "^crm_", "%!_tmp", "billing_a")
+
+    @pytest.mark.parametrize(("server_info", "pattern"), [("5.7.44-log", "^crm_"), ("8.0.36", "(?i)^crm_")])
+    @patch("mysql_connector.MySQLdb")
+    def test_regex_ignores_case_per_server_version(self, mock_mysqldb, server_info, pattern):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = []
+        mock_conn.get_server_info.return_value = server_info
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector(
+            "testdb", "user", "pass", "localhost", table_filter=TableFilter(include=["re:^crm_"])
+        )
+        connector.get_schemas(["testdb"])
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "table_name REGEXP %s" in query
+        assert params == ("testdb", pattern)
+
+    @patch("mysql_connector.MySQLdb")
+    def test_fingerprints_and_multi_schema_filtered(self, mock_mysqldb):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = []
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("crm", "user", "pass", "localhost", table_filter=TableFilter(exclude=["*_tmp"]))
+        connector.query_table_fingerprints()
+        assert mock_cursor.execute.call_args[0][1] == ("crm", "%!_tmp")
+        connector.get_schemas(["crm", "shop"])
+        query, params = mock_cursor.execute.call_args[0]
+        assert "table_schema IN (%s, %s) AND table_name NOT LIKE %s ESCAPE '!'" in query
+        assert params == ("crm", "shop", "%!_tmp")
+
+
+class TestMySQLConnectorMultiSchema:
+    @patch("mysql_connector.MySQLdb")
+    def test_get_schemas_single_scan(self, mock_mysqldb):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = [
+            ("crm", "leads", 1, "id", "int", None, "NO", "", "", None),
+            ("shop", "orders", 1, "id", "int", None, "NO", "", "", None),
+            ("shop", "users", 1, "id", "int", None, "NO", "", "", None),
+        ]
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("crm", "user", "pass", "localhost")
+        schemas = connector.get_schemas(["crm", "shop", "empty"])
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert "table_schema IN (%s, %s, %s)" in query
+        assert params == ("crm", "shop", "empty")
+        assert list(schemas["shop"]) == ["orders", "users"]
+        assert list(schemas["crm"]) == ["leads"]
+        assert schemas["empty"] == {}
+        mock_conn.close.assert_not_called()
+
+    @patch("mysql_connector.MySQLdb")
+    def test_get_schemas_empty_result(self, mock_mysqldb):
+        mock_conn, mock_cursor = _mock_mysqldb()
+        mock_cursor.fetchall.return_value = []
+        mock_mysqldb.connect.return_value = mock_conn
+
+        connector = MySQLConnector("crm", "user", "pass", "localhost")
+
+        assert connector.get_schemas(["crm", "shop"]) == {"crm": {}, "shop": {}}
+
+
+def _detail_connections(mock_mysqldb, rows_by_catalog):
+    """Give every connection its own cursor that answers by the catalog view it queries."""
+    connections = []
+
+    def connect(**_kwargs):
+        conn, cursor = _mock_mysqldb()
+
+        def fetchall():
+            query = cursor.execute.call_args[0][0]
+            for marker, rows in rows_by_catalog.items():
+                if marker in query:
+                    return rows
+            return []
+
+        cursor.fetchall.side_effect = fetchall
+        connections.append((conn, cursor))
+        return conn
+
+    mock_mysqldb.connect.side_effect = connect
+    return connections
+
+
+class TestMySQLConnectorDetails:
+    @patch("mysql_connector.MySQLdb")
+    def test_get_schema_with_details(self, mock_mysqldb, mysql_raw_rows):
+        connections = _detail_connections(
+            mock_mysqldb,
+            {
+                "information_schema.COLUMNS": mysql_raw_rows,
+                "information_schema.STATISTICS": [("users", "PRIMARY", 1, "BTREE", "id")],
+                "referenced_table_name IS NOT NULL": [("orders", "fk_user", "users", "user_id", "id")],
+                "information_schema.TABLE_CONSTRAINTS": [("users", "PRIMARY", "PRIMARY KEY", "id")],
+                "table_collation": [("users", "User accounts", "InnoDB", "utf8mb4_general_ci", 1200, 16384, 32768)],
+            },
+        )
+
+        with MySQLConnector("testdb", "user", "pass", "localhost") as connector:
+            schema = connector.get_schema(details=True)
+
+        assert [column["column_name"] for column in schema["users"]] == ["id", "email"]
+        assert schema["users"].indexes[0].name == "PRIMARY"
+        assert schema["users"].constraints[0].constraint_type == "PRIMARY KEY"
+        assert schema["orders"].foreign_keys[0].referenced_table == "users"
+        assert schema["users"].info.as_dict() == {
+            "comment": "User accounts",
+            "engine": "InnoDB",
+            "collation": "utf8mb4_general_ci",
+            "estimated_rows": 1200,
+            "data_size": 16384,
+            "index_size": 32768,
+        }
+        # At most one pooled connection per concurrent catalog query, all closed with the session.
+        assert 1 <= len(connections) <= 5
+        assert all(conn.close.called for conn, _ in connections)
+
+    @patch("mysql_connector.MySQLdb")
+    def test_detail_queries_restricted_to_tables(self, mock_mysqldb):
+        connections = _detail_connections(mock_mysqldb, {})
+
+        MySQLConnector("testdb", "user", "pass", "localhost").get_schema(tables=["users"], details=True)
+
+        queries = [
+            call[0]
+            for _, cursor in connections
+            for call in cursor.execute.call_args_list
+            if call[0][0] != "select database();"
+        ]
+        assert len(queries) == 5
+        assert all(params == ("testdb", "users") for _, params in queries)
+        assert any("tc.table_name IN (%s)" in query for query, _ in queries)
+
+
+class _CatalogCursor:
+    """Cursor over a fake catalog of five tables that answers the listing and chunked column scans."""
+
+    tables = ["a", "b", "c", "d", "e"]
+    queries = []
+
+    def __init__(self, *_args):
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        if "information_schema.TABLES" in query:
+            self.rows = [(table, None, None) for table in self.tables]
+        else:
+            self.rows = [
+                (table, ordinal, f"c{ordinal}", "int", None, "NO", "", "", None)
+                for table in params[1:]
+                for ordinal in (1, 2)
+            ]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return ("testdb",)
+
+    def close(self):
+        pass
+
+
+class TestMySQLConnectorChunkedScan:
+    @patch("mysql_connector.MySQLdb")
+    def test_chunks_run_with_timeout_and_merge_in_order(self, mock_mysqldb):
+        _CatalogCursor.queries = []
+        mock_mysqldb.connect.return_value.cursor.side_effect = _CatalogCursor
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost", chunk_tables=2, chunk_timeout=1.5)
+        schema = connector.get_schema()
+
+        assert list(schema) == ["a", "b", "c", "d", "e"]
+        assert [column.column_name for column in schema["e"]] == ["c1", "c2"]
+        chunks = [query for query in _CatalogCursor.queries if "information_schema.COLUMNS" in query]
+        assert len(chunks) == 3
+        assert all("SELECT /*+ MAX_EXECUTION_TIME(1500) */" in query for query in chunks)
+
+    @patch("mysql_connector.MySQLdb")
+    def test_chunked_scan_restricted_to_tables(self, mock_mysqldb):
+        mock_mysqldb.connect.return_value.cursor.side_effect = _CatalogCursor
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost", chunk_tables=10)
+
+        assert list(connector.get_schema(tables=["d", "b"])) == ["b", "d"]
+        assert list(connector.get_schema(details=True)) == ["a", "b", "c", "d", "e"]
+
+
+class _SampleCursor:
+    """Cursor of a table with integer keys 1..1000 and about 1000 rows."""
+
+    queries = []
+
+    def __init__(self, *_):
+        self.rows = []
+
+    def execute(self, query, params=()):
+        _SampleCursor.queries.append((query, params))
+        if "information_schema.TABLES" in query:
+            self.rows = [(1000, "id")]
+        elif "MIN(`id`)" in query:
+            self.rows = [(1, 1000)]
+        elif "WHERE `id` >= %s" in query:
+            start, limit = params
+            self.rows = [(key, f"user{key}") for key in range(start, min(start + limit, 1001))]
+        else:
+            self.rows = [("testdb",)] if "database()" in query else []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class TestMySQLConnectorSampling:
+    @patch("mysql_connector.MySQLdb")
+    def test_primary_key_ranges_within_the_time_left(self, mock_mysqldb):
+        _SampleCursor.queries = []
+        mock_mysqldb.connect.return_value.cursor.side_effect = _SampleCursor
+        columns = [{"column_name": "id", "column_type": "int(11)"}, {"column_name": "name", "column_type": "varchar"}]
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        with patch("mysql_connector.time") as clock:
+            clock.monotonic.side_effect = [100, 100, 100.5, 101, 101, 101.5, 102, 102, 102.5]
+            rows, total_rows = connector.sample_table("users", columns, 100, timeout=2.5)
+
+        assert total_rows == 1000
+        keys = [key for key, _ in rows]
+        assert 0 < len(keys) <= 75 and keys == sorted(set(keys))
+        hints = [re.search(r"MAX_EXECUTION_TIME\((\d+)\)", query)[1] for query, _ in _SampleCursor.queries[1:]]
+        assert hints == ["2500", "2000", "1500", "1000", "500"]
+        assert sum("WHERE `id` >= %s ORDER BY `id` LIMIT %s" in query for query, _ in _SampleCursor.queries) == 3
+
+    @patch("mysql_connector.MySQLdb")
+    def test_no_time_left(self, mock_mysqldb):
+        mock_mysqldb.connect.return_value.cursor.side_effect = _SampleCursor
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        with patch("mysql_connector.time") as clock, pytest.raises(TimeoutError):
+            clock.monotonic.side_effect = [100, 101.5]
+            connector.sample_table("users", [{"column_name": "id", "column_type": "int"}], 100, timeout=1)
+
+    @patch("mysql_connector.MySQLdb")
+    def test_small_table_reads_first_rows(self, mock_mysqldb):
+        _SampleCursor.queries = []
+        mock_mysqldb.connect.return_value.cursor.side_effect = _SampleCursor
+
+        connector = MySQLConnector("testdb", "user", "pass", "localhost")
+        connector.sample_table("users", [{"column_name": "name", "column_type": "varchar"}], 5000)
+
+        assert _SampleCursor.queries[-1] == ("SELECT `name` FROM `users` LIMIT %s", (5000,))
+        assert not any("MAX_EXECUTION_TIME" in query for query, _ in _SampleCursor.queries)
@@ -0,0 +1,72 @@
+import io
+import zipfile
+
+import openpyxl
+import pytest
+
+from generate import ExportDataDictionary
+from parallel_workbook import deflate, generate_xlsx_parallel, write_zip
+from schema import Column, ForeignKey, Index, Table, TableInfo
+from synthetic_schema import SyntheticSchema
+
+
+def sheet_contents(path) -> list:
+    """Sheet names, cell values, bold cells, column widths and selected tabs of a workbook."""
+    workbook = openpyxl.load_workbook(path)
+    contents = [
+        (
+            sheet.title,
+            [[cell.value for cell in row] for row in sheet.iter_rows()],
+            [cell.coordinate for row in sheet.iter_rows() for cell in row if cell.font.b],
+            {column: dimension.width for column, dimension in sheet.column_dimensions.items()},
+            sheet.sheet_view.tabSelected,
+        )
+        for sheet in workbook.worksheets
+    ]
+    workbook.close()
+    return contents
+
+
+@pytest.fixture
+def schema():
+    schema = SyntheticSchema(tables=40, columns_per_table=6, prefixes=3).schema()
+    schema["app0000_orders"] = Table(
+        [Column(1, "id", "bigint", is_nullable="NO", extra="PRI"), Column(2, "total", "decimal")],
+        indexes=[Index("PRIMARY", ["id"], True, "BTREE")],
+        foreign_keys=[ForeignKey("fk_customer", ["id"], "customers", ["id"])],
+        info=TableInfo("Orders", "InnoDB", "utf8mb4_bin", 120, 16384, 0),
+    )
+    return schema
+
+
+class TestGenerateXlsxParallel:
+    def test_same_workbook_as_generate_xlsx(self, tmp_path, schema):
+        expected = tmp_path / "single.xlsx"
+        workbook = ExportDataDictionary(str(expected), max_rows=60)
+        workbook.generate_xlsx(schema)
+        output = tmp_path / "parallel.xlsx"
+        sheets = generate_xlsx_parallel(str(output), schema, max_workers=2, max_rows=60)
+        with zipfile.ZipFile(output) as archive:
+            assert archive.testzip() is None
+        assert sheet_contents(output) == sheet_contents(expected)
+        assert list(sheets) == [sheet[0] for sheet in sheet_contents(expected)]
+        assert sum(sheets.values()) == len(schema)
+
+    def test_empty_schema(self, tmp_path):
+        output = tmp_path / "empty.xlsx"
+        assert generate_xlsx_parallel(str(output), {}, max_workers=1) == {}
+        assert openpyxl.load_workbook(output).sheetnames == ["Sheet1"]
+
+
+class TestWriteZip:
+    def test_readable_by_zipfile(self):
+        output = io.BytesIO()
+        write_zip(output, [("a.xml", deflate(b"<a/>" * 100)), ("dir/b.xml", deflate(b""))])
+        with zipfile.ZipFile(output) as archive:
+            assert archive.testzip() is None
+            assert archive.namelist() == ["a.xml", "dir/b.xml"]
+            assert archive.read("a.xml") == b"<a/>" * 100
+
+    def test_rejects_entries_needing_zip64(self):
+        with pytest.raises(ValueError, match="zip64"):
+            write_zip(io.BytesIO(), [("huge.xml", (0, 1 << 32, b""))])
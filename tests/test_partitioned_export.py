@@ -0,0 +1,89 @@
+import json
+import os
+
+import openpyxl
+
+from grouping import table_schema
+from partitioned_export import (
+    MANIFEST_FILE,
+    export_partitioned,
+    partition_file_names,
+    partition_schema,
+    render_partition,
+)
+
+
+class TestPartitionSchema:
+    def test_groups_by_prefix_regardless_of_order(self, multi_prefix_schema):
+        data = {name: multi_prefix_schema[name] for name in ["app_users", "blog_posts", "app_roles"]}
+
+        partitions = partition_schema(data)
+
+        assert {name: list(tables) for name, tables in partitions.items()} == {
+            "app": ["app_users", "app_roles"],
+            "blog": ["blog_posts"],
+        }
+
+    def test_groups_by_schema(self, multi_prefix_schema):
+        columns = multi_prefix_schema["app_users"]
+
+        partitions = partition_schema({"dbo.a": columns, "sales.b": columns}, group_by=table_schema)
+
+        assert list(partitions) == ["dbo", "sales"]
+
+
+class TestPartitionFileNames:
+    def test_unsafe_characters_replaced(self):
+        assert partition_file_names(["a/b c"]) == {"a/b c": "a_b_c.xlsx"}
+
+    def test_case_insensitive_collisions_deduplicated(self):
+        assert partition_file_names(["App", "app", "a?p"]) == {
+            "App": "App.xlsx",
+            "app": "app_2.xlsx",
+            "a?p": "a_p.xlsx",
+        }
+
+
+class TestRenderPartition:
+    def test_manifest_entry(self, tmp_path, single_table_schema):
+        path = str(tmp_path / "users.xlsx")
+
+        entry = render_partition(path, "users", single_table_schema)
+
+        assert entry["file"] == "users.xlsx"
+        assert entry["sheet"] == "users"
+        assert entry["tables"] == [{"table": "users", "sheet": "users", "row": 1, "columns": 2}]
+        assert entry["rows"] == 7
+        assert entry["bytes"] == os.path.getsize(path)
+
+    def test_long_partition_name_truncated_for_sheet(self, tmp_path, single_table_schema):
+        entry = render_partition(str(tmp_path / "long.xlsx"), "p" * 40, single_table_schema)
+
+        assert entry["partition"] == "p" * 40
+        assert entry["sheet"] == "p" * 31
+
+
+class TestExportPartitioned:
+    def test_writes_workbook_per_partition_and_manifest(self, tmp_path, multi_prefix_schema):
+        output_dir = str(tmp_path / "out")
+
+        manifest = export_partitioned(multi_prefix_schema, output_dir, max_workers=2)
+
+        assert [entry["partition"] for entry in manifest["partitions"]] == ["app", "blog"]
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+            assert json.load(manifest_file) == manifest
+
+        blog = manifest["partitions"][1]
+        assert [table["table"] for table in blog["tables"]] == ["blog_posts", "blog_comments"]
+        assert [table["row"] for table in blog["tables"]] == [1, 7]
+
+        workbook = openpyxl.load_workbook(os.path.join(output_dir, blog["file"]))
+        assert workbook.sheetnames == ["blog"]
+        ws = workbook["blog"]
+        assert ws.cell(blog["tables"][1]["row"], 2).value == "blog_comments"
+        workbook.close()
+
+    def test_empty_schema(self, tmp_path):
+        manifest = export_partitioned({}, str(tmp_path), max_workers=1)
+
+        assert manifest == {"partitions": []}
@@ -0,0 +1,87 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from pool import ConnectionPool, PoolClosedError
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def pool(opened):
+    def connect():
+        connection = MagicMock()
+        opened.append(connection)
+        return connection
+
+    return ConnectionPool(connect, max_size=2)
+
+
+class TestConnectionPool:
+    def test_reuses_released_connection(self, pool, opened):
+        first = pool.acquire()
+        pool.release(first)
+        assert pool.acquire() is first
+        assert len(opened) == 1
+
+    def test_opens_up_to_max_size(self, pool, opened):
+        first = pool.acquire()
+        second = pool.acquire()
+        assert first is not second
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.01)
+        assert len(opened) == 2
+
+    def test_waits_for_release(self, pool):
+        first = pool.acquire()
+        pool.acquire()
+        threading.Timer(0.05, pool.release, (first,)).start()
+        assert pool.acquire(timeout=5) is first
+
+    def test_broken_connection_is_replaced(self, pool, opened):
+        with pytest.raises(RuntimeError), pool.connection():
+            raise RuntimeError("lost connection")
+        opened[0].close.assert_called_once()
+        assert pool.acquire() is opened[1]
+
+    def test_recycles_old_connections(self, pool, opened):
+        pool.max_age = 0
+        pool.release(pool.acquire())
+        assert pool.acquire() is opened[1]
+        opened[0].close.assert_called_once()
+
+    def test_health_check_after_idle(self, pool, opened):
+        pool.check_after = 0
+        pool.release(pool.acquire())
+        opened[0].cursor.return_value.execute.side_effect = OSError("server has gone away")
+        assert pool.acquire() is opened[1]
+        opened[0].close.assert_called_once()
+
+    def test_healthy_idle_connection_is_kept(self, pool, opened):
+        pool.check_after = 0
+        pool.release(pool.acquire())
+        assert pool.acquire() is opened[0]
+        opened[0].cursor.return_value.execute.assert_called_once_with("SELECT 1")
+
+    def test_close(self, pool, opened):
+        idle = pool.acquire()
+        busy = pool.acquire()
+        pool.release(idle)
+        pool.close()
+        idle.close.assert_called_once()
+        busy.close.assert_not_called()
+        pool.release(busy)
+        busy.close.assert_called_once()
+        with pytest.raises(PoolClosedError):
+            pool.acquire()
+        assert pool.size == 0 and len(opened) == 2
+
+    def test_failed_connect_frees_the_slot(self):
+        pool = ConnectionPool(MagicMock(side_effect=[ConnectionError("refused"), MagicMock()]), max_size=1)
+        with pytest.raises(ConnectionError):
+            pool.acquire()
+        assert pool.acquire(timeout=0.01) is not None
@@ -0,0 +1,293 @@
+import gc
+import pickle
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+import schema
+from pool import ConnectionPool
+from schema import (
+    COLUMN_FIELDS,
+    Column,
+    Table,
+    build_schema,
+    column_from_dict,
+    column_from_row,
+    column_to_dict,
+    fetch_all,
+    fetch_chunked,
+    fetch_concurrently,
+    gc_paused,
+    iter_rows,
+    iter_tables,
+    merge_details,
+)
+
+
+class TestColumn:
+    def test_has_no_instance_dict(self):
+        column = Column(1, "id", "int")
+
+        assert not hasattr(column, "__dict__")
+
+    def test_repeated_strings_are_interned(self):
+        first = Column(1, "".join(["i", "d"]), "".join(["in", "t"]), "", "".join(["N", "O"]), "".join(["P", "RI"]))
+        second = Column(1, "".join(["i", "d"]), "".join(["in", "t"]), "", "".join(["N", "O"]), "".join(["P", "RI"]))
+
+        assert first.column_name is second.column_name
+        assert first.column_type is second.column_type
+        assert first.is_nullable is second.is_nullable
+        assert first.extra is second.extra
+
+    def test_item_access_and_keys(self):
+        column = Column(1, "id", "int", "", "NO", "PRI", "Primary key", "")
+
+        assert column["column_comment"] == "Primary key"
+        assert tuple(column.keys()) == COLUMN_FIELDS
+        with pytest.raises(KeyError):
+            column["missing"]  # pylint: disable=pointless-statement
+
+    def test_equals_equivalent_dict(self, single_table_schema):
+        as_dict = single_table_schema["users"][0]
+
+        assert column_from_dict(as_dict) == as_dict
+        assert column_to_dict(column_from_dict(as_dict)) == as_dict
+
+    def test_none_values_stored_as_empty_strings(self):
+        column = Column(1, "id", "int", None, None, None, None, None)
+
+        assert column.as_dict() == {
+            "ordinal": 1,
+            "column_name": "id",
+            "column_type": "int",
+            "max_length": "",
+            "is_nullable": "",
+            "extra": "",
+            "column_comment": "",
+            "column_default": "",
+        }
+
+    def test_pickle_round_trip(self):
+        column = Column(1, "id", "int", 11, "NO", "PRI", "Primary key", "0")
+
+        assert pickle.loads(pickle.dumps(column)) == column  # noqa: S301
+
+
+class TestGcPaused:
+    def test_restores_enabled_collector(self):
+        assert gc.isenabled()
+        with gc_paused():
+            assert not gc.isenabled()
+        assert gc.isenabled()
+
+    def test_keeps_disabled_collector_disabled(self):
+        gc.disable()
+        try:
+            with gc_paused():
+                pass
+            assert not gc.isenabled()
+        finally:
+            gc.enable()
+
+
+class TestIterRows:
+    def test_reads_in_batches_until_exhausted(self):
+        cursor = MagicMock()
+        cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        assert list(iter_rows(cursor, batch_size=2)) == [(1,), (2,), (3,)]
+        cursor.fetchmany.assert_called_with(2)
+        assert cursor.fetchmany.call_count == 3
+
+    def test_empty_cursor(self):
+        cursor = MagicMock()
+        cursor.fetchmany.return_value = []
+
+        assert list(iter_rows(cursor)) == []
+
+
+class TestColumnFromRow:
+    def test_none_values_become_empty_strings(self):
+        column = column_from_row(("users", 1, "id", "int", None, "NO", "PRI", None, None))
+
+        assert column["max_length"] == ""
+        assert column["column_comment"] == ""
+        assert column["column_default"] == ""
+        assert column["column_name"] == "id"
+
+    def test_present_values_preserved(self):
+        column = column_from_row(("users", 2, "email", "varchar", 255, "YES", "", "User email", "x"))
+
+        assert isinstance(column, Column)
+        assert column["ordinal"] == 2
+        assert column["max_length"] == 255
+        assert column["column_comment"] == "User email"
+        assert column["column_default"] == "x"
+
+
+class TestIterTables:
+    def test_groups_consecutive_rows(self, mysql_raw_rows):
+        tables = list(iter_tables(mysql_raw_rows))
+
+        assert [name for name, _ in tables] == ["users", "orders"]
+        assert [len(columns) for _, columns in tables] == [2, 1]
+
+    def test_is_lazy(self, mysql_raw_rows):
+        consumed = []
+
+        def rows():
+            for row in mysql_raw_rows:
+                consumed.append(row)
+                yield row
+
+        tables = iter_tables(rows())
+        name, _ = next(tables)
+
+        assert name == "users"
+        # Only the users rows and the first orders row have been read.
+        assert len(consumed) == 3
+
+
+class TestBuildSchema:
+    def test_builds_dict(self, mysql_raw_rows):
+        schema = build_schema(mysql_raw_rows)
+
+        assert list(schema) == ["users", "orders"]
+        assert schema["users"][1]["max_length"] == 255
+
+    def test_merges_non_contiguous_table(self, mysql_raw_rows):
+        rows = mysql_raw_rows + [("users", 3, "name", "varchar(50)", 50, "YES", "", "", None)]
+        schema = build_schema(rows)
+
+        assert [c["column_name"] for c in schema["users"]] == ["id", "email", "name"]
+
+    def test_empty(self):
+        assert build_schema([]) == {}
+
+
+class TestMergeDetails:
+    def test_attaches_details_to_tables(self):
+        schema = build_schema([("orders", 1, "id", "int"), ("orders", 2, "user_id", "int"), ("users", 1, "id", "int")])
+        merge_details(
+            schema,
+            index_rows=[
+                ("orders", "ix_orders_user", 0, "BTREE", "user_id"),
+                ("orders", "ix_orders_user", 0, "BTREE", "id"),
+                ("users", "PRIMARY", 1, "BTREE", "id"),
+            ],
+            foreign_key_rows=[("orders", "fk_orders_user", "users", "user_id", "id")],
+            constraint_rows=[("orders", "PRIMARY", "PRIMARY KEY", "id"), ("orders", "ck_positive", "CHECK", "")],
+        )
+
+        orders = schema["orders"]
+        assert isinstance(orders, Table)
+        assert [column["column_name"] for column in orders] == ["id", "user_id"]
+        assert [index.as_dict() for index in orders.indexes] == [
+            {"name": "ix_orders_user", "columns": ["user_id", "id"], "unique": False, "index_type": "BTREE"}
+        ]
+        assert orders.foreign_keys[0].as_dict() == {
+            "name": "fk_orders_user",
+            "columns": ["user_id"],
+            "referenced_table": "users",
+            "referenced_columns": ["id"],
+        }
+        assert [(c.name, c.constraint_type, c.columns) for c in orders.constraints] == [
+            ("PRIMARY", "PRIMARY KEY", ["id"]),
+            ("ck_positive", "CHECK", []),
+        ]
+        assert schema["users"].indexes[0].unique
+
+    def test_table_info(self):
+        schema = build_schema([("users", 1, "id", "int"), ("v_users", 1, "id", "int")])
+        merge_details(
+            schema,
+            table_rows=[
+                ("v_users", "VIEW", None, None, None, None, None),
+                ("users", "Accounts", "InnoDB", "utf8mb4_bin", 10, 16384, 0),
+            ],
+        )
+        assert schema["users"].info.as_dict() == {
+            "comment": "Accounts",
+            "engine": "InnoDB",
+            "collation": "utf8mb4_bin",
+            "estimated_rows": 10,
+            "data_size": 16384,
+            "index_size": 0,
+        }
+        assert schema["v_users"].info.estimated_rows is None
+        assert schema["v_users"].info.engine == ""
+
+    def test_ignores_unknown_tables(self):
+        schema = {"users": [Column(1, "id", "int")]}
+        merge_details(schema, index_rows=[("gone", "PRIMARY", 1, "BTREE", "id")])
+        assert not isinstance(schema["users"], Table)
+
+    def test_table_pickle_round_trip(self):
+        table = Table([Column(1, "id", "int")], constraints=[])
+        merge_details({"t": table}, constraint_rows=[("t", "PRIMARY", "PRIMARY KEY", "id")])
+        copy = pickle.loads(pickle.dumps(table))  # noqa: S301
+
+        assert copy == table
+        assert copy.constraints[0].columns == ["id"]
+
+
+class TestFetchConcurrently:
+    def test_queries_share_the_pool(self):
+        connections = []
+
+        def connect():
+            connection = MagicMock()
+            cursor = connection.cursor.return_value
+            cursor.fetchall.side_effect = lambda: [(cursor.execute.call_args[0][0],)]
+            connections.append(connection)
+            return connection
+
+        with ConnectionPool(connect, max_size=2) as pool:
+            results = fetch_concurrently(pool, {"columns": ("q1", ()), "indexes": ("q2", ()), "keys": ("q3", ())})
+            assert 1 <= pool.size <= 2
+
+        assert results == {"columns": [("q1",)], "indexes": [("q2",)], "keys": [("q3",)]}
+        assert all(connection.close.called for connection in connections)
+
+    def test_fetch_all_returns_connection(self):
+        connection = MagicMock()
+        connection.cursor.return_value.fetchall.return_value = [("users",)]
+        pool = ConnectionPool(lambda: connection)
+
+        assert fetch_all(pool, "SELECT 1") == [("users",)]
+        assert fetch_all(pool, "SELECT 2") == [("users",)]
+        assert pool.size == 1
+        connection.close.assert_not_called()
+
+
+class TestFetchChunked:
+    @staticmethod
+    def make_query(names):
+        return "SELECT", tuple(names)
+
+    def test_chunks_merged_in_listing_order(self):
+        def fetch(_pool, _query, names):
+            # Later chunks finish first.
+            time.sleep(0.01 * (5 - len(names[0])))
+            return [(name, ordinal) for name in names for ordinal in (1, 2)]
+
+        names = ["a", "bb", "ccc", "dddd", "eeeee"]
+        rows = fetch_chunked(ConnectionPool(MagicMock, max_size=3), names, self.make_query, 2, fetch=fetch)
+        assert rows == [(name, ordinal) for name in names for ordinal in (1, 2)]
+
+    def test_failed_chunk_retried_in_halves(self, monkeypatch):
+        monkeypatch.setattr(schema, "CHUNK_RETRY_DELAY", 0)
+        calls = []
+
+        def fetch(_pool, _query, names):
+            calls.append(names)
+            if len(names) > 2:
+                raise TimeoutError("maximum statement execution time exceeded")
+            return [(name,) for name in names]
+
+        rows = fetch_chunked(ConnectionPool(MagicMock), list("abcd"), self.make_query, 4, fetch=fetch)
+        assert rows == [("a",), ("b",), ("c",), ("d",)]
+        assert calls == [tuple("abcd"), tuple("ab"), tuple("cd")]
+        with pytest.raises(TimeoutError):
+            fetch_chunked(ConnectionPool(MagicMock), list("abcdefgh"), self.make_query, 8, retries=1, fetch=fetch)
@@ -0,0 +1,124 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from schema_cache import MAX_INCREMENTAL_TABLES, SchemaCache, schema_fingerprint
+
+
+def _column(name):
+    return {
+        "ordinal": 1,
+        "column_name": name,
+        "column_type": "int",
+        "max_length": "",
+        "is_nullable": "NO",
+        "extra": "",
+        "column_comment": "",
+        "column_default": "",
+    }
+
+
+def _connector(fingerprints, schema):
+    connector = MagicMock()
+    connector.query_table_fingerprints.return_value = fingerprints
+    connector.get_schema.side_effect = lambda tables=None: {
+        table: columns for table, columns in schema.items() if tables is None or table in tables
+    }
+    return connector
+
+
+def _seed(cache):
+    cache.refresh(_connector({"orders": "t1", "users": "t1"}, {"orders": [_column("id")], "users": [_column("id")]}))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SchemaCache(str(tmp_path / "cache"), "db.example.com", "shop")
+
+
+class TestSchemaFingerprint:
+    def test_independent_of_order(self):
+        assert schema_fingerprint({"a": "1", "b": "2"}) == schema_fingerprint({"b": "2", "a": "1"})
+
+    def test_changes_with_table_fingerprint(self):
+        assert schema_fingerprint({"a": "1"}) != schema_fingerprint({"a": "2"})
+
+
+class TestSchemaCache:
+    def test_cache_file_keyed_by_host_and_database(self, cache):
+        assert cache.path.endswith("db.example.com_shop.json")
+
+    def test_first_refresh_queries_everything(self, cache):
+        schema = {"orders": [_column("id")], "users": [_column("id")]}
+        connector = _connector({"orders": "t1", "users": "t1"}, schema)
+
+        result, changed = cache.refresh(connector)
+
+        assert changed is True
+        assert result == schema
+        connector.get_schema.assert_called_once_with(tables=["orders", "users"])
+
+    def test_unchanged_schema_skips_column_query(self, cache):
+        schema = {"orders": [_column("id")], "users": [_column("id")]}
+        cache.refresh(_connector({"orders": "t1", "users": "t1"}, schema))
+
+        connector = _connector({"orders": "t1", "users": "t1"}, schema)
+        result, changed = cache.refresh(connector)
+
+        assert changed is False
+        assert result == schema
+        connector.get_schema.assert_not_called()
+        # The connector is a session owned by the caller, which closes it.
+        connector.close.assert_not_called()
+
+    def test_only_changed_tables_are_requeried(self, cache):
+        _seed(cache)
+
+        new_schema = {"orders": [_column("id")], "users": [_column("id"), _column("email")]}
+        connector = _connector({"orders": "t1", "users": "t2"}, new_schema)
+        result, changed = cache.refresh(connector)
+
+        assert changed is True
+        connector.get_schema.assert_called_once_with(tables=["users"])
+        assert [c["column_name"] for c in result["users"]] == ["id", "email"]
+        assert list(result) == ["orders", "users"]
+
+    def test_new_and_dropped_tables(self, cache):
+        _seed(cache)
+
+        connector = _connector(
+            {"accounts": "t3", "users": "t1"}, {"accounts": [_column("id")], "users": [_column("id")]}
+        )
+        result, changed = cache.refresh(connector)
+
+        assert changed is True
+        connector.get_schema.assert_called_once_with(tables=["accounts"])
+        assert list(result) == ["accounts", "users"]
+
+    def test_dropped_table_only_needs_no_query(self, cache):
+        _seed(cache)
+
+        connector = _connector({"users": "t1"}, {})
+        result, changed = cache.refresh(connector)
+
+        assert changed is True
+        assert list(result) == ["users"]
+        connector.get_schema.assert_not_called()
+
+    def test_many_changes_fall_back_to_full_scan(self, cache):
+        tables = {f"t{i:05d}": "v1" for i in range(MAX_INCREMENTAL_TABLES + 1)}
+        connector = _connector(tables, {table: [_column("id")] for table in tables})
+
+        cache.refresh(connector)
+
+        connector.get_schema.assert_called_once_with()
+
+    def test_save_writes_fingerprints(self, cache):
+        cache.refresh(_connector({"users": "t1"}, {"users": [_column("id")]}))
+
+        with open(cache.path, encoding="utf-8") as cache_file:
+            stored = json.load(cache_file)
+        assert stored["db_name"] == "shop"
+        assert stored["fingerprint"] == schema_fingerprint({"users": "t1"})
+        assert stored["tables"]["users"]["fingerprint"] == "t1"
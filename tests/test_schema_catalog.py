@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+from contextlib import closing
+
+import pytest
+
+import search_catalog
+from schema import Column, ForeignKey, Index, Table, TableInfo
+from schema_catalog import CatalogSource, SchemaCatalog, table_version
+from table_filter import TableFilter
+
+
+def customers(comment="Customer master data"):
+    return Table(
+        [
+            Column(1, "id", "int", is_nullable="NO", extra="PRI"),
+            Column(2, "customer_ssn", "char", 11, "YES", column_comment="Social security number"),
+        ],
+        indexes=[Index("PRIMARY", ["id"], True, "BTREE")],
+        foreign_keys=[ForeignKey("fk_region", ["id"], "regions", ["id"])],
+        info=TableInfo(comment, "InnoDB", estimated_rows=10),
+    )
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with SchemaCatalog(str(tmp_path / "catalog.db")) as catalog:
+        yield catalog
+
+
+class TestSchemaCatalog:
+    def test_round_trip(self, catalog):
+        run_id = catalog.store({"crm_customers": customers(), "crm_notes": [Column(1, "body", "text")]}, "db", "crm")
+        schema = catalog.get_schema(run_id)
+        assert list(schema) == ["crm_customers", "crm_notes"]
+        assert schema["crm_customers"] == customers()
+        assert schema["crm_customers"].info == customers().info
+        assert schema["crm_customers"].foreign_keys == customers().foreign_keys
+        assert not isinstance(schema["crm_notes"], Table)
+
+    def test_tables_are_stored_once(self, catalog):
+        for db_name in ("tenant1", "tenant2", "tenant1"):
+            catalog.store({"customers": customers()}, "db", db_name)
+        assert [(run[1], run[2], run[4]) for run in catalog.runs()] == [
+            ("db", "tenant1", 1),
+            ("db", "tenant1", 1),
+            ("db", "tenant2", 1),
+        ]
+        assert catalog._connection.execute("SELECT COUNT(*) FROM table_versions").fetchone() == (1,)
+        assert table_version("customers", customers())[0] != table_version("customers", customers("Changed"))[0]
+
+    def test_search_latest_runs(self, catalog):
+        catalog.store({"customers": customers()}, "db1", "shop")
+        catalog.store({"customers": [Column(1, "id", "int")]}, "db1", "shop")
+        catalog.store({"customers": customers()}, "db2", "erp")
+        matches = catalog.search("customer_ssn")
+        assert [(match.db_name, match.table_name, match.column_name) for match in matches] == [
+            ("erp", "customers", "customer_ssn")
+        ]
+        assert len(catalog.search("ssn", all_runs=True)) == 2
+        assert [match.column_name for match in catalog.search("social", db_name="erp")] == ["customer_ssn"]
+        assert [match.comment for match in catalog.search("comment: master")] == ["Customer master data"]
+
+    def test_recording_a_stream(self, catalog):
+        stream = catalog.record(iter([("a", [Column(1, "x", "int")]), ("b", [])]), "db", "shop")
+        assert [name for name, _ in stream] == ["a", "b"]
+        assert catalog.runs() == [(catalog.last_run_id, "db", "shop", catalog.runs()[0][3], 2)]
+
+    def test_stream_holds_no_lock_while_iterated(self, catalog):
+        stream = catalog.record(iter([("a", [Column(1, "x", "int")]), ("b", [])]), "db", "crm")
+        next(stream)
+        writer = threading.Thread(target=catalog.store, args=({"c": []}, "db", "shop"))
+        writer.start()
+        writer.join(5)
+        assert not writer.is_alive()
+        stream.close()
+        assert [run[2] for run in catalog.runs()] == ["shop"]
+
+    def test_other_files_are_left_alone(self, tmp_path):
+        path = str(tmp_path / "other.db")
+        with sqlite3.connect(path) as connection:
+            connection.execute("CREATE TABLE notes (body TEXT)")
+        connection.close()
+        with pytest.raises(ValueError, match="not a schema catalog"):
+            SchemaCatalog(path)
+        with sqlite3.connect(path) as connection:
+            connection.execute("DROP TABLE notes")
+            connection.execute("PRAGMA user_version = 99")
+        connection.close()
+        with pytest.raises(ValueError, match="version 99"):
+            SchemaCatalog(path)
+        with closing(sqlite3.connect(path)) as connection:
+            assert connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone() == (0,)
+
+
+class TestCatalogSource:
+    def test_latest_run_with_table_filter(self, tmp_path, catalog):
+        catalog.store({"crm_customers": customers()}, "db", "crm")
+        run_id = catalog.store({"crm_customers": customers(), "crm_tmp": []}, "db", "crm")
+        with CatalogSource(catalog.path, "crm", table_filter=TableFilter(exclude=["*_tmp"])) as source:
+            assert source.run_id == run_id
+            assert list(source.get_schema()) == ["crm_customers"]
+        with pytest.raises(ValueError, match="no run of erp"):
+            CatalogSource(str(tmp_path / "catalog.db"), "erp")
+
+    def test_search_command(self, catalog, capsys):
+        catalog.store({"customers": customers()}, "db", "shop")
+        search_catalog.main(["--catalog", catalog.path, "customer_ssn"])
+        out = capsys.readouterr().out
+        assert "db/shop  customers.customer_ssn  -- Social security number" in out
+        assert "1 matches in 1 databases" in out
+
+    def test_search_command_falls_back_to_substrings(self, catalog, capsys):
+        catalog.store({"orders": [Column(1, "order-items", "json")]}, "db", "shop")
+        for query in ("order-items", '"order'):
+            search_catalog.main(["--catalog", catalog.path, query])
+        captured = capsys.readouterr()
+        assert captured.err.count("Not a full text query") == 2
+        assert captured.out.splitlines()[:2] == ["db/shop  orders.order-items", "1 matches in 1 databases"]
+
+    def test_search_command_needs_an_existing_catalog(self, tmp_path, capsys):
+        path = tmp_path / "missing.db"
+        with pytest.raises(SystemExit):
+            search_catalog.main(["--catalog", str(path), "customer_ssn"])
+        assert "no schema catalog at" in capsys.readouterr().err
+        assert not path.exists()
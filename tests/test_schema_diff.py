@@ -0,0 +1,118 @@
+import openpyxl
+import pytest
+
+from diff_schema import main
+from schema import Column
+from schema_diff import Change, Snapshot, diff_columns, diff_schemas, table_signature
+
+
+def _users(**changes):
+    email = {"column_type": "varchar", "max_length": "255", "is_nullable": "YES", "column_comment": "User email"}
+    email.update(changes)
+    return [Column(1, "id", "int", "", "NO", "PRI"), Column(2, "email", **email)]
+
+
+class TestTableSignature:
+    def test_equal_for_equal_columns(self):
+        assert table_signature(_users()) == table_signature(_users())
+
+    def test_changes_with_any_attribute(self):
+        assert table_signature(_users()) != table_signature(_users(column_default="x"))
+
+    def test_columns_and_dicts_hash_alike(self):
+        assert table_signature(_users()) == table_signature([column.as_dict() for column in _users()])
+
+
+class TestDiffColumns:
+    def test_retyped_column(self):
+        changes = diff_columns("users", _users(), _users(max_length="320"))
+        assert changes == [Change("users", "email", "retyped", "max_length", "255", "320")]
+
+    def test_nullability_default_and_comment(self):
+        changes = diff_columns("users", _users(), _users(is_nullable="NO", column_default="''", column_comment=""))
+        assert [change.kind for change in changes] == ["nullability", "default", "comment"]
+
+    def test_added_and_dropped_columns(self):
+        new = [_users()[0], Column(2, "name", "varchar", "64")]
+        changes = diff_columns("users", _users(), new)
+        assert changes == [
+            Change("users", "name", "column added", new="varchar"),
+            Change("users", "email", "column dropped", old="varchar"),
+        ]
+
+    def test_moved_columns(self):
+        def table(*names):
+            return [Column(ordinal, name, "int") for ordinal, name in enumerate(names, 1)]
+
+        changes = diff_columns("t", table("a", "b", "c", "d"), table("d", "a", "b", "c"))
+        assert changes == [Change("t", "d", "moved", "ordinal", 4, 1)]
+        # An inserted column shifts the ordinals after it without moving them.
+        assert diff_columns("t", table("a", "b", "c"), table("a", "x", "b", "c")) == [
+            Change("t", "x", "column added", new="int")
+        ]
+        renumbered = [Column(1, "a", "int"), Column(3, "b", "int")]
+        assert diff_columns("t", table("a", "b"), renumbered) == [Change("t", "b", "moved", "ordinal", 2, 3)]
+
+
+class TestDiffSchemas:
+    def test_identical_schemas(self):
+        assert not diff_schemas(Snapshot({"users": _users()}), Snapshot({"users": _users()}))
+
+    def test_added_and_dropped_tables(self):
+        changes = diff_schemas(Snapshot({"users": _users()}), Snapshot({"orders": _users()}))
+        assert changes == [
+            Change("orders", "", "table added", new="2 columns"),
+            Change("users", "", "table dropped", old="2 columns"),
+        ]
+
+    def test_unchanged_tables_are_not_compared(self):
+        old = Snapshot({"users": _users()})
+        # Columns differ but the signatures say the table is unchanged, so it is skipped.
+        new = Snapshot({"users": []}, signatures=dict(old.signatures))
+        assert not diff_schemas(old, new)
+
+
+class TestSnapshot:
+    def test_save_and_load_round_trip(self, tmp_path):
+        path = str(tmp_path / "snapshot.json")
+        Snapshot.from_schema({"users": _users()}, db_name="shop").save(path)
+        loaded = Snapshot.load(path)
+        assert loaded.tables == {"users": _users()}
+        assert loaded.signatures == {"users": table_signature(_users())}
+        assert loaded.info == {"db_name": "shop"}
+
+    def test_load_rejects_other_json(self, tmp_path):
+        path = tmp_path / "other.json"
+        path.write_text('{"tables": {}}')
+        with pytest.raises(ValueError):
+            Snapshot.load(str(path))
+
+
+class TestDiffSchemaScript:
+    def test_writes_changes_workbook(self, tmp_path):
+        old = str(tmp_path / "old.json")
+        new = str(tmp_path / "new.json")
+        output = str(tmp_path / "changes.xlsx")
+        Snapshot({"users": _users()}).save(old)
+        Snapshot({"users": _users(max_length="320"), "orders": _users()}).save(new)
+        main([old, new, "--output", output])
+
+        workbook = openpyxl.load_workbook(output)
+        rows = list(workbook["Changes"].iter_rows(values_only=True))
+        assert rows[0] == ("TABLE_NAME", "COLUMN_NAME", "CHANGE", "FIELD", "OLD", "NEW")
+        assert ("users", "email", "retyped", "max_length", "255", "320") in rows
+        assert ("orders", "", "table added", "", "", "2 columns") in rows
+        workbook.close()
+
+    def test_save_copies_new_snapshot(self, tmp_path):
+        source = str(tmp_path / "source.json")
+        copy = str(tmp_path / "copy.json")
+        Snapshot({"users": _users()}).save(source)
+        # Comparing a snapshot with itself saves a copy and finds no changes.
+        main(["--save", copy, "--output", str(tmp_path / "unused.xlsx"), source, source])
+        assert Snapshot.load(copy).signatures == Snapshot.load(source).signatures
+
+    def test_live_database_settings_from_config(self, tmp_path):
+        missing = str(tmp_path / "configs.py")
+        with pytest.raises(SystemExit, match="configs.py not found"):
+            main(["--config", missing, "--save", str(tmp_path / "live.json")])
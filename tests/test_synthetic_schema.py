@@ -0,0 +1,49 @@
+import json
+
+from benchmark import main
+from grouping import table_prefix
+from synthetic_schema import SyntheticSchema
+
+
+class TestSyntheticSchema:
+    def test_deterministic(self):
+        assert SyntheticSchema(50, seed=3).rows() == SyntheticSchema(50, seed=3).rows()
+        assert SyntheticSchema(50, seed=3).rows() != SyntheticSchema(50, seed=4).rows()
+
+    def test_shape(self):
+        synthetic = SyntheticSchema(tables=30, columns_per_table=4, prefixes=3)
+        schema = synthetic.schema()
+        assert len(schema) == 30
+        assert all(len(columns) == 4 for columns in schema.values())
+        assert {table_prefix(table) for table in schema} == {"app0000", "app0001", "app0002"}
+        assert synthetic.columns == 120
+
+    def test_rows_are_ordered_like_the_catalog(self):
+        rows = SyntheticSchema(tables=25, columns_per_table=3).rows()
+        assert rows == sorted(rows, key=lambda row: (row[0], row[1]))
+
+    def test_comments(self):
+        comments = [row[7] for row in SyntheticSchema(200, comment_length=12, unicode_ratio=1.0).rows() if row[1] > 1]
+        assert all(len(comment) <= 12 for comment in comments)
+        assert all(not comment.isascii() for comment in comments)
+
+
+class TestBenchmark:
+    def test_writes_results(self, tmp_path):
+        output = str(tmp_path / "results.json")
+        main(["--tables", "5", "--columns", "3", "--no-memory", "--output", output])
+        with open(output, encoding="utf-8") as results_file:
+            report = json.load(results_file)
+        phases = [entry["phase"] for entry in report["results"]]
+        assert phases == ["transform", "create_table", "close", "generate_xlsx", "generate_xlsx_simple"]
+        assert all(entry["columns"] == 15 for entry in report["results"])
+        cells = {entry["phase"]: entry["cells_per_sec"] for entry in report["results"]}
+        assert cells["transform"] is None
+        assert cells["create_table"] > 0
+
+    def test_compare_with_earlier_results(self, tmp_path, capsys):
+        small = ["--tables", "5", "--columns", "3", "--no-memory"]
+        baseline = str(tmp_path / "baseline.json")
+        main([*small, "--output", baseline])
+        main([*small, "--output", str(tmp_path / "new.json"), "--compare", baseline])
+        assert "columns/sec" in capsys.readouterr().out
@@ -0,0 +1,71 @@
+import pytest
+
+from table_filter import TableFilter, TablePattern
+
+
+class TestTablePattern:
+    @pytest.mark.parametrize(
+        ("text", "like"),
+        [("billing_*", "billing!_%"), ("crm_?", "crm!__"), ("100%_off", "100!%!_off"), ("like:crm%", "crm%")],
+    )
+    def test_like_translation(self, text, like):
+        assert TablePattern(text).like == like
+
+    def test_glob_matches_whole_name(self):
+        pattern = TablePattern("billing_*")
+        assert pattern.matches("billing_invoices")
+        assert pattern.matches("BILLING_invoices")
+        assert not pattern.matches("billingx")
+        assert not pattern.matches("old_billing_invoices")
+
+    def test_like_escape(self):
+        assert TablePattern("like:a!_b%").matches("a_bc")
+        assert not TablePattern("like:a!_b%").matches("axbc")
+
+    def test_regex_searches(self):
+        pattern = TablePattern(r"re:_\d{4}$")
+        assert pattern.like is None
+        assert pattern.matches("log_2024")
+        assert not pattern.matches("log_2024_old")
+
+    def test_regex_ignores_case(self):
+        assert TablePattern("re:^billing_").matches("Billing_invoices")
+
+
+class TestTableFilter:
+    def test_empty_filter(self):
+        table_filter = TableFilter()
+        assert not table_filter
+        assert table_filter.where("table_name", "%s") == ("", ())
+        assert table_filter.matches("anything")
+
+    def test_includes_are_or_excludes_are_and(self):
+        table_filter = TableFilter(include=["billing_*", "crm_*"], exclude=["*_tmp"])
+        clause, params = table_filter.where("table_name", "%s")
+        assert clause == (
+            " AND (table_name LIKE %s ESCAPE '!' OR table_name LIKE %s ESCAPE '!')"
+            " AND table_name NOT LIKE %s ESCAPE '!'"
+        )
+        assert params == ("billing!_%", "crm!_%", "%!_tmp")
+        assert not table_filter.client_side(regexp=False)
+
+    def test_regex_pushed_down_with_regexp(self):
+        table_filter = TableFilter(include=["re:^(billing|crm)_"], exclude=["re:_tmp$"])
+        clause, params = table_filter.where("table_name", "%s", regexp=True)
+        assert clause == " AND (table_name REGEXP %s) AND table_name NOT REGEXP %s"
+        assert params == ("^(billing|crm)_", "_tmp$")
+        _, params = table_filter.where("table_name", "%s", regexp=True, regexp_prefix="(?i)")
+        assert params == ("(?i)^(billing|crm)_", "(?i)_tmp$")
+        assert not table_filter.client_side(regexp=True)
+
+    def test_regex_falls_back_to_client_side(self):
+        table_filter = TableFilter(include=["billing_*", "re:^crm_"], exclude=["*_tmp", "re:_old$"])
+        clause, params = table_filter.where("t.name", "?")
+        # The include list cannot be expressed as a whole; the LIKE exclude still is.
+        assert clause == " AND t.name NOT LIKE ? ESCAPE '!'"
+        assert params == ("%!_tmp",)
+        assert table_filter.client_side(regexp=False)
+        assert [name for name in ("billing_a", "crm_b", "crm_b_old", "hr_c") if table_filter.matches(name)] == [
+            "billing_a",
+            "crm_b",
+        ]
@@ -0,0 +1,47 @@
+import pytest
+
+from text_width import bold_string_width, max_string_width, pixel_width, pixels_to_width, string_width
+
+
+class TestPixelWidth:
+    def test_ascii(self):
+        assert pixel_width("id") == 12
+        assert pixel_width("WWW") > pixel_width("iii")
+
+    def test_east_asian_wide(self):
+        assert pixel_width("顧客") == 30
+
+    def test_accented_letters_match_base_letter(self):
+        assert pixel_width("é") == pixel_width("e")
+        assert pixel_width("Ä") == pixel_width("A")
+
+    def test_combining_marks_have_no_width(self):
+        assert pixel_width("é") == pixel_width("e")
+
+    def test_empty(self):
+        assert pixel_width("") == 0
+
+
+class TestStringWidth:
+    def test_includes_cell_padding(self):
+        assert string_width("0") == pytest.approx(pixels_to_width(7 + 7))
+
+    def test_empty(self):
+        assert string_width("") == pytest.approx(0.0)
+
+    def test_narrow_text_is_narrower_than_len(self):
+        assert string_width("illicit") < string_width("MMMMMMM")
+
+    def test_memoized(self):
+        string_width.cache_clear()
+        string_width("varchar(255)")
+        string_width("varchar(255)")
+        assert string_width.cache_info().hits == 1
+
+    def test_bold_adds_a_pixel_per_character(self):
+        assert bold_string_width("abc") == pytest.approx(string_width("abc") + 3 / 7)
+
+    def test_max_string_width(self):
+        assert max_string_width(["a", "created_at", "id"]) == pytest.approx(string_width("created_at"))
+        assert max_string_width([]) == pytest.approx(0.0)
+        assert max_string_width(["ab"], bold=True) == pytest.approx(bold_string_width("ab"))
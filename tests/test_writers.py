@@ -0,0 +1,114 @@
+import csv
+import json
+
+import pytest
+
+from schema import Column, ForeignKey, Table, TableInfo
+from writers import CsvWriter, HtmlWriter, JsonLinesWriter, MarkdownWriter, TextWriter, get_writer
+
+
+def _schema():
+    return {
+        "users": [
+            Column(1, "id", "int", "", "NO", "PRI", "Primary key"),
+            Column(2, "email", "varchar", 255, "YES", "", "User | email"),
+        ],
+        "orders": [Column(1, "note", "text", "", "YES", "", "<b>free</b>\ntext")],
+    }
+
+
+class TestCsvWriter:
+    def test_one_row_per_column(self, tmp_path):
+        path = tmp_path / "dictionary.csv"
+        assert CsvWriter(str(path)).write_schema(_schema()) == 2
+        with open(path, encoding="utf-8", newline="") as csv_file:
+            rows = list(csv.reader(csv_file))
+        assert rows[0][:3] == ["TABLE_NAME", "COLUMN_ID", "COLUMN_NAME"]
+        assert rows[2] == ["users", "2", "email", "User | email", "varchar", "255", "YES", ""]
+        assert len(rows) == 4
+
+    def test_unix_line_endings(self, tmp_path):
+        path = tmp_path / "dictionary.csv"
+        CsvWriter(str(path)).write_schema(_schema())
+        assert b"\r\n" not in path.read_bytes().replace(b'"<b>free</b>\ntext"', b"")
+
+
+class TestJsonLinesWriter:
+    def test_one_line_per_table(self, tmp_path):
+        path = tmp_path / "dictionary.jsonl"
+        JsonLinesWriter(str(path)).write_schema(iter(_schema().items()))
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [record["table"] for record in records] == ["users", "orders"]
+        assert records[0]["columns"][1]["max_length"] == 255
+
+    def test_keeps_unicode_readable(self, tmp_path):
+        path = tmp_path / "dictionary.jsonl"
+        JsonLinesWriter(str(path)).write_schema({"顧客": [Column(1, "名前", "nvarchar")]})
+        assert "顧客" in path.read_text(encoding="utf-8")
+
+    def test_details(self, tmp_path):
+        path = tmp_path / "dictionary.jsonl"
+        table = Table(_schema()["orders"], foreign_keys=[ForeignKey("fk_user", ["user_id"], "users", ["id"])])
+        JsonLinesWriter(str(path)).write_schema({"orders": table, "users": _schema()["users"]})
+        orders, users = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert orders["foreign_keys"][0]["referenced_table"] == "users"
+        assert orders["indexes"] == []
+        assert orders["info"] is None
+        assert "indexes" not in users
+
+
+class TestMarkdownWriter:
+    def test_escapes_pipes_and_newlines(self, tmp_path):
+        path = tmp_path / "dictionary.md"
+        MarkdownWriter(str(path)).write_schema(_schema())
+        text = path.read_text(encoding="utf-8")
+        assert "## users" in text
+        assert "| 2 | email | User \\| email | varchar | 255 | YES |  |" in text
+        assert "<b>free</b><br>text" in text
+
+    def test_empty_schema(self, tmp_path):
+        path = tmp_path / "dictionary.md"
+        assert MarkdownWriter(str(path)).write_schema({}) == 0
+        assert path.read_text(encoding="utf-8") == "# Data Dictionary\n"
+
+    def test_table_comment(self, tmp_path):
+        path = tmp_path / "dictionary.md"
+        table = Table(_schema()["users"], info=TableInfo("Accounts | logins"))
+        MarkdownWriter(str(path)).write_schema({"users": table})
+        assert "## users\n\nAccounts \\| logins\n\n| COLUMN_ID" in path.read_text(encoding="utf-8")
+
+
+class TestHtmlWriter:
+    def test_escapes_markup(self, tmp_path):
+        path = tmp_path / "dictionary.html"
+        HtmlWriter(str(path)).write_schema(_schema())
+        text = path.read_text(encoding="utf-8")
+        assert '<h2 id="orders">orders</h2>' in text
+        assert "&lt;b&gt;free&lt;/b&gt;" in text
+        assert text.endswith("</html>\n")
+
+    def test_header_row_per_table(self, tmp_path):
+        path = tmp_path / "dictionary.html"
+        HtmlWriter(str(path)).write_schema(_schema())
+        assert path.read_text(encoding="utf-8").count(HtmlWriter.header_row) == 2
+
+    def test_table_comment(self, tmp_path):
+        path = tmp_path / "dictionary.html"
+        HtmlWriter(str(path)).write_schema({"users": Table(_schema()["users"], info=TableInfo("<Accounts>"))})
+        assert '<h2 id="users">users</h2>\n<p>&lt;Accounts&gt;</p>\n<table>' in path.read_text(encoding="utf-8")
+
+
+class TestGetWriter:
+    def test_known_format(self):
+        assert get_writer("md") is MarkdownWriter
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError, match="xlsx, csv, jsonl, md, html"):
+            get_writer("pdf")
+
+    def test_writer_without_write_table_is_rejected(self, tmp_path):
+        class IncompleteWriter(TextWriter):  # pylint: disable=abstract-method
+            extension = "txt"
+
+        with pytest.raises(TypeError, match="write_table"):
+            IncompleteWriter(str(tmp_path / "out.txt"))  # pylint: disable=abstract-class-instantiated
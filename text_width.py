@@ -0,0 +1,94 @@
+import unicodedata
+from functools import lru_cache
+
+# Text widths for auto-fitting Excel columns. Widths are measured in pixels of
+# the default Excel font (Calibri 11 at 96 DPI) and converted to column width
+# units the way Excel does: a column of width w is w * 7 + 5 pixels wide (7 px
+# per digit plus 5 px of margin), and a cell needs 7 px of padding around its text.
+
+# Pixel widths of the printable ASCII characters in Calibri 11, as measured in Excel.
+ASCII_PIXELS = {
+    " ": 3, "!": 5, '"': 6, "#": 7, "$": 7, "%": 11, "&": 10, "'": 3, "(": 5, ")": 5, "*": 7, "+": 7,
+    ",": 4, "-": 5, ".": 4, "/": 6, "0": 7, "1": 7, "2": 7, "3": 7, "4": 7, "5": 7, "6": 7, "7": 7,
+    "8": 7, "9": 7, ":": 4, ";": 4, "<": 7, "=": 7, ">": 7, "?": 7, "@": 13, "A": 9, "B": 8, "C": 8,
+    "D": 9, "E": 7, "F": 7, "G": 9, "H": 9, "I": 4, "J": 5, "K": 8, "L": 6, "M": 12, "N": 10, "O": 10,
+    "P": 8, "Q": 10, "R": 8, "S": 7, "T": 7, "U": 9, "V": 9, "W": 13, "X": 8, "Y": 7, "Z": 7, "[": 5,
+    "\\": 6, "]": 5, "^": 7, "_": 7, "`": 4, "a": 7, "b": 8, "c": 6, "d": 8, "e": 8, "f": 5, "g": 7,
+    "h": 8, "i": 4, "j": 4, "k": 7, "l": 4, "m": 12, "n": 8, "o": 8, "p": 8, "q": 8, "r": 5, "s": 6,
+    "t": 5, "u": 8, "v": 7, "w": 11, "x": 7, "y": 7, "z": 6, "{": 5, "|": 7, "}": 5, "~": 7,
+}  # fmt: skip
+
+# Glyphs without a metric of their own (Greek, Cyrillic, symbols, ...).
+DEFAULT_PIXELS = 8
+# East Asian wide and fullwidth glyphs are rendered from a fallback CJK font
+# and take roughly two digit widths.
+WIDE_PIXELS = 15
+# Calibri Bold is about one pixel wider per glyph than the regular weight.
+BOLD_EXTRA_PIXELS = 1
+
+DIGIT_PIXELS = 7
+COLUMN_MARGIN_PIXELS = 5
+CELL_PADDING_PIXELS = 7
+
+_ASCII_TABLE = bytes(ASCII_PIXELS.get(chr(code), 0) for code in range(128))
+
+
+def _glyph_pixels(char: str) -> int:
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return WIDE_PIXELS
+    # Accented Latin letters are as wide as their base letter.
+    base = unicodedata.normalize("NFD", char)[0]
+    if base != char and base in ASCII_PIXELS:
+        return ASCII_PIXELS[base]
+    return DEFAULT_PIXELS
+
+
+@lru_cache(maxsize=1)
+def _bmp_table() -> bytes:
+    # Built on first use (~25 ms) so that importing this module stays cheap.
+    return bytes(_ASCII_TABLE[code] if code < 128 else _glyph_pixels(chr(code)) for code in range(0x10000))
+
+
+def pixel_width(text: str) -> int:
+    """Width of ``text`` in pixels, excluding the cell padding."""
+    if text.isascii():
+        return sum(_ASCII_TABLE[code] for code in text.encode("ascii"))
+    table = _bmp_table()
+    pixels = 0
+    for char in text:
+        code = ord(char)
+        pixels += table[code] if code < 0x10000 else _glyph_pixels(char)
+    return pixels
+
+
+def pixels_to_width(pixels: int) -> float:
+    """Convert a column width in pixels to Excel column width units."""
+    if pixels <= 0:
+        return 0.0
+    return max(pixels - COLUMN_MARGIN_PIXELS, 0) / DIGIT_PIXELS
+
+
+@lru_cache(maxsize=65536)
+def string_width(text: str) -> float:
+    """
+    Excel column width needed to show ``text`` without truncation. Memoized per
+    distinct string, since dictionary cells repeat heavily ("int", "YES", ...).
+    """
+    if not text:
+        return 0.0
+    return pixels_to_width(pixel_width(text) + CELL_PADDING_PIXELS)
+
+
+def bold_string_width(text: str) -> float:
+    """string_width() for text in a bold cell format."""
+    if not text:
+        return 0.0
+    return string_width(text) + BOLD_EXTRA_PIXELS * len(text) / DIGIT_PIXELS
+
+
+def max_string_width(strings, bold: bool = False) -> float:
+    """Widest string_width() of an iterable of strings, computed in one pass."""
+    measure = bold_string_width if bold else string_width
+    return max(map(measure, strings), default=0.0)
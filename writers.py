@@ -0,0 +1,158 @@
+import csv
+import html
+import json
+import os
+from abc import ABC, abstractmethod
+
+from metrics import METRICS
+from schema import iter_schema_items, table_to_dict
+
+# Same columns as the xlsx dictionary, prefixed with the table name so every
+# row of the flat formats stands on its own.
+HEADER = ("TABLE_NAME", "COLUMN_ID", "COLUMN_NAME", "DESCRIPTION", "DATA_TYPE", "DATA_LENGTH", "NULLABLE", "Key Type")
+
+
+def dictionary_rows(table_name: str, columns) -> list:
+    return [
+        (
+            table_name,
+            str(index + 1),
+            column["column_name"],
+            column["column_comment"],
+            column["column_type"],
+            str(column["max_length"]),
+            column["is_nullable"],
+            column["extra"],
+        )
+        for index, column in enumerate(columns)
+    ]
+
+
+class TextWriter(ABC):
+    """
+    Base class of the plain text writers. Tables are written one at a time as
+    they come off the schema stream, so only the current table is held in
+    memory, and the output is stable line by line so it diffs cleanly in git.
+    """
+
+    extension = ""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file = None
+
+    def write_start(self):  # noqa: B027 - optional hook
+        """Write what comes before the first table."""
+
+    @abstractmethod
+    def write_table(self, table_name: str, columns):
+        """Write the rows of one table."""
+
+    def write_end(self):  # noqa: B027 - optional hook
+        """Write what comes after the last table."""
+
+    def write_schema(self, data) -> int:
+        """Write a {table_name: columns} dict or (table_name, columns) stream; return the table count."""
+        tables = 0
+        # newline="" leaves line endings to the writers: always "\n", on every platform.
+        with open(self.filename, "w", encoding="utf-8", newline="") as self._file:
+            self.write_start()
+            for table_name, columns in iter_schema_items(data):
+                with METRICS.phase("write"):
+                    self.write_table(table_name, columns)
+                tables += 1
+            self.write_end()
+        METRICS.count("tables_written", tables)
+        if METRICS.enabled:
+            METRICS.count("bytes_output", os.path.getsize(self.filename))
+        return tables
+
+
+class CsvWriter(TextWriter):
+    extension = "csv"
+    _csv = None
+
+    def write_start(self):
+        self._csv = csv.writer(self._file, lineterminator="\n")
+        self._csv.writerow(HEADER)
+
+    def write_table(self, table_name, columns):
+        self._csv.writerows(dictionary_rows(table_name, columns))
+
+
+class JsonLinesWriter(TextWriter):
+    # One JSON object per table and line, with the table metadata, indexes,
+    # foreign keys and constraints when the schema was fetched with details.
+    extension = "jsonl"
+
+    def write_table(self, table_name, columns):
+        record = {"table": table_name, **table_to_dict(columns)}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def markdown_cell(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("|", "\\|").replace("\r\n", "<br>").replace("\n", "<br>")
+
+
+def table_comment(columns) -> str:
+    """Comment of a table fetched with details, else ""."""
+    info = getattr(columns, "info", None)
+    return info.comment if info is not None else ""
+
+
+class MarkdownWriter(TextWriter):
+    extension = "md"
+
+    def write_start(self):
+        self._file.write("# Data Dictionary\n")
+
+    def write_table(self, table_name, columns):
+        lines = [f"\n## {markdown_cell(table_name)}\n\n"]
+        if comment := table_comment(columns):
+            lines.append(f"{markdown_cell(comment)}\n\n")
+        lines.append("| " + " | ".join(HEADER[1:]) + " |\n")
+        lines.append("|" + "---|" * (len(HEADER) - 1) + "\n")
+        for row in dictionary_rows(table_name, columns):
+            lines.append("| " + " | ".join(markdown_cell(value) for value in row[1:]) + " |\n")
+        self._file.write("".join(lines))
+
+
+class HtmlWriter(TextWriter):
+    extension = "html"
+    header_row = "<tr>" + "".join(f"<th>{html.escape(name)}</th>" for name in HEADER[1:]) + "</tr>\n"
+
+    def write_start(self):
+        self._file.write(
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>Data Dictionary</title>\n'
+            "<style>table{border-collapse:collapse;margin-bottom:2em}"
+            "th,td{border:1px solid #999;padding:2px 6px;text-align:left}</style>\n"
+            "</head>\n<body>\n<h1>Data Dictionary</h1>\n"
+        )
+
+    def write_table(self, table_name, columns):
+        name = html.escape(table_name)
+        lines = [f'<h2 id="{name}">{name}</h2>\n']
+        if comment := table_comment(columns):
+            lines.append(f"<p>{html.escape(comment)}</p>\n")
+        lines += ["<table>\n", self.header_row]
+        for row in dictionary_rows(table_name, columns):
+            lines.append("<tr>" + "".join(f"<td>{html.escape(value)}</td>" for value in row[1:]) + "</tr>\n")
+        lines.append("</table>\n")
+        self._file.write("".join(lines))
+
+    def write_end(self):
+        self._file.write("</body>\n</html>\n")
+
+
+# Text output formats by name; "xlsx" is handled by generate.ExportDataDictionary.
+WRITERS = {writer.extension: writer for writer in (CsvWriter, JsonLinesWriter, MarkdownWriter, HtmlWriter)}
+OUTPUT_FORMATS = ("xlsx", *WRITERS)
+
+
+def get_writer(output_format: str):
+    try:
+        return WRITERS[output_format]
+    except KeyError:
+        raise ValueError(
+            f"Unknown output format {output_format!r}, expected one of {', '.join(OUTPUT_FORMATS)}"
+        ) from None